@@ -4,21 +4,57 @@ from routes.portfolio import portfolio
 from routes.market_data import market_data
 from routes.auth import auth
 from routes.news import news
+from routes.health import health
+from utils.metrics import init_request_metrics
+from utils.json_provider import FastJSONProvider
+from utils.compression import init_compression
+from utils.logging_setup import configure_logging
+from utils.hash_password import calibrate_rounds
+
+
+def create_app():
+    """
+    Build the Flask app. Production imports this through wsgi.py under
+    gunicorn (see gunicorn.conf.py); `python app.py` runs the dev server.
+    """
+    # Queue-based JSON logging with per-module levels
+    configure_logging()
+
+    app = Flask(__name__)
+
+    # Serialize NumPy values, datetimes and ObjectIds natively with orjson
+    app.json = FastJSONProvider(app)
+
+    CORS(app, resources={
+        r"/*": {
+            "origins": ["http://localhost:5173"],  # Vite's default port
+            "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+            "allow_headers": ["Content-Type", "Authorization"]
+        }
+    })
+
+    # Register blueprints
+    app.register_blueprint(portfolio, url_prefix='/portfolio')
+    app.register_blueprint(market_data, url_prefix='/api/market')
+    app.register_blueprint(auth, url_prefix='/auth')
+    app.register_blueprint(news, url_prefix='/api/news')
+    app.register_blueprint(health, url_prefix='/health')
+
+    # Request timing and the Prometheus /metrics endpoint
+    init_request_metrics(app)
+
+    # gzip/brotli for large JSON payloads
+    init_compression(app)
+
+    # Size the bcrypt cost to this machine before serving logins
+    calibrate_rounds()
+
+    return app
 
-app = Flask(__name__)
-CORS(app, resources={
-    r"/*": {
-        "origins": ["http://localhost:5173"],  # Vite's default port
-        "methods": ["GET", "POST", "PUT", "DELETE", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
-    }
-})
-
-# Register blueprints
-app.register_blueprint(portfolio, url_prefix='/portfolio')
-app.register_blueprint(market_data, url_prefix='/api/market')
-app.register_blueprint(auth, url_prefix='/auth')
-app.register_blueprint(news, url_prefix='/api/news')
 
 if __name__ == '__main__':
+    from models.warmup import warm_up_in_background
+
+    app = create_app()
+    warm_up_in_background()
     app.run(debug=True, port=5000)
@@ -0,0 +1,73 @@
+"""
+Benchmark the discrete allocation engine: allocation error against runtime.
+
+Run from the backend directory:
+    python -m benchmarks.discrete_allocation [--users 10000] [--assets 6]
+"""
+import argparse
+import time
+
+import numpy as np
+
+from models.discrete_allocation import allocate_lots, allocate_lots_batch
+
+
+def make_problems(users, assets, seed=0):
+    rng = np.random.default_rng(seed)
+    prices = rng.uniform(200, 4000, assets)
+    budgets = rng.uniform(20000, 700000, users)
+    weights = rng.dirichlet(np.ones(assets), users)
+    lot_sizes = rng.choice([1, 1, 1, 5, 10], assets)
+    return weights * budgets[:, None], prices, budgets, lot_sizes
+
+
+def weight_error(quantities, targets, prices, budgets):
+    """Mean absolute deviation from target weights, in percentage points"""
+    return float(np.mean(np.abs(quantities * prices - targets).sum(axis=1) / budgets) * 100)
+
+
+def truncate(targets, prices, lot_sizes):
+    """The old behaviour: round every position down independently"""
+    lot_cost = prices * lot_sizes
+    return np.floor(targets / lot_cost) * lot_sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--assets', type=int, default=6)
+    parser.add_argument('--exact-users', type=int, default=200,
+                        help='portfolios solved one at a time for the per-request and exact rows')
+    args = parser.parse_args()
+
+    targets, prices, budgets, lot_sizes = make_problems(args.users, args.assets)
+    rows = []
+
+    start = time.perf_counter()
+    quantities = truncate(targets, prices, lot_sizes)
+    rows.append(('truncate (batch)', args.users, time.perf_counter() - start,
+                 weight_error(quantities, targets, prices, budgets)))
+
+    start = time.perf_counter()
+    quantities, _ = allocate_lots_batch(targets, prices, budgets, lot_sizes)
+    rows.append(('greedy (batch)', args.users, time.perf_counter() - start,
+                 weight_error(quantities, targets, prices, budgets)))
+
+    n = min(args.exact_users, args.users)
+    for method in ('greedy', 'exact'):
+        start = time.perf_counter()
+        quantities = np.array([
+            allocate_lots(targets[u], prices, budgets[u], lot_sizes, method=method)[0]
+            for u in range(n)
+        ])
+        rows.append((f'{method} (per request)', n, time.perf_counter() - start,
+                     weight_error(quantities, targets[:n], prices, budgets[:n])))
+
+    print(f"{args.assets} assets, lot sizes {lot_sizes.tolist()}")
+    print(f"{'method':<22}{'portfolios':>12}{'total s':>12}{'us/portfolio':>15}{'weight error %':>17}")
+    for name, count, seconds, error in rows:
+        print(f"{name:<22}{count:>12}{seconds:>12.4f}{seconds / count * 1e6:>15.1f}{error:>17.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Load-test logins against a running server and measure how much they slow
+down other routes.
+
+Creates (or reuses) a test user, then runs three phases:
+  1. baseline: probe a light route alone
+  2. login load: N concurrent login loops while the probe keeps running
+  3. report login throughput, 503 rejections and probe latency percentiles
+
+Run from the backend directory against a server started with app.py or gunicorn:
+    python -m benchmarks.login_load --url http://localhost:5000 --concurrency 16 --seconds 20
+"""
+import argparse
+import statistics
+import threading
+import time
+
+import requests
+
+PROBE_PATH = '/portfolio/risk-allocation-chart'
+
+
+def ensure_user(base_url, username, password):
+    requests.post(f'{base_url}/auth/signup', json={
+        'first_name': 'Load', 'last_name': 'Test', 'username': username, 'password': password
+    }, timeout=30)
+    response = requests.post(f'{base_url}/auth/login', json={'username': username, 'password': password}, timeout=30)
+    response.raise_for_status()
+
+
+def percentile(samples, p):
+    if not samples:
+        return float('nan')
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(p / 100 * len(samples)))]
+
+
+def probe(base_url, stop, latencies):
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.get(f'{base_url}{PROBE_PATH}', timeout=30)
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.02)
+
+
+def login_loop(base_url, username, password, stop, counts, lock):
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = session.post(f'{base_url}/auth/login', json={'username': username, 'password': password}, timeout=30)
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            counts[response.status_code] = counts.get(response.status_code, 0) + 1
+            if response.status_code == 200:
+                counts.setdefault('latencies', []).append(elapsed)
+
+
+def run_phase(base_url, seconds, concurrency, username, password):
+    stop = threading.Event()
+    probe_latencies, counts, lock = [], {}, threading.Lock()
+    threads = [threading.Thread(target=probe, args=(base_url, stop, probe_latencies))]
+    threads += [
+        threading.Thread(target=login_loop, args=(base_url, username, password, stop, counts, lock))
+        for _ in range(concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return probe_latencies, counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5000')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=20)
+    parser.add_argument('--username', default='loadtest_user')
+    parser.add_argument('--password', default='loadtest-password')
+    args = parser.parse_args()
+
+    ensure_user(args.url, args.username, args.password)
+
+    baseline, _ = run_phase(args.url, args.seconds / 2, 0, args.username, args.password)
+    loaded, counts = run_phase(args.url, args.seconds, args.concurrency, args.username, args.password)
+
+    logins = counts.get(200, 0)
+    login_latencies = counts.get('latencies', [])
+    print(f"Login load: {args.concurrency} concurrent clients for {args.seconds:.0f}s")
+    print(f"  successful logins/s: {logins / args.seconds:.1f}")
+    print(f"  rejected (503):      {counts.get(503, 0)}")
+    print(f"  login latency ms:    p50={percentile(login_latencies, 50):.0f} p95={percentile(login_latencies, 95):.0f}")
+    print(f"Probe {PROBE_PATH} latency ms:")
+    print(f"  baseline:     p50={percentile(baseline, 50):.1f} p95={percentile(baseline, 95):.1f} "
+          f"mean={statistics.fmean(baseline) if baseline else float('nan'):.1f}")
+    print(f"  during login: p50={percentile(loaded, 50):.1f} p95={percentile(loaded, 95):.1f} "
+          f"mean={statistics.fmean(loaded) if loaded else float('nan'):.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,101 @@
-from pymongo import MongoClient
+import os
 
-client = MongoClient("mongodb://localhost:27017/")
-db = client["financial_advisory"]
-users_collection = db["users"]
+# MongoDB: one lazily-connected client per process (see database/connection.py).
+# Size the pool to at least the number of request threads per worker.
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://localhost:27017/')
+MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME', 'financial_advisory')
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 15000))
+# "primary" keeps read-your-writes for signup -> login; reporting jobs can use
+# "secondaryPreferred" through their own client
+MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
 
 # JWT configuration
 SECRET_KEY = 'your-secret-key'  # Change this in production
-TOKEN_EXPIRATION = 24  # hours
\ No newline at end of file
+TOKEN_EXPIRATION = 24  # hours
+TOKEN_CACHE_SIZE = 10000  # verified tokens kept in memory until they expire
+
+# Stock screening universe: a text/CSV file with one NSE symbol per line.
+# Falls back to the built-in NIFTY 50 subset when unset.
+STOCK_UNIVERSE_FILE = os.environ.get('STOCK_UNIVERSE_FILE')
+
+# Market data is considered fresh for this long; snapshots built from it are
+# versioned by refresh window
+MARKET_DATA_REFRESH_SECONDS = int(os.environ.get('MARKET_DATA_REFRESH_SECONDS', 6 * 3600))
+# After a failed snapshot rebuild the next attempt waits this long, doubling
+# per consecutive failure up to the maximum
+SNAPSHOT_RETRY_SECONDS = int(os.environ.get('SNAPSHOT_RETRY_SECONDS', 30))
+SNAPSHOT_RETRY_MAX_SECONDS = int(os.environ.get('SNAPSHOT_RETRY_MAX_SECONDS', 900))
+
+# NewsAPI.org key; without one every news fetch fails with NewsAPI's 401
+NEWS_API_KEY = os.environ.get('NEWS_API_KEY', '')
+
+# NewsAPI responses are served from memory for NEWS_CACHE_TTL seconds, then
+# served stale for up to NEWS_CACHE_STALE_TTL more while one refresh runs
+NEWS_CACHE_TTL = int(os.environ.get('NEWS_CACHE_TTL', 300))
+NEWS_CACHE_STALE_TTL = int(os.environ.get('NEWS_CACHE_STALE_TTL', 1800))
+NEWS_CACHE_SIZE = int(os.environ.get('NEWS_CACHE_SIZE', 256))
+# Per-symbol news: held tickers are refreshed together in the background every
+# NEWS_TICKER_REFRESH_SECONDS (0 disables) by the one worker holding
+# NEWS_REFRESH_LOCK_PATH, and the other workers read the results from the news
+# index; other symbols are fetched on demand
+NEWS_TICKER_CACHE_TTL = int(os.environ.get('NEWS_TICKER_CACHE_TTL', 900))
+NEWS_TICKER_REFRESH_SECONDS = int(os.environ.get('NEWS_TICKER_REFRESH_SECONDS', 900))
+NEWS_REFRESH_LOCK_PATH = os.environ.get(
+    'NEWS_REFRESH_LOCK_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'news_refresh.lock')
+)
+NEWS_TICKER_ARTICLES = 5
+# Articles whose title+description SimHashes differ in at most this many bits
+# are one story; the index remembers the last NEWS_DEDUP_WINDOW stories
+NEWS_DEDUP_MAX_DISTANCE = int(os.environ.get('NEWS_DEDUP_MAX_DISTANCE', 6))
+NEWS_DEDUP_WINDOW = int(os.environ.get('NEWS_DEDUP_WINDOW', 5000))
+# Every fetched article is kept in a local SQLite full-text index for
+# /api/news/search (empty path disables it); entries older than the retention
+# period are pruned as new articles are added, at most once per
+# NEWS_INDEX_PRUNE_SECONDS per process
+NEWS_INDEX_PATH = os.environ.get(
+    'NEWS_INDEX_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'news_index.db')
+)
+NEWS_INDEX_RETENTION_DAYS = int(os.environ.get('NEWS_INDEX_RETENTION_DAYS', 90))
+NEWS_INDEX_PRUNE_SECONDS = int(os.environ.get('NEWS_INDEX_PRUNE_SECONDS', 3600))
+# Lexicon sentiment of indexed articles, scored in background batches and
+# averaged per ticker with exponential decay by article age. NEWS_SENTIMENT_TILT
+# is the largest change (annualized, e.g. 0.02 = 2 points) sentiment may make to
+# an asset's expected return in the optimizer; 0 leaves returns untouched.
+NEWS_SENTIMENT_HALF_LIFE_HOURS = float(os.environ.get('NEWS_SENTIMENT_HALF_LIFE_HOURS', 48))
+NEWS_SENTIMENT_WINDOW_DAYS = int(os.environ.get('NEWS_SENTIMENT_WINDOW_DAYS', 14))
+NEWS_SENTIMENT_BATCH_SIZE = int(os.environ.get('NEWS_SENTIMENT_BATCH_SIZE', 2000))
+NEWS_SENTIMENT_TILT = float(os.environ.get('NEWS_SENTIMENT_TILT', 0.0))
+
+# Logging: root level, per-logger overrides ("routes.portfolio=DEBUG,pymongo=WARNING"),
+# and the fraction of DEBUG records kept from the high-volume request loggers
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.environ.get('LOG_LEVELS', 'pymongo=WARNING,urllib3=WARNING,yfinance=WARNING')
+LOG_DEBUG_SAMPLE_RATE = float(os.environ.get('LOG_DEBUG_SAMPLE_RATE', 0.01))
+LOG_SAMPLED_LOGGERS = ('routes.portfolio', 'routes.market_data', 'routes.news', 'models.')
+LOG_FILE = os.environ.get('LOG_FILE')
+
+# Password hashing: bcrypt cost is calibrated at startup to BCRYPT_TARGET_MS
+# unless BCRYPT_LOG_ROUNDS pins it; hashing runs on a bounded worker pool
+BCRYPT_LOG_ROUNDS = int(os.environ.get('BCRYPT_LOG_ROUNDS', 0))
+BCRYPT_TARGET_MS = int(os.environ.get('BCRYPT_TARGET_MS', 250))
+# Calibration never goes below the cost of hashes already stored
+BCRYPT_MIN_ROUNDS = 12
+BCRYPT_MAX_ROUNDS = 15
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', max(1, (os.cpu_count() or 2) // 2)))
+PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE', 2 * PASSWORD_HASH_WORKERS))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', 5))
+
+# Lazy handles kept for `from config import db, users_collection`; nothing
+# connects until the first query
+from database.connection import LazyCollection, LazyDatabase  # noqa: E402
+
+db = LazyDatabase()
+users_collection = LazyCollection('users')
+portfolios_collection = LazyCollection('portfolios')
+portfolio_history_collection = LazyCollection('portfolio_history')
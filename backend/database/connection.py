@@ -0,0 +1,133 @@
+# database/connection.py
+"""
+Single place that creates MongoDB clients.
+
+Clients are built on first use, one per process: a client created before a
+gunicorn fork is never reused by the workers, and importing config no longer
+opens sockets. `users_collection` and friends in config are lazy proxies over
+this module, so existing `from config import users_collection` imports keep
+working.
+"""
+import os
+import threading
+
+from pymongo import MongoClient
+
+from utils.metrics import MongoCommandMetrics
+
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:  # motor is optional; only async routes need it
+    AsyncIOMotorClient = None
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+_async_client = None
+_async_client_pid = None
+
+
+def _config():
+    # config imports this module for its lazy proxies, so settings are read at call time
+    import config
+    return config
+
+
+def _client_options():
+    config = _config()
+    return {
+        'maxPoolSize': config.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': config.MONGO_MIN_POOL_SIZE,
+        'maxIdleTimeMS': config.MONGO_MAX_IDLE_TIME_MS,
+        'waitQueueTimeoutMS': config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'serverSelectionTimeoutMS': config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        'connectTimeoutMS': config.MONGO_CONNECT_TIMEOUT_MS,
+        'socketTimeoutMS': config.MONGO_SOCKET_TIMEOUT_MS,
+        'readPreference': config.MONGO_READ_PREFERENCE,
+        'retryWrites': True,
+        'appname': 'financial_advisory',
+    }
+
+
+def get_client():
+    """Return this process's MongoClient, creating it on first use"""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is not None and _client_pid == pid:
+        return _client
+    with _lock:
+        if _client is None or _client_pid != pid:
+            # connect=False defers the first socket until an operation needs it
+            _client = MongoClient(
+                _config().MONGO_URI,
+                connect=False,
+                event_listeners=[MongoCommandMetrics()],
+                **_client_options()
+            )
+            _client_pid = pid
+    return _client
+
+
+def get_database(name=None):
+    return get_client()[name or _config().MONGO_DB_NAME]
+
+
+def get_collection(name):
+    return get_database()[name]
+
+
+def get_async_client():
+    """
+    Return this process's Motor client for async views.
+
+    Raises RuntimeError when motor is not installed.
+    """
+    global _async_client, _async_client_pid
+    if AsyncIOMotorClient is None:
+        raise RuntimeError("motor is not installed; install it to use the async Mongo client")
+    pid = os.getpid()
+    with _lock:
+        if _async_client is None or _async_client_pid != pid:
+            _async_client = AsyncIOMotorClient(
+                _config().MONGO_URI,
+                event_listeners=[MongoCommandMetrics()],
+                **_client_options()
+            )
+            _async_client_pid = pid
+    return _async_client
+
+
+def get_async_database(name=None):
+    return get_async_client()[name or _config().MONGO_DB_NAME]
+
+
+class LazyCollection:
+    """Stand-in for a Collection that resolves against the current process's client"""
+
+    def __init__(self, name):
+        self._name = name
+
+    def _collection(self):
+        return get_collection(self._name)
+
+    def __getattr__(self, attr):
+        return getattr(self._collection(), attr)
+
+    def __getitem__(self, key):
+        return self._collection()[key]
+
+    def __repr__(self):
+        return f"LazyCollection({self._name!r})"
+
+
+class LazyDatabase:
+    """Stand-in for the application Database, resolved on each access"""
+
+    def __getattr__(self, attr):
+        return getattr(get_database(), attr)
+
+    def __getitem__(self, key):
+        return get_database()[key]
+
+    def __repr__(self):
+        return "LazyDatabase()"
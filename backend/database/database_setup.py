@@ -1,13 +1,156 @@
 # database/database_setup.py
-from pymongo import MongoClient
+"""
+Versioned schema migrations for the financial_advisory database.
+
+Each migration is applied once, in order, and recorded in the
+`schema_migrations` collection. Every step is itself idempotent
+(create_index / collMod), so re-running after a partial failure is safe.
+
+    python -m database.database_setup            # apply pending migrations
+    python -m database.database_setup --status   # show applied versions
+"""
+import argparse
+import logging
+from datetime import datetime
+
+from pymongo import ASCENDING
 from pymongo.errors import CollectionInvalid
 
-def setup_database_schema():
-    # Connect to MongoDB
-    client = MongoClient('mongodb://localhost:27017/')
-    db = client['financial_advisory']  # Replace with your database name
-    
-    
+from database.connection import get_database
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_COLLECTION = 'schema_migrations'
+
+USERS_VALIDATOR = {
+    '$jsonSchema': {
+        'bsonType': 'object',
+        'required': ['username', 'password'],
+        'properties': {
+            'username': {'bsonType': 'string', 'minLength': 1},
+            'password': {'bsonType': 'string'},
+            'first_name': {'bsonType': 'string'},
+            'last_name': {'bsonType': 'string'},
+            'has_completed_questionnaire': {'bsonType': 'bool'},
+            'risk_score': {'bsonType': ['double', 'int', 'long', 'null']},
+            'risk_category': {'bsonType': ['string', 'null']},
+            'investment_amount': {'bsonType': ['double', 'int', 'long', 'null']},
+            'asset_allocation': {'bsonType': 'object'},
+        },
+    }
+}
+
+
+# Used for new and existing collections alike. "moderate" validates every
+# insert, and every update of a document that already passes, but leaves
+# documents that predate the schema alone until they are fixed
+VALIDATION_LEVEL = 'moderate'
+
+
+def ensure_collection(db, name, validator=None, **options):
+    """Create a collection, or update the validator of an existing one"""
+    if validator:
+        options['validator'] = validator
+        options['validationLevel'] = VALIDATION_LEVEL
+    try:
+        db.create_collection(name, **options)
+    except CollectionInvalid:
+        if validator:
+            db.command('collMod', name, validator=validator, validationLevel=VALIDATION_LEVEL)
+
+
+def _duplicate_usernames(db, limit=10):
+    pipeline = [
+        {'$group': {'_id': '$username', 'count': {'$sum': 1}}},
+        {'$match': {'count': {'$gt': 1}}},
+        {'$limit': limit},
+    ]
+    return [doc['_id'] for doc in db.users.aggregate(pipeline)]
+
+
+def migration_001_users(db):
+    duplicates = _duplicate_usernames(db)
+    if duplicates:
+        raise RuntimeError(f"Cannot add unique username index, duplicate usernames exist: {duplicates}")
+
+    ensure_collection(db, 'users', USERS_VALIDATOR)
+    db.users.create_index([('username', ASCENDING)], unique=True, name='username_unique')
+    # Only users who finished the questionnaire have a risk profile to work with
+    db.users.create_index(
+        [('risk_category', ASCENDING), ('risk_score', ASCENDING)],
+        name='questionnaire_completed_risk',
+        partialFilterExpression={'has_completed_questionnaire': True},
+    )
+
+
+def migration_002_portfolios(db):
+    ensure_collection(db, 'portfolios')
+    # Bulk refreshes look for documents built from older market data
+    db.portfolios.create_index([('market_version', ASCENDING)], name='market_version')
+
+
+def migration_003_portfolio_history(db):
+    # Time-series collections need MongoDB 5.0+
+    ensure_collection(db, 'portfolio_history', timeseries={
+        'timeField': 'ts',
+        'metaField': 'user_id',
+        'granularity': 'hours',
+    })
+    db.portfolio_history.create_index([('user_id', ASCENDING), ('ts', ASCENDING)], name='user_ts')
+
+
+# (version, description, function); append new migrations, never reorder
+MIGRATIONS = [
+    (1, 'users: unique username, completed-questionnaire index, schema validator', migration_001_users),
+    (2, 'portfolios: materialized per-user portfolios indexed by market version', migration_002_portfolios),
+    (3, 'portfolio_history: time-series of daily portfolio valuations', migration_003_portfolio_history),
+]
+
+
+def applied_versions(db):
+    return {doc['_id'] for doc in db[MIGRATIONS_COLLECTION].find({}, {'_id': 1})}
+
+
+def setup_database_schema(db=None):
+    """Apply all pending migrations and return the versions that were run"""
+    if db is None:
+        db = get_database()
+
+    done = applied_versions(db)
+    ran = []
+    for version, description, migrate in MIGRATIONS:
+        if version in done:
+            continue
+        logger.info("Applying migration %03d: %s", version, description)
+        migrate(db)
+        db[MIGRATIONS_COLLECTION].update_one(
+            {'_id': version},
+            {'$set': {'description': description, 'applied_at': datetime.utcnow()}},
+            upsert=True,
+        )
+        ran.append(version)
+
+    if not ran:
+        logger.info("Database schema is up to date (version %d)", max(done, default=0))
+    return ran
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Apply database schema migrations')
+    parser.add_argument('--status', action='store_true', help='list applied migrations and exit')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    if args.status:
+        done = applied_versions(get_database())
+        for version, description, _ in MIGRATIONS:
+            print(f"{'x' if version in done else ' '} {version:03d} {description}")
+        return
+
+    ran = setup_database_schema()
+    if ran:
+        print(f"Applied migrations: {', '.join(f'{v:03d}' for v in ran)}")
+
 
 if __name__ == "__main__":
-    setup_database_schema()
+    main()
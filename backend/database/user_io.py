@@ -0,0 +1,212 @@
+# database/user_io.py
+"""
+Bulk import and export of users.
+
+Input and output are JSON Lines or CSV (picked from the file extension or
+--format). Import rows need username, first_name, last_name and either a
+plaintext `password` (hashed here, in parallel) or an existing bcrypt
+`password_hash`. Risk-profile columns are optional.
+
+    python -m database.user_io import clients.csv --batch-size 1000 --unordered
+    python -m database.user_io import fixtures.jsonl --rounds 4      # cheap hashes for load tests
+    python -m database.user_io export users.jsonl
+    python -m database.user_io export users.csv --fields username risk_category investment_amount
+"""
+import argparse
+import csv
+import json
+import logging
+import sys
+import time
+from itertools import islice
+
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from models.user_repository import users
+from utils.hash_password import calibrate_rounds, hash_passwords
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
+OPTIONAL_FIELDS = {
+    'risk_score': float,
+    'risk_category': str,
+    'risk_description': str,
+    'investment_amount': float,
+    'has_completed_questionnaire': lambda value: str(value).strip().lower() in ('1', 'true', 'yes'),
+}
+EXPORT_FIELDS = (
+    'username', 'first_name', 'last_name', 'has_completed_questionnaire',
+    'risk_score', 'risk_category', 'risk_description', 'investment_amount',
+    'asset_allocation', 'questionnaire_completed_at'
+)
+
+
+def _format_for(path, explicit):
+    if explicit:
+        return explicit
+    return 'csv' if path.lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(path, fmt):
+    """Yield one dict per input row"""
+    with open(path, newline='', encoding='utf-8') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def to_user_document(record):
+    """Build a user document shaped like the ones signup creates"""
+    missing = [field for field in REQUIRED_FIELDS if not record.get(field)]
+    if missing:
+        raise ValueError(f"missing {', '.join(missing)}")
+    if not record.get('password') and not record.get('password_hash'):
+        raise ValueError("missing password or password_hash")
+
+    user = {
+        "first_name": record["first_name"],
+        "last_name": record["last_name"],
+        "username": record["username"],
+        "password": record.get("password_hash"),
+        "risk_score": None,
+        "has_completed_questionnaire": False,
+        "risk_category": None
+    }
+    for field, convert in OPTIONAL_FIELDS.items():
+        value = record.get(field)
+        if value not in (None, ''):
+            user[field] = convert(value)
+    return user
+
+
+def import_users(path, fmt, batch_size=1000, ordered=True, workers=None, rounds=None):
+    """Import users in insert_many batches; returns (inserted, skipped, failed)"""
+    inserted = skipped = failed = 0
+    records = iter(enumerate(read_records(path, fmt), start=1))
+
+    while True:
+        batch = list(islice(records, batch_size))
+        if not batch:
+            break
+
+        docs, plaintext = [], []
+        for line_no, record in batch:
+            try:
+                user = to_user_document(record)
+            except ValueError as e:
+                logger.warning("Row %d skipped: %s", line_no, e)
+                failed += 1
+                continue
+            docs.append(user)
+            plaintext.append(None if user["password"] else record["password"])
+
+        # Hash only the rows that came with a plaintext password
+        pending = [i for i, password in enumerate(plaintext) if password is not None]
+        for i, hashed in zip(pending, hash_passwords([plaintext[i] for i in pending], workers, rounds)):
+            docs[i]["password"] = hashed
+
+        if not docs:
+            continue
+        try:
+            inserted += len(users.insert_many(docs, ordered=ordered))
+        except BulkWriteError as e:
+            details = e.details
+            inserted += details.get('nInserted', 0)
+            errors = details.get('writeErrors', [])
+            duplicates = sum(1 for error in errors if error.get('code') == DUPLICATE_KEY)
+            skipped += duplicates
+            failed += len(errors) - duplicates
+            if ordered:
+                # An ordered batch stops at the first error; nothing after it was attempted
+                not_attempted = len(docs) - details.get('nInserted', 0) - len(errors)
+                logger.error("Ordered import stopped: %s (%d rows not attempted)",
+                             errors[0].get('errmsg') if errors else e, not_attempted)
+                failed += not_attempted
+                break
+        logger.info("Imported %d users so far (%d duplicates skipped, %d failed)", inserted, skipped, failed)
+
+    return inserted, skipped, failed
+
+
+def _export_value(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def export_users(path, fmt, fields=EXPORT_FIELDS, include_password_hash=False, batch_size=1000):
+    """Stream users to a file from a batched cursor; returns the number written"""
+    fields = ['_id'] + list(fields) + (['password'] if include_password_hash else [])
+    # Exported hashes use the same column name the importer reads them from
+    columns = ['password_hash' if field == 'password' else field for field in fields]
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = None
+        if fmt == 'csv':
+            writer = csv.DictWriter(f, fieldnames=columns)
+            writer.writeheader()
+
+        for user in users.iter_all(fields, batch_size=batch_size):
+            row = {column: _export_value(user.get(field)) for column, field in zip(columns, fields)}
+            if writer is not None:
+                if isinstance(row.get('asset_allocation'), dict):
+                    row['asset_allocation'] = json.dumps(row['asset_allocation'])
+                writer.writerow(row)
+            else:
+                f.write(json.dumps(row, default=str))
+                f.write('\n')
+            written += 1
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    imp = sub.add_parser('import', help='import users from a JSONL or CSV file')
+    imp.add_argument('path')
+    imp.add_argument('--format', choices=('jsonl', 'csv'))
+    imp.add_argument('--batch-size', type=int, default=1000)
+    imp.add_argument('--unordered', action='store_true',
+                     help='keep inserting past duplicate or invalid rows instead of stopping')
+    imp.add_argument('--workers', type=int, help='password hashing threads (default: all cores)')
+    imp.add_argument('--rounds', type=int, help='bcrypt cost; defaults to the calibrated server cost')
+
+    exp = sub.add_parser('export', help='export users to a JSONL or CSV file')
+    exp.add_argument('path')
+    exp.add_argument('--format', choices=('jsonl', 'csv'))
+    exp.add_argument('--fields', nargs='+', default=list(EXPORT_FIELDS))
+    exp.add_argument('--include-password-hash', action='store_true')
+    exp.add_argument('--batch-size', type=int, default=1000)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    fmt = _format_for(args.path, args.format)
+    start = time.perf_counter()
+
+    if args.command == 'import':
+        if not args.rounds:
+            calibrate_rounds()
+        inserted, skipped, failed = import_users(
+            args.path, fmt, args.batch_size, ordered=not args.unordered,
+            workers=args.workers, rounds=args.rounds
+        )
+        print(f"Imported {inserted} users, skipped {skipped} duplicates, {failed} failed "
+              f"in {time.perf_counter() - start:.1f}s")
+        if failed:
+            sys.exit(1)
+    else:
+        written = export_users(args.path, fmt, args.fields, args.include_password_hash, args.batch_size)
+        print(f"Exported {written} users to {args.path} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
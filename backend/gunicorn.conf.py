@@ -0,0 +1,57 @@
+"""
+Production server settings, read by gunicorn from the backend directory:
+
+    gunicorn -c gunicorn.conf.py
+
+Every setting can be overridden with the GUNICORN_* variables below or on
+the command line.
+
+The app is preloaded in the master (wsgi.py), which also warms the caches.
+Workers are forked from the warm master and accept traffic already warm.
+Restarted workers (max_requests) are forked from the same master, so they
+skip the cold start too.
+
+Workers are threaded (gthread). Portfolio maths is NumPy/SciPy and releases
+the GIL for the heavy parts; most other request time is spent waiting on
+MongoDB and NewsAPI. So the default is one worker per core with a few
+threads each. Keep MONGO_MAX_POOL_SIZE at or above GUNICORN_THREADS.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+wsgi_app = 'wsgi:app'
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+preload_app = True
+worker_class = 'gthread'
+workers = int(os.environ.get('GUNICORN_WORKERS', max(2, multiprocessing.cpu_count())))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+# Optimizer and screening requests can run for a while on a cold snapshot
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+# prometheus_client keeps per-process values in files under this directory
+# and /metrics sums them across workers. It must be set before the app
+# (and so prometheus_client) is imported, which is why it lives here. A
+# directory passed in PROMETHEUS_MULTIPROC_DIR must be emptied between runs.
+if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+    # Only on first load; a config reload must not wipe the live workers' files
+    _metrics_dir = os.path.join(tempfile.gettempdir(), 'financial_advisory_metrics')
+    shutil.rmtree(_metrics_dir, ignore_errors=True)
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = _metrics_dir
+os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'], exist_ok=True)
+
+
+def post_fork(server, worker):
+    # The master's log listener thread does not survive the fork
+    from utils.logging_setup import configure_logging
+    configure_logging()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1 @@
+# Batch jobs run from cron or by hand: python -m jobs.<name>
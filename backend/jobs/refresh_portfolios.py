@@ -0,0 +1,31 @@
+"""
+Revalue stored portfolios against the latest market data. Only portfolios
+valued at an older market version are read (market_version index).
+Positions are never re-bought on a market refresh, only marked to the new
+prices; portfolios bought at fallback prices are rebuilt once live prices
+are available.
+
+Schedule it just after each market data refresh window
+(MARKET_DATA_REFRESH_SECONDS) so users read up-to-date portfolios:
+    python -m jobs.refresh_portfolios
+"""
+import argparse
+import logging
+import time
+
+from models.user_portfolio import refresh_stale_portfolios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    start = time.perf_counter()
+    checked, refreshed = refresh_stale_portfolios(args.batch_size)
+    print(f"Refreshed {refreshed} of {checked} portfolios in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Re-score every user's stored questionnaire answers with the current scoring
+tables (models/risk_scoring.py) after weights, thresholds or allocation
+limits change.
+
+Users are read in batches; each batch is scored as one answers matrix and
+written back with a single bulk_write. Only users whose score, category or
+allocation actually changed are updated. Their stored portfolios no longer
+match their profile, so get-portfolio rebuilds them on the next read, or
+pass --refresh-portfolios to rebuild each batch's changed users right away.
+
+    python -m jobs.rescore_users [--all] [--dry-run] [--refresh-portfolios]
+"""
+import argparse
+import logging
+import time
+
+import numpy as np
+
+from models.risk_scoring import (
+    RISK_BANDS, SCORING_VERSION, allocation_percentages, answers_matrix, band_index, score_matrix
+)
+from models.user_repository import users
+
+logger = logging.getLogger(__name__)
+
+RESCORE_FIELDS = (
+    'questionnaire_answers', 'investment_amount', 'risk_score', 'risk_category',
+    'risk_description', 'asset_allocation', 'risk_scoring_version'
+)
+
+
+def rescore_batch(batch):
+    """Return {user_id: changed fields} for a batch of user documents"""
+    scored = [user for user in batch if user.get('questionnaire_answers') and user.get('investment_amount')]
+    if not scored:
+        return {}
+
+    scores = score_matrix(answers_matrix([user['questionnaire_answers'] for user in scored]))
+    valid = ~np.isnan(scores)
+    scored = [user for user, ok in zip(scored, valid) if ok]
+    scores = scores[valid]
+    # Category comes from the unrounded score, as at submission time
+    bands = band_index(scores)
+    allocations = allocation_percentages(bands, [user['investment_amount'] for user in scored])
+
+    updates = {}
+    for user, score, band, allocation in zip(scored, np.round(scores, 2).tolist(), bands.tolist(), allocations):
+        fields = {
+            'risk_score': score,
+            'risk_category': RISK_BANDS[band]['category'],
+            'risk_description': RISK_BANDS[band]['description'],
+            'asset_allocation': allocation,
+            'risk_scoring_version': SCORING_VERSION,
+        }
+        if any(user.get(key) != value for key, value in fields.items()):
+            updates[user['_id']] = fields
+    return updates
+
+
+def rescore_users(batch_size=5000, only_outdated=True, dry_run=False, refresh_portfolios=False):
+    """
+    Re-score users in batches, rebuilding the changed users' portfolios with
+    refresh_portfolios. Returns (checked, changed, rebuilt).
+    """
+    checked = changed = rebuilt = 0
+    cursor = users.iter_completed(RESCORE_FIELDS, batch_size)
+    batch = []
+
+    def flush():
+        nonlocal changed, rebuilt
+        if only_outdated:
+            pending = [user for user in batch if user.get('risk_scoring_version') != SCORING_VERSION]
+        else:
+            pending = batch
+        updates = rescore_batch(pending)
+        if updates and not dry_run:
+            users.bulk_update(updates)
+            if refresh_portfolios:
+                from models.user_portfolio import rebuild_portfolios
+                profiles = {user['_id']: user for user in pending}
+                rebuilt += rebuild_portfolios({**profiles[user_id], **fields} for user_id, fields in updates.items())
+        changed += len(updates)
+        batch.clear()
+
+    for user in cursor:
+        batch.append(user)
+        checked += 1
+        if len(batch) >= batch_size:
+            flush()
+            logger.info("Re-scored %d users, %d changed", checked, changed)
+    if batch:
+        flush()
+    return checked, changed, rebuilt
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--all', action='store_true',
+                        help='re-score users already scored with the current tables too')
+    parser.add_argument('--dry-run', action='store_true', help='report changes without writing them')
+    parser.add_argument('--refresh-portfolios', action='store_true',
+                        help='rebuild stored portfolios of changed users afterwards')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    start = time.perf_counter()
+    checked, changed, rebuilt = rescore_users(
+        args.batch_size, only_outdated=not args.all, dry_run=args.dry_run,
+        refresh_portfolios=args.refresh_portfolios
+    )
+    print(f"Scoring version {SCORING_VERSION}: {changed} of {checked} users changed"
+          f"{' (dry run)' if args.dry_run else ''} in {time.perf_counter() - start:.1f}s")
+    if args.refresh_portfolios and not args.dry_run:
+        print(f"Rebuilt {rebuilt} portfolios")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+"""
+Score every indexed news article that has no sentiment yet.
+
+Web workers score new articles in the background as they are indexed; run
+this to backfill an existing index or after changing the lexicon:
+    python -m jobs.score_news
+    python -m jobs.score_news --rescore
+"""
+import argparse
+import logging
+import time
+
+from models.news_sentiment import score_pending
+from utils.news_index import news_index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rescore', action='store_true', help='clear existing scores and score everything again')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    start = time.perf_counter()
+    if args.rescore:
+        news_index.clear_sentiment()
+    scored = score_pending(batch_size=args.batch_size)
+    print(f"Scored {scored} articles in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
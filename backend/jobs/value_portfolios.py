@@ -0,0 +1,32 @@
+"""
+Nightly mark-to-market of every stored portfolio into portfolio_history.
+
+Run once a day after the market close, e.g. from cron:
+    python -m jobs.value_portfolios
+Re-running on the same day is a no-op unless --replace is given.
+"""
+import argparse
+import logging
+import time
+from datetime import datetime
+
+from models.portfolio_valuation import valuation_date, value_portfolios
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--date', type=lambda value: datetime.strptime(value, '%Y-%m-%d'),
+                        help='valuation date (YYYY-MM-DD), default today (UTC)')
+    parser.add_argument('--replace', action='store_true', help='overwrite valuations already recorded for the date')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+
+    start = time.perf_counter()
+    ts = valuation_date(args.date) if args.date else valuation_date()
+    written = value_portfolios(ts, args.batch_size, args.replace)
+    print(f"Recorded {written} valuations for {ts.date()} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
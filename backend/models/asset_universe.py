@@ -0,0 +1,131 @@
+# Assets held in every risk-based portfolio, grouped by category.
+# Weights are filled in per user by get_risk_based_allocation.
+ASSET_UNIVERSE = {
+    'Stocks': [
+        {
+            'name': 'Reliance Industries',
+            'ticker': 'RELIANCE.NS',
+            'expected_return': 15,
+            'weight': 0.0,  # Will be filled in
+        },
+        {
+            'name': 'TCS',
+            'ticker': 'TCS.NS',
+            'expected_return': 12,
+            'weight': 0.0,
+        },
+        {
+            'name': 'HDFC Bank',
+            'ticker': 'HDFCBANK.NS',
+            'expected_return': 14,
+            'weight': 0.0,
+        },
+        {
+            'name': 'Infosys',
+            'ticker': 'INFY.NS',
+            'expected_return': 13,
+            'weight': 0.0,
+        },
+        {
+            'name': 'ICICI Bank',
+            'ticker': 'ICICIBANK.NS',
+            'expected_return': 16,
+            'weight': 0.0,
+        },
+        {
+            'name': 'Hindustan Unilever',
+            'ticker': 'HINDUNILVR.NS',
+            'expected_return': 10,
+            'weight': 0.0,
+        }
+    ],
+    'Cryptocurrency': [
+        {
+            'name': 'Bitcoin',
+            'ticker': 'BTC-INR',
+            'expected_return': 25,
+            'weight': 0.0,
+        },
+        {
+            'name': 'Ethereum',
+            'ticker': 'ETH-INR',
+            'expected_return': 20,
+            'weight': 0.0,
+        },
+        {
+            'name': 'Solana',
+            'ticker': 'SOL-INR',
+            'expected_return': 30,
+            'weight': 0.0,
+        }
+    ],
+    'Mutual Funds': [
+        {
+            'name': 'HDFC Flexi Cap Fund',
+            'ticker': 'HDFC_FLEXI_CAP',
+            'expected_return': 12,
+            'weight': 0.0,
+            'nav': 50.27  # NAV for mutual fund
+        }
+    ],
+    'Commodities': [
+        {
+            'name': 'Gold',
+            'ticker': 'GC=F',
+            'expected_return': 8,
+            'weight': 0.0,
+        }
+    ]
+}
+
+# Held tickers in allocation order; market snapshot arrays are aligned to this
+HELD_TICKERS = [asset['ticker'] for assets in ASSET_UNIVERSE.values() for asset in assets]
+
+# Other names news articles use for assets, beyond their universe name and
+# display name; used to tag articles with the tickers they mention. These
+# match in any case, so each must be unambiguous as a phrase: "Reliance" or
+# "Power Grid" alone also appear as ordinary words and need a suffix.
+TICKER_ALIASES = {
+    'RELIANCE.NS': ['Reliance Industries', 'Mukesh Ambani'],
+    'TCS.NS': ['Tata Consultancy Services', 'Tata Consultancy'],
+    'HDFCBANK.NS': ['HDFC Bank'],
+    'INFY.NS': ['Infosys'],
+    'ICICIBANK.NS': ['ICICI Bank'],
+    'HINDUNILVR.NS': ['Hindustan Unilever'],
+    'SBIN.NS': ['State Bank of India'],
+    'ITC.NS': ['ITC Ltd', 'ITC Limited'],
+    'BHARTIARTL.NS': ['Bharti Airtel', 'Airtel'],
+    'KOTAKBANK.NS': ['Kotak Mahindra Bank', 'Kotak Bank'],
+    'AXISBANK.NS': ['Axis Bank'],
+    'BAJFINANCE.NS': ['Bajaj Finance'],
+    'BAJAJFINSV.NS': ['Bajaj Finserv'],
+    'SUNPHARMA.NS': ['Sun Pharma', 'Sun Pharmaceutical'],
+    'ADANIPORTS.NS': ['Adani Ports'],
+    'MARUTI.NS': ['Maruti Suzuki', 'Maruti'],
+    'M&M.NS': ['Mahindra & Mahindra', 'Mahindra and Mahindra'],
+    'POWERGRID.NS': ['Power Grid Corporation', 'Power Grid Corp'],
+    'NTPC.NS': ['NTPC'],
+    'DRREDDY.NS': ["Dr Reddy's", "Dr. Reddy's", 'Dr Reddys'],
+    'BTC-INR': ['Bitcoin'],
+    'ETH-INR': ['Ethereum'],
+    'SOL-INR': ['Solana'],
+    'GC=F': ['gold price', 'gold prices', 'gold futures', 'bullion'],
+    'HDFC_FLEXI_CAP': ['HDFC Flexi Cap Fund', 'HDFC Flexi Cap'],
+    'PPFAS_FLEXI_CAP': ['Parag Parikh Flexi Cap'],
+}
+
+# Names that are only unambiguous in this exact case: "Ether" the currency
+# but not "ether" the solvent, acronyms but not the same letters in a word
+EXACT_CASE_ALIASES = {
+    'RELIANCE.NS': ['RIL'],
+    'HINDUNILVR.NS': ['HUL'],
+    'SBIN.NS': ['SBI'],
+    'ETH-INR': ['Ether'],
+    'PPFAS_FLEXI_CAP': ['PPFAS'],
+}
+
+# Universe or display names that are ordinary words ("gold loan", "Gold
+# Coast"); articles are tagged on the ticker's aliases instead
+UNTAGGED_NAMES = {
+    'GC=F': ['Gold'],
+}
@@ -0,0 +1,127 @@
+import logging
+
+import numpy as np
+
+try:
+    from scipy.optimize import Bounds, LinearConstraint, milp
+except ImportError:  # scipy < 1.9
+    milp = None
+
+logger = logging.getLogger(__name__)
+
+# Problems larger than this are always solved with the greedy heuristic
+MAX_EXACT_ASSETS = 30
+
+
+def _lot_costs(prices, lot_sizes):
+    prices = np.asarray(prices, dtype=float)
+    lot_sizes = np.ones_like(prices) if lot_sizes is None else np.asarray(lot_sizes, dtype=float)
+    return prices * lot_sizes, lot_sizes
+
+
+def allocate_lots_batch(target_amounts, prices, budgets, lot_sizes=None):
+    """
+    Largest-remainder allocation of whole lots for many portfolios at once.
+
+    Every portfolio starts from the floor of its target lots and then buys one
+    extra lot per asset, in order of how much the extra lot reduces the
+    absolute deviation from the target amount, while cash remains. Work is
+    vectorized across portfolios, so the loop runs once per asset.
+
+    Parameters:
+    target_amounts (array): Target amount per asset, shape (users, assets)
+    prices (array): Price per share, shape (assets,)
+    budgets (array): Cash available per portfolio, shape (users,)
+    lot_sizes (array): Shares per tradable lot, shape (assets,); defaults to 1
+
+    Returns:
+    tuple: (share quantities of shape (users, assets), unspent cash per portfolio)
+    """
+    targets = np.atleast_2d(np.asarray(target_amounts, dtype=float))
+    budgets = np.broadcast_to(np.asarray(budgets, dtype=float), targets.shape[:1]).copy()
+    lot_cost, lot_sizes = _lot_costs(prices, lot_sizes)
+
+    lots = np.floor(targets / lot_cost).astype(np.int64)
+    cash = budgets - lots @ lot_cost
+
+    # If the floor already overspends (budget below the targets), sell lots
+    # from the most over-weight assets until it fits
+    for row in np.flatnonzero(cash < 0):
+        while cash[row] < 0 and lots[row].any():
+            overshoot = np.where(lots[row] > 0, lots[row] * lot_cost - targets[row], -np.inf)
+            i = int(np.argmax(overshoot))
+            lots[row, i] -= 1
+            cash[row] += lot_cost[i]
+
+    # Buying one more lot of asset i changes its deviation from r to (cost - r)
+    remainder = targets - lots * lot_cost
+    gain = 2 * remainder - lot_cost
+    order = np.argsort(-gain, axis=1, kind='stable')
+    rows = np.arange(len(targets))
+
+    for k in range(targets.shape[1]):
+        i = order[:, k]
+        cost = lot_cost[i]
+        buy = (gain[rows, i] > 0) & (cost <= cash + 1e-9)
+        lots[rows[buy], i[buy]] += 1
+        cash[buy] -= cost[buy]
+
+    return lots * lot_sizes.astype(np.int64), cash
+
+
+def _allocate_exact(targets, lot_cost, budget):
+    """Minimize total absolute deviation with an integer program"""
+    n = len(targets)
+    # Variables: [lots_0..lots_n-1, dev_0..dev_n-1]
+    c = np.concatenate([np.zeros(n), np.ones(n)])
+    eye = np.eye(n)
+    cost_diag = np.diag(lot_cost)
+    constraints = [
+        # dev_i >= target_i - lots_i * cost_i  and  dev_i >= lots_i * cost_i - target_i
+        LinearConstraint(np.hstack([cost_diag, eye]), lb=targets, ub=np.inf),
+        LinearConstraint(np.hstack([cost_diag, -eye]), lb=-np.inf, ub=targets),
+        LinearConstraint(np.concatenate([lot_cost, np.zeros(n)])[None, :], lb=-np.inf, ub=budget),
+    ]
+    upper = np.concatenate([np.floor(budget / lot_cost), np.full(n, np.inf)])
+    result = milp(
+        c,
+        constraints=constraints,
+        integrality=np.concatenate([np.ones(n), np.zeros(n)]),
+        bounds=Bounds(np.zeros(2 * n), upper),
+        options={'time_limit': 1.0}
+    )
+    if result.x is None:
+        return None
+    return np.round(result.x[:n]).astype(np.int64)
+
+
+def allocate_lots(target_amounts, prices, budget, lot_sizes=None, method='greedy'):
+    """
+    Pick whole-lot share counts whose value tracks the target amounts.
+
+    Parameters:
+    target_amounts (array): Target amount per asset
+    prices (array): Price per share
+    budget (float): Cash available for these assets
+    lot_sizes (array): Shares per tradable lot; defaults to 1
+    method (str): 'greedy' for largest remainder, 'exact' for a small integer
+                  program (falls back to greedy when unavailable or too large)
+
+    Returns:
+    tuple: (share quantities, unspent cash)
+    """
+    targets = np.asarray(target_amounts, dtype=float)
+    if method == 'exact':
+        lot_cost, sizes = _lot_costs(prices, lot_sizes)
+        if milp is None:
+            logger.warning("scipy.optimize.milp is unavailable, using greedy allocation")
+        elif len(targets) > MAX_EXACT_ASSETS:
+            logger.warning("%d assets is too many for exact allocation, using greedy", len(targets))
+        else:
+            lots = _allocate_exact(targets, lot_cost, budget)
+            if lots is not None:
+                return lots * sizes.astype(np.int64), budget - lots @ lot_cost
+            logger.warning("Exact allocation found no solution, using greedy")
+
+    quantities, cash = allocate_lots_batch(targets[None, :], prices, [budget], lot_sizes)
+    return quantities[0], cash[0]
@@ -0,0 +1,143 @@
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import yfinance as yf
+
+from models.asset_universe import HELD_TICKERS
+from utils.metrics import track_upstream
+from utils.snapshot import SnapshotCache
+
+logger = logging.getLogger(__name__)
+
+# Last known prices, used for any ticker the live download does not cover
+FALLBACK_PRICES = {
+    'RELIANCE.NS': 2500,
+    'TCS.NS': 3500,
+    'HDFCBANK.NS': 1600,
+    'INFY.NS': 1400,
+    'ICICIBANK.NS': 900,
+    'HINDUNILVR.NS': 2600,
+    'BTC-INR': 4500000,
+    'ETH-INR': 250000,
+    'SOL-INR': 8000,
+    'HDFC_FLEXI_CAP': 1961,  # Updated to current market price, not NAV
+    'GC=F': 276473  # Updated to match the screenshot value for gold price
+}
+
+# Mutual funds have no daily quotes on Yahoo; their risk is proxied by an index
+RETURN_PROXIES = {
+    'HDFC_FLEXI_CAP': '^NSEI',
+}
+
+USD_INR_TICKER = 'USDINR=X'
+USD_INR_FALLBACK = 83  # Approximate USD-INR rate
+USD_QUOTED = {'GC=F'}
+
+# Used for tickers without enough history: 20% volatility, 0.5 correlation
+FALLBACK_VARIANCE = 0.04
+FALLBACK_COVARIANCE = 0.02
+
+
+class MarketSnapshot:
+    """Prices and annualized covariance for the held tickers, as aligned arrays"""
+
+    def __init__(self, tickers, prices, covariance, source):
+        self.tickers = list(tickers)
+        self.prices = np.asarray(prices, dtype=float)
+        self.covariance = np.asarray(covariance, dtype=float)
+        self.source = source
+        self.index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.price_map = dict(zip(self.tickers, self.prices.tolist()))
+
+    def positions(self, tickers):
+        if list(tickers) == self.tickers:
+            return slice(None)
+        return np.fromiter((self.index[t] for t in tickers), dtype=np.intp, count=len(tickers))
+
+    def covariance_for(self, tickers):
+        """Covariance sub-matrix for `tickers`, in the order given"""
+        idx = self.positions(tickers)
+        if isinstance(idx, slice):
+            return self.covariance
+        return self.covariance[np.ix_(idx, idx)]
+
+    def prices_for(self, tickers):
+        return self.prices[self.positions(tickers)]
+
+
+def _fallback_covariance(n):
+    cov = np.full((n, n), FALLBACK_COVARIANCE)
+    np.fill_diagonal(cov, FALLBACK_VARIANCE)
+    return cov
+
+
+def build_market_snapshot(tickers=HELD_TICKERS):
+    """Download a year of closes for the held tickers and derive prices and covariance"""
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=365)
+    source_tickers = [RETURN_PROXIES.get(t, t) for t in tickers]
+    download = sorted(set(source_tickers) | {USD_INR_TICKER})
+
+    try:
+        with track_upstream('yfinance', 'download'):
+            data = yf.download(download, start=start_date, end=end_date,
+                               group_by='column', progress=False, threads=True)
+        close = data['Close'] if data is not None and not data.empty else pd.DataFrame()
+    except Exception as e:
+        logger.error("Market snapshot download failed: %s", e)
+        close = pd.DataFrame()
+
+    if close.empty:
+        logger.warning("No market data available, using fallback prices and covariance")
+        return MarketSnapshot(tickers, [FALLBACK_PRICES[t] for t in tickers],
+                              _fallback_covariance(len(tickers)), source='fallback')
+
+    close = close.reindex(columns=download)
+    # Latest close of each series, whichever day it traded last
+    last = close.ffill().iloc[-1]
+    usd_inr = last.get(USD_INR_TICKER)
+    if usd_inr is None or not np.isfinite(usd_inr):
+        usd_inr = USD_INR_FALLBACK
+
+    prices = []
+    for ticker in tickers:
+        price = last.get(ticker) if ticker not in RETURN_PROXIES else None
+        if price is None or not np.isfinite(price):
+            price = FALLBACK_PRICES[ticker]
+        elif ticker in USD_QUOTED:
+            price *= usd_inr
+        prices.append(float(price))
+
+    # Crypto trades every day and NSE does not. Returns are taken between the
+    # dates on which every series with history has a close, so each return
+    # spans the same interval for all series and no filled price shows up as
+    # a zero return; they are annualized by how often those dates occur.
+    history = close[source_tickers].to_numpy()
+    available = ~np.isnan(history).all(axis=0)
+    covariance = _fallback_covariance(len(tickers))
+    common = history[:, available]
+    common_rows = ~np.isnan(common).any(axis=1)
+    common, dates = common[common_rows], close.index[common_rows]
+    if len(common) > 21:
+        returns = common[1:] / common[:-1] - 1
+        years = (dates[-1] - dates[0]).days / 365.25
+        idx = np.flatnonzero(available)
+        covariance[np.ix_(idx, idx)] = np.cov(returns, rowvar=False).reshape(len(idx), len(idx)) * len(returns) / years
+    missing = [t for t, ok in zip(tickers, available) if not ok]
+    if missing:
+        logger.warning("No return history for %s, using fallback covariance for them", missing)
+
+    return MarketSnapshot(tickers, prices, covariance, source='live')
+
+
+# Rebuilt once per market data refresh window and shared by all requests; a
+# fallback snapshot is retried on the snapshot backoff instead of being kept
+# for the whole window
+market_snapshot = SnapshotCache('market', build_market_snapshot,
+                                provisional=lambda snapshot: snapshot.source == 'fallback')
+
+
+def get_market_snapshot():
+    return market_snapshot.get().value
@@ -0,0 +1,212 @@
+"""
+Lexicon sentiment for news articles and per-ticker aggregates.
+
+Articles are scored in batches: each batch becomes a sparse
+(articles x lexicon terms) count matrix, so a whole batch is scored with
+two sparse products. Scoring runs on a background thread fed by the news
+index, never on a request. Per-ticker sentiment is a decay-weighted mean
+of the scores of recent articles tagged with the ticker, shrunk towards
+neutral when there are only a few articles.
+"""
+import logging
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from config import (
+    NEWS_SENTIMENT_BATCH_SIZE, NEWS_SENTIMENT_HALF_LIFE_HOURS,
+    NEWS_SENTIMENT_TILT, NEWS_SENTIMENT_WINDOW_DAYS
+)
+from utils.cache import TTLCache
+from utils.news_index import news_index
+
+logger = logging.getLogger(__name__)
+
+# Finance word polarities in the spirit of the Loughran-McDonald lists,
+# restricted to words that are unambiguous in market headlines
+POSITIVE = {
+    'beat': 1, 'beats': 1, 'gain': 1, 'gains': 1, 'gained': 1, 'rise': 1, 'rises': 1, 'rose': 1,
+    'climb': 1, 'climbs': 1, 'climbed': 1, 'jump': 1, 'jumps': 1, 'jumped': 1, 'rally': 1,
+    'rallies': 1, 'rallied': 1, 'rebound': 1, 'rebounds': 1, 'rebounded': 1, 'recovery': 1,
+    'higher': 1, 'strong': 1, 'stronger': 1, 'robust': 1, 'growth': 1, 'grows': 1, 'profit': 1,
+    'profits': 1, 'profitable': 1, 'boost': 1, 'boosts': 1, 'boosted': 1, 'upgrade': 1,
+    'upgrades': 1, 'upgraded': 1, 'outperform': 1, 'outperforms': 1, 'exceeds': 1, 'exceeded': 1,
+    'improve': 1, 'improves': 1, 'improved': 1, 'optimism': 1, 'optimistic': 1, 'upbeat': 1,
+    'bullish': 1, 'dividend': 1, 'buyback': 1, 'inflows': 1, 'approval': 1, 'approved': 1,
+    'wins': 1, 'expansion': 1, 'surge': 2, 'surges': 2, 'surged': 2, 'soar': 2, 'soars': 2,
+    'soared': 2, 'record': 1,
+}
+NEGATIVE = {
+    'miss': 1, 'misses': 1, 'missed': 1, 'fall': 1, 'falls': 1, 'fell': 1, 'drop': 1, 'drops': 1,
+    'dropped': 1, 'decline': 1, 'declines': 1, 'declined': 1, 'slide': 1, 'slides': 1, 'slid': 1,
+    'lower': 1, 'weak': 1, 'weaker': 1, 'weakness': 1, 'loss': 1, 'losses': 1, 'slowdown': 1,
+    'downgrade': 1, 'downgrades': 1, 'downgraded': 1, 'underperform': 1, 'cut': 1, 'cuts': 1,
+    'concern': 1, 'concerns': 1, 'worries': 1, 'fears': 1, 'pessimism': 1, 'bearish': 1,
+    'outflows': 1, 'selloff': 1, 'warning': 1, 'warns': 1, 'probe': 1, 'investigation': 1,
+    'lawsuit': 1, 'penalty': 1, 'fined': 1, 'ban': 1, 'banned': 1, 'halt': 1, 'halted': 1,
+    'layoffs': 1, 'recession': 1, 'default': 2, 'defaults': 2, 'plunge': 2, 'plunges': 2,
+    'plunged': 2, 'slump': 2, 'slumps': 2, 'slumped': 2, 'tumble': 2, 'tumbles': 2, 'tumbled': 2,
+    'crash': 2, 'crashes': 2, 'crashed': 2, 'fraud': 2, 'bankruptcy': 2,
+}
+NEGATORS = frozenset(('not', 'no', 'never', 'without', 'nor', 'neither', 'cannot', 'fails', 'failed'))
+# Words after a negator that still fall in its scope
+NEGATION_SCOPE = 3
+# Pseudo-count of lexicon hits added to each article's denominator, so one
+# stray word does not make an article fully positive or negative
+SCORE_SMOOTHING = 1.0
+# Decayed weight of neutral articles mixed into every ticker's average
+PRIOR_WEIGHT = 1.0
+
+# Words, and the punctuation that ends a negator's scope
+_TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?|[.,;:!?]")
+_SCOPE_BREAKS = frozenset('.,;:!?')
+
+
+def _build_lexicon():
+    terms, polarity = [], []
+    for word, weight in list(POSITIVE.items()) + [(word, -weight) for word, weight in NEGATIVE.items()]:
+        terms += [word, f'not_{word}']
+        polarity += [weight, -weight]
+    return {term: i for i, term in enumerate(terms)}, np.array(polarity, dtype=float)
+
+
+VOCABULARY, POLARITY = _build_lexicon()
+INTENSITY = np.abs(POLARITY)
+
+
+def tokenize(text):
+    """
+    Lower-case word tokens; words in a negator's scope get a not_ prefix. The
+    scope ends after NEGATION_SCOPE words or at punctuation, so a negated
+    title does not flip the description joined after it.
+    """
+    tokens = []
+    scope = 0
+    for token in _TOKEN.findall(text.lower()):
+        if token in _SCOPE_BREAKS:
+            scope = 0
+            continue
+        if token in NEGATORS or token.endswith("n't"):
+            scope = NEGATION_SCOPE
+            continue
+        tokens.append(f'not_{token}' if scope else token)
+        scope = max(scope - 1, 0)
+    return tokens
+
+
+def term_matrix(texts):
+    """Sparse (texts x VOCABULARY) matrix of lexicon term counts"""
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        for token in tokenize(text or ''):
+            col = VOCABULARY.get(token)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    data = np.ones(len(rows))
+    return sparse.csr_matrix((data, (rows, cols)), shape=(len(texts), len(VOCABULARY)))
+
+
+def score_texts(texts):
+    """Sentiment in (-1, 1) per text: net polarity over total polarity plus smoothing"""
+    counts = term_matrix(texts)
+    return (counts @ POLARITY) / (counts @ INTENSITY + SCORE_SMOOTHING)
+
+
+def score_articles(articles):
+    return score_texts([f"{article.get('title') or ''}. {article.get('description') or ''}" for article in articles])
+
+
+def score_pending(index=news_index, batch_size=NEWS_SENTIMENT_BATCH_SIZE):
+    """Score every indexed article that has no sentiment yet; returns how many were scored"""
+    scored = 0
+    while True:
+        rows = index.unscored(batch_size)
+        if not rows:
+            return scored
+        scores = score_texts([f"{row['title']}. {row['description'] or ''}" for row in rows])
+        index.set_sentiment(zip((row['id'] for row in rows), scores.tolist()))
+        scored += len(rows)
+
+
+def aggregate_sentiment(rows, now=None, half_life_hours=NEWS_SENTIMENT_HALF_LIFE_HOURS):
+    """
+    Per-ticker sentiment from (ticker, publishedAt, score) rows: a mean
+    weighted by 0.5 ** (age / half-life), with PRIOR_WEIGHT of neutral mixed
+    in. Returns {ticker: {'score', 'articles', 'weight'}}.
+    """
+    if not rows:
+        return {}
+    now = now or datetime.now(timezone.utc)
+    tickers, published, scores = zip(*rows)
+    published = pd.to_datetime(pd.Series(published), utc=True)
+    age_hours = ((pd.Timestamp(now) - published).dt.total_seconds() / 3600).to_numpy()
+    # Articles dated in the future count as new
+    weights = 0.5 ** (np.clip(age_hours, 0, None) / half_life_hours)
+
+    names, ticker_index = np.unique(np.array(tickers), return_inverse=True)
+    weighted = np.bincount(ticker_index, weights=weights * np.array(scores, dtype=float), minlength=len(names))
+    total = np.bincount(ticker_index, weights=weights, minlength=len(names))
+    counts = np.bincount(ticker_index, minlength=len(names))
+    sentiment = weighted / (total + PRIOR_WEIGHT)
+    return {
+        ticker: {'score': float(score), 'articles': int(count), 'weight': float(weight)}
+        for ticker, score, count, weight in zip(names.tolist(), sentiment, counts, total)
+    }
+
+
+# Aggregates are recomputed from the index at most once a minute per process
+_aggregate_cache = TTLCache('news_sentiment', 60, 600, 1)
+
+
+def ticker_sentiment():
+    """Current {ticker: {'score', 'articles', 'weight'}} over the sentiment window"""
+    def load():
+        since = datetime.now(timezone.utc) - timedelta(days=NEWS_SENTIMENT_WINDOW_DAYS)
+        return aggregate_sentiment(news_index.tagged_sentiment(since))
+    return _aggregate_cache.get_or_load('tickers', load)
+
+
+def sentiment_tilt(sentiment, max_tilt=NEWS_SENTIMENT_TILT):
+    """{ticker: expected-return adjustment}, each within +/- max_tilt"""
+    if max_tilt <= 0:
+        return {}
+    return {ticker: max_tilt * float(np.clip(values['score'], -1, 1)) for ticker, values in sentiment.items()}
+
+
+class SentimentScorer:
+    """Background thread that scores newly indexed articles; one per process"""
+
+    def __init__(self, batch_size=NEWS_SENTIMENT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self._pending = threading.Event()
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def notify(self):
+        """Ask for a scoring pass; returns immediately"""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pid = os.getpid()
+                    self._pending = threading.Event()
+                    threading.Thread(target=self._run, name='news-sentiment', daemon=True).start()
+        self._pending.set()
+
+    def _run(self):
+        while True:
+            self._pending.wait()
+            self._pending.clear()
+            try:
+                scored = score_pending(batch_size=self.batch_size)
+                logger.debug("Scored sentiment for %d articles", scored)
+            except Exception as e:
+                logger.warning("News sentiment scoring failed: %s", e)
+
+
+sentiment_scorer = SentimentScorer()
@@ -1,12 +1,20 @@
+import logging
 import numpy as np
 import pandas as pd
 import yfinance as yf
 from datetime import datetime, timedelta
 from scipy.optimize import minimize
+from config import NEWS_SENTIMENT_TILT
+from models.news_sentiment import sentiment_tilt, ticker_sentiment
+from utils.metrics import OPTIMIZER_STAGE_SECONDS, track_upstream
+
+logger = logging.getLogger(__name__)
 
 class EnhancedPortfolioOptimizer:
-    def __init__(self, risk_free_rate=0.07):
+    def __init__(self, risk_free_rate=0.07, sentiment_tilt=NEWS_SENTIMENT_TILT):
         self.risk_free_rate = risk_free_rate
+        # Largest news-sentiment adjustment to any asset's expected return; 0 disables it
+        self.sentiment_tilt = sentiment_tilt
         
         # Define all assets with their tickers and minimum allocations
         self.assets = {
@@ -43,26 +51,29 @@ class EnhancedPortfolioOptimizer:
 
     def get_optimized_portfolio(self, investment_amount, risk_score=None, risk_category=None):
         try:
-            print("Starting portfolio optimization...")
+            logger.info("Starting portfolio optimization...")
             end_date = datetime.now()
             start_date = end_date - timedelta(days=365)
             
             # Fetch data for all assets
-            self.fetch_all_asset_data(start_date, end_date)
+            with OPTIMIZER_STAGE_SECONDS.labels('fetch').time():
+                self.fetch_all_asset_data(start_date, end_date)
             
             # Calculate returns and volatility
-            self.calculate_metrics()
+            with OPTIMIZER_STAGE_SECONDS.labels('calculate_metrics').time():
+                self.calculate_metrics()
             
             # Calculate optimal allocation based on risk-return profile
-            allocation = self.optimize_portfolio(investment_amount, risk_score, risk_category)
+            with OPTIMIZER_STAGE_SECONDS.labels('optimize_portfolio').time():
+                allocation = self.optimize_portfolio(investment_amount, risk_score, risk_category)
             
             # Format the results with proper validation
             result = {
                 'portfolio_metrics': {
-                    'total_investment': float(investment_amount),
-                    'expected_return': float(self.portfolio_return * 100) if hasattr(self, 'portfolio_return') else 0,
-                    'volatility': float(self.portfolio_volatility * 100) if hasattr(self, 'portfolio_volatility') else 0,
-                    'sharpe_ratio': float(self.portfolio_sharpe) if hasattr(self, 'portfolio_sharpe') else 0
+                    'total_investment': investment_amount,
+                    'expected_return': self.portfolio_return * 100 if hasattr(self, 'portfolio_return') else 0,
+                    'volatility': self.portfolio_volatility * 100 if hasattr(self, 'portfolio_volatility') else 0,
+                    'sharpe_ratio': self.portfolio_sharpe if hasattr(self, 'portfolio_sharpe') else 0
                 },
                 'allocations': []
             }
@@ -75,10 +86,10 @@ class EnhancedPortfolioOptimizer:
                         'name': self.get_display_name(asset),
                         'category': category,
                         'ticker': asset,
-                        'weight': float(details['weight']) if details.get('weight') is not None else 0,
-                        'amount': float(details['amount']) if details.get('amount') is not None else 0,
-                        'expected_return': float(details.get('return', 0) * 100),
-                        'volatility': float(details.get('volatility', 0) * 100)
+                        'weight': details['weight'] if details.get('weight') is not None else 0,
+                        'amount': details['amount'] if details.get('amount') is not None else 0,
+                        'expected_return': details.get('return', 0) * 100,
+                        'volatility': details.get('volatility', 0) * 100
                     }
                     # Only add assets with valid weights
                     if asset_data['weight'] > 0:
@@ -87,19 +98,17 @@ class EnhancedPortfolioOptimizer:
             # Validate the total weight is approximately 100%
             total_weight = sum(asset['weight'] for asset in result['allocations'])
             if not (95 <= total_weight <= 105):  # Allow for small rounding errors
-                print(f"Warning: Total weight {total_weight}% is not 100%")
+                logger.warning("Total weight %s%% is not 100%%", total_weight)
                 # Normalize weights to 100%
                 for asset in result['allocations']:
                     asset['weight'] = (asset['weight'] / total_weight) * 100
                     asset['amount'] = (asset['weight'] / 100) * investment_amount
             
-            print("Portfolio optimization completed successfully")
-            print(f"Number of allocations: {len(result['allocations'])}")
-            print(f"Total weight: {sum(asset['weight'] for asset in result['allocations'])}%")
+            logger.info("Portfolio optimization completed with %d allocations", len(result['allocations']))
             return result
             
         except Exception as e:
-            print(f"Error in portfolio optimization: {e}")
+            logger.error("Error in portfolio optimization: %s", e, exc_info=True)
             return None
 
     def fetch_all_asset_data(self, start_date, end_date):
@@ -109,28 +118,31 @@ class EnhancedPortfolioOptimizer:
         # Fetch stock data
         for ticker in self.assets['STOCKS'].keys():
             try:
-                stock_data = yf.download(ticker, start=start_date, end=end_date, progress=False)
+                with track_upstream('yfinance', 'download'):
+                    stock_data = yf.download(ticker, start=start_date, end=end_date, progress=False)
                 if not stock_data.empty:
                     data[ticker] = stock_data['Close']
             except Exception as e:
-                print(f"Error fetching {ticker}: {e}")
+                logger.warning("Error fetching %s: %s", ticker, e)
 
         # Fetch crypto data
         for ticker in self.assets['CRYPTO'].keys():
             try:
-                crypto_data = yf.download(ticker, start=start_date, end=end_date, progress=False)
+                with track_upstream('yfinance', 'download'):
+                    crypto_data = yf.download(ticker, start=start_date, end=end_date, progress=False)
                 if not crypto_data.empty:
                     data[ticker] = crypto_data['Close']
             except Exception as e:
-                print(f"Error fetching {ticker}: {e}")
+                logger.warning("Error fetching %s: %s", ticker, e)
 
         # Fetch gold data
         try:
-            gold_data = yf.download('GC=F', start=start_date, end=end_date, progress=False)
+            with track_upstream('yfinance', 'download'):
+                gold_data = yf.download('GC=F', start=start_date, end=end_date, progress=False)
             if not gold_data.empty:
                 data['GC=F'] = gold_data['Close']
         except Exception as e:
-            print(f"Error fetching gold data: {e}")
+            logger.warning("Error fetching gold data: %s", e)
 
         # For mutual funds, use assumed returns based on historical performance
         data['PPFAS_FLEXI_CAP'] = 100 * (1 + 0.15)**(np.arange(len(data))/252)  # 15% annual return
@@ -154,6 +166,20 @@ class EnhancedPortfolioOptimizer:
         # Calculate correlation matrix
         self.correlation = returns.corr()
 
+        if self.sentiment_tilt > 0:
+            self.apply_sentiment_tilt()
+
+    def apply_sentiment_tilt(self):
+        """Nudge expected returns by recent news sentiment, at most sentiment_tilt per asset"""
+        try:
+            tilt = sentiment_tilt(ticker_sentiment(), self.sentiment_tilt)
+        except Exception as e:
+            logger.warning("News sentiment unavailable, using untilted returns: %s", e)
+            return
+        tilt = pd.Series(tilt).reindex(self.returns.index).fillna(0.0)
+        self.returns = self.returns + tilt
+        logger.debug("Applied news sentiment tilt: %s", tilt[tilt != 0].round(4).to_dict())
+
     def negative_sharpe_ratio(self, weights, returns, cov_matrix):
         """Calculate negative Sharpe ratio for optimization"""
         portfolio_return = np.sum(returns * weights)
@@ -167,7 +193,7 @@ class EnhancedPortfolioOptimizer:
         
         # Calculate risk factor (0-1) based on user risk profile
         risk_factor = self.calculate_risk_factor(risk_score, risk_category)
-        print(f"Using risk factor: {risk_factor} for portfolio optimization")
+        logger.debug("Using risk factor: %s for portfolio optimization", risk_factor)
         
         # Track total allocation to ensure we don't exceed investment amount
         total_allocated = 0
@@ -218,11 +244,11 @@ class EnhancedPortfolioOptimizer:
                     allocation[category][ticker] = {
                         'weight': weight,
                         'amount': amount,
-                        'return': float(self.returns[ticker]),
-                        'volatility': float(self.volatility[ticker])
+                        'return': self.returns[ticker],
+                        'volatility': self.volatility[ticker]
                     }
             else:
-                print(f"Optimization failed for category {category}")
+                logger.warning("Optimization failed for category %s", category)
                 # Fallback to minimum weights if optimization fails
                 category_amount = investment_amount * (self.get_category_weight(category, risk_factor) / 100)
                 total_min_weight = sum(assets[t]['min'] for t in category_tickers)
@@ -235,13 +261,13 @@ class EnhancedPortfolioOptimizer:
                     allocation[category][ticker] = {
                         'weight': weight,
                         'amount': amount,
-                        'return': float(self.returns.get(ticker, 0.10)),
-                        'volatility': float(self.volatility.get(ticker, 0.15))
+                        'return': self.returns.get(ticker, 0.10),
+                        'volatility': self.volatility.get(ticker, 0.15)
                     }
         
         # Check if total allocation exceeds investment amount
         if total_allocated > investment_amount * 1.001:  # Allow 0.1% margin for rounding errors
-            print(f"Warning: Total allocation ({total_allocated}) exceeds investment amount ({investment_amount})")
+            logger.warning("Total allocation (%s) exceeds investment amount (%s)", total_allocated, investment_amount)
             # Scale down all allocations proportionally
             scale_factor = investment_amount / total_allocated
             for category in allocation:
@@ -250,7 +276,7 @@ class EnhancedPortfolioOptimizer:
                     # Adjust weight based on new amount
                     allocation[category][ticker]['weight'] = (allocation[category][ticker]['amount'] / investment_amount) * 100
             
-            print(f"Scaled down allocations by factor of {scale_factor}")
+            logger.debug("Scaled down allocations by factor of %s", scale_factor)
         
         # Calculate overall portfolio metrics
         self.calculate_portfolio_metrics(allocation, investment_amount)
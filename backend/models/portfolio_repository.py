@@ -0,0 +1,98 @@
+from pymongo import ReplaceOne
+
+from config import portfolio_history_collection, portfolios_collection
+
+
+class PortfolioRepository:
+    """
+    Materialized portfolios, one document per user keyed by the user's _id.
+
+    Each document holds the /portfolio/get-portfolio payload together with
+    the risk profile it was built for and the market-data version its
+    positions were last valued at.
+    """
+
+    def __init__(self, collection=None):
+        self.collection = portfolios_collection if collection is None else collection
+
+    def get(self, user_id):
+        return self.collection.find_one({"_id": user_id})
+
+    def get_many(self, user_ids):
+        """{user_id: document} for the stored portfolios of user_ids"""
+        cursor = self.collection.find({"_id": {"$in": list(user_ids)}})
+        return {document["_id"]: document for document in cursor}
+
+    def save(self, user_id, document):
+        self.collection.replace_one({"_id": user_id}, document, upsert=True)
+
+    def save_many(self, documents):
+        """Upsert {user_id: document} in one unordered bulk write"""
+        if not documents:
+            return 0
+        result = self.collection.bulk_write(
+            [ReplaceOne({"_id": user_id}, document, upsert=True) for user_id, document in documents.items()],
+            ordered=False
+        )
+        return result.upserted_count + result.modified_count
+
+    def iter_stale(self, market_version, batch_size=1000):
+        """Stream the stored portfolios valued at any market version other than market_version"""
+        return self.collection.find({"market_version": {"$ne": market_version}}).batch_size(batch_size)
+
+    def iter_holdings(self, batch_size=1000):
+        """Stream the fields needed to mark every stored portfolio to market"""
+        projection = {
+            "allocations.ticker": 1,
+            "allocations.units": 1,
+            "allocations.initial_investment": 1,
+            "allocations.current_price": 1,
+        }
+        return self.collection.find({}, projection).batch_size(batch_size)
+
+    def get_tickers(self, user_id):
+        """Tickers the user's stored portfolio holds a position in"""
+        document = self.collection.find_one(
+            {"_id": user_id}, {"allocations.ticker": 1, "allocations.quantity": 1}
+        )
+        if document is None:
+            return None
+        return [
+            allocation['ticker'] for allocation in document.get('allocations', [])
+            if allocation.get('quantity')
+        ]
+
+
+portfolios = PortfolioRepository()
+
+
+class PortfolioHistoryRepository:
+    """
+    Daily mark-to-market values per user in a time-series collection
+    (timeField "ts", metaField "user_id").
+    """
+
+    def __init__(self, collection=None):
+        self.collection = portfolio_history_collection if collection is None else collection
+
+    def has_valuations(self, ts):
+        return self.collection.find_one({"ts": ts}, {"_id": 1}) is not None
+
+    def delete_valuations(self, ts):
+        return self.collection.delete_many({"ts": ts}).deleted_count
+
+    def insert_valuations(self, documents):
+        if not documents:
+            return 0
+        return len(self.collection.insert_many(documents, ordered=False).inserted_ids)
+
+    def series(self, user_id, since):
+        """One user's valuations since `since`, oldest first"""
+        cursor = self.collection.find(
+            {"user_id": user_id, "ts": {"$gte": since}},
+            {"_id": 0, "ts": 1, "value": 1, "invested": 1}
+        )
+        return list(cursor.sort("ts", 1))
+
+
+portfolio_history = PortfolioHistoryRepository()
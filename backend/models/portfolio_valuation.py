@@ -0,0 +1,84 @@
+"""
+Mark stored portfolios to market in bulk.
+
+Holdings are laid out as a (portfolios, tickers) matrix of units held, so a
+whole batch is valued with one product against the snapshot's price vector.
+"""
+import logging
+from datetime import datetime, time, timezone
+
+import numpy as np
+
+from models.market_snapshot import market_snapshot
+from models.portfolio_repository import portfolio_history, portfolios
+from models.user_portfolio import position_units
+
+logger = logging.getLogger(__name__)
+
+
+def holdings_matrix(documents, tickers):
+    """
+    Return (user_ids, units, invested) for stored portfolio documents.
+
+    Units are the positions bought when each portfolio was built (see
+    position_units); they do not change when market data does, so valuing
+    them against later prices gives the portfolio's market value.
+    """
+    index = {ticker: i for i, ticker in enumerate(tickers)}
+    user_ids = []
+    units = np.zeros((len(documents), len(tickers)))
+    invested = np.zeros(len(documents))
+    for row, document in enumerate(documents):
+        user_ids.append(document['_id'])
+        for allocation in document.get('allocations', []):
+            column = index.get(allocation.get('ticker'))
+            if column is None or (allocation.get('units') is None and not allocation.get('current_price')):
+                continue
+            units[row, column] += position_units(allocation)
+            invested[row] += allocation['initial_investment']
+    return user_ids, units, invested
+
+
+def valuation_date(now=None):
+    """Valuations are stamped at UTC midnight of the day they describe"""
+    now = now or datetime.now(timezone.utc)
+    return datetime.combine(now.date(), time.min)
+
+
+def value_portfolios(ts=None, batch_size=5000, replace=False):
+    """
+    Value every stored portfolio at current market prices and append the
+    results to portfolio_history. Returns the number of valuations written;
+    0 when `ts` is already recorded and replace is False.
+    """
+    ts = ts or valuation_date()
+    if portfolio_history.has_valuations(ts):
+        if not replace:
+            logger.info("Valuations for %s already recorded", ts.date())
+            return 0
+        portfolio_history.delete_valuations(ts)
+
+    snapshot = market_snapshot.get()
+    market = snapshot.value
+    written = 0
+    batch = []
+
+    def flush():
+        nonlocal written
+        user_ids, units, invested = holdings_matrix(batch, market.tickers)
+        values = units @ market.prices
+        written += portfolio_history.insert_valuations([
+            {'ts': ts, 'user_id': user_id, 'value': value, 'invested': cost, 'market_version': snapshot.version}
+            for user_id, value, cost in zip(user_ids, values.tolist(), invested.tolist())
+        ])
+        batch.clear()
+
+    for document in portfolios.iter_holdings(batch_size):
+        batch.append(document)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    logger.info("Recorded %d portfolio valuations for %s (market data %s)", written, ts.date(), snapshot.version)
+    return written
@@ -0,0 +1,99 @@
+from functools import lru_cache
+
+import numpy as np
+
+from models.asset_universe import ASSET_UNIVERSE
+
+# Define allocation ranges for each asset class based on risk
+# Format: [min_allocation_at_risk_0, max_allocation_at_risk_1]
+ALLOCATION_RANGES = {
+    'Stocks': [0.20, 0.70],  # 20% to 70%
+    'Cryptocurrency': [0.00, 0.25],  # 0% to 25%
+    'Mutual Funds': [0.40, 0.05],  # 40% to 5% (decreases with risk)
+    'Commodities': [0.30, 0.10]  # 30% to 10% (decreases with risk)
+}
+
+RISK_CATEGORY_FACTORS = {
+    'conservative': 0.2,
+    'moderate': 0.5,
+    'balanced': 0.5,
+    'growth': 0.7,
+    'aggressive': 0.9
+}
+
+CATEGORIES = list(ALLOCATION_RANGES)
+_RANGES = np.array([ALLOCATION_RANGES[category] for category in CATEGORIES])
+
+# Each held asset gets an equal share of its category's weight
+ASSETS = [(category, asset) for category, assets in ASSET_UNIVERSE.items() for asset in assets]
+_ASSET_CATEGORY = np.array([CATEGORIES.index(category) for category, _ in ASSETS])
+_ASSET_SHARE = 1.0 / np.array([len(ASSET_UNIVERSE[category]) for category, _ in ASSETS])
+
+DEFAULT_GRID_POINTS = 101
+MAX_GRID_POINTS = 1001
+
+
+def risk_factor_for(risk_score, risk_category=None):
+    """Map a user's risk profile onto a 0-1 risk factor"""
+    # Default to using risk_score if available
+    if risk_score is not None:
+        # Convert risk score to a scale of 0-1
+        return risk_score / 10
+    # Fall back to risk_category if risk_score isn't available
+    if risk_category:
+        return RISK_CATEGORY_FACTORS.get(risk_category.lower(), 0.5)
+    # Default to moderate risk if neither is provided
+    return 0.5
+
+
+def category_weight_grid(risk_factors):
+    """Normalized category weights for each risk factor, shape (factors, categories)"""
+    factors = np.asarray(risk_factors, dtype=float)[:, None]
+    # Linear interpolation between min and max based on risk_factor
+    weights = _RANGES[:, 0] + (_RANGES[:, 1] - _RANGES[:, 0]) * factors
+    # Normalize category weights to ensure they sum to 1.0
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+@lru_cache(maxsize=32)
+def allocation_curve(points=DEFAULT_GRID_POINTS):
+    """Category and asset weights over an evenly spaced grid of risk factors in [0, 1]"""
+    factors = np.linspace(0.0, 1.0, points)
+    categories = category_weight_grid(factors)
+    # Each asset's curve is its category's curve split equally within the category
+    assets = categories[:, _ASSET_CATEGORY] * _ASSET_SHARE
+    return {
+        'risk_factors': factors.round(6).tolist(),
+        'labels': CATEGORIES,
+        'datasets': [
+            {'label': category, 'data': categories[:, i].tolist()}
+            for i, category in enumerate(CATEGORIES)
+        ],
+        'assets': [
+            {
+                'name': asset['name'],
+                'ticker': asset['ticker'],
+                'category': category,
+                'data': assets[:, i].tolist()
+            }
+            for i, (category, asset) in enumerate(ASSETS)
+        ]
+    }
+
+
+@lru_cache(maxsize=1)
+def risk_level_chart(risk_levels=('conservative', 'moderate', 'aggressive')):
+    """Category weights at the named risk levels, one dataset per level"""
+    weights = category_weight_grid([RISK_CATEGORY_FACTORS[level] for level in risk_levels])
+    return {
+        'labels': CATEGORIES,
+        'datasets': [
+            {'label': level.capitalize(), 'data': weights[i].tolist()}
+            for i, level in enumerate(risk_levels)
+        ]
+    }
+
+
+# Precompute the default views so requests are served from memory
+allocation_curve()
+risk_level_chart()
@@ -0,0 +1,156 @@
+"""
+Questionnaire risk scoring.
+
+The question weights, category thresholds and per-category allocation
+limits are tables, so a single answer set and a whole matrix of stored
+answers (one row per user) go through the same arithmetic.
+"""
+import hashlib
+import json
+
+import numpy as np
+
+# Question 0 is the investment amount and is not scored
+INVESTMENT_AMOUNT_QUESTION = 0
+QUESTION_WEIGHTS = {
+    1: 1.5,  # Investment horizon (most important)
+    2: 1.5,  # Risk comfort
+    3: 1.0,  # Income stability
+    4: 1.0,  # Emergency fund
+    5: 1.0,  # Investment knowledge
+}
+DEFAULT_QUESTION_WEIGHT = 1.0
+
+# Upper bound (inclusive) of each category's score range; above the last
+# threshold is the final category
+RISK_THRESHOLDS = np.array([1.8, 2.6, 3.4, 4.2])
+
+ALLOCATION_ASSETS = ('NIFTY50', 'GOLD', 'BTC', 'ETH')
+MIN_AMOUNTS = np.array([50000, 25000, 10000, 10000], dtype=float)
+
+RISK_BANDS = [
+    {
+        'category': "Very Conservative",
+        'description': "Focus on capital preservation with minimal risk tolerance",
+        'max_weights': (0.20, 0.60, 0.05, 0.05),
+    },
+    {
+        'category': "Conservative",
+        'description': "Emphasis on stability with some growth potential",
+        'max_weights': (0.30, 0.40, 0.10, 0.10),
+    },
+    {
+        'category': "Moderate",
+        'description': "Balanced approach between stability and growth",
+        'max_weights': (0.40, 0.30, 0.15, 0.15),
+    },
+    {
+        'category': "Aggressive",
+        'description': "Growth-oriented with higher risk tolerance",
+        'max_weights': (0.50, 0.20, 0.20, 0.15),
+    },
+    {
+        'category': "Very Aggressive",
+        'description': "Maximum growth potential with highest risk tolerance",
+        'max_weights': (0.60, 0.15, 0.20, 0.15),
+    },
+]
+MAX_WEIGHTS = np.array([band['max_weights'] for band in RISK_BANDS])
+
+# Changes whenever any table above changes; stored with each user's score so
+# the rescore job can tell which users were scored under older rules
+SCORING_VERSION = hashlib.sha1(json.dumps({
+    'weights': QUESTION_WEIGHTS,
+    'default_weight': DEFAULT_QUESTION_WEIGHT,
+    'thresholds': RISK_THRESHOLDS.tolist(),
+    'bands': RISK_BANDS,
+    'min_amounts': MIN_AMOUNTS.tolist(),
+}, sort_keys=True).encode()).hexdigest()[:12]
+
+
+def answers_matrix(answer_sets):
+    """
+    Stack answer dicts ({"1": 3, "2": 4, ...}) into a (users, questions)
+    array indexed by question number, with NaN for unanswered questions.
+    """
+    answer_sets = [answers or {} for answers in answer_sets]
+    n_questions = 1 + max((int(q) for answers in answer_sets for q in answers), default=0)
+    matrix = np.full((len(answer_sets), n_questions), np.nan)
+    for row, answers in enumerate(answer_sets):
+        for question, value in answers.items():
+            if value is not None:
+                matrix[row, int(question)] = value
+    return matrix
+
+
+def question_weights(n_questions):
+    weights = np.array([QUESTION_WEIGHTS.get(q, DEFAULT_QUESTION_WEIGHT) for q in range(n_questions)])
+    weights[INVESTMENT_AMOUNT_QUESTION] = 0.0
+    return weights
+
+
+def score_matrix(matrix):
+    """Weighted mean answer per row; NaN for rows with no scored answers"""
+    answered = ~np.isnan(matrix)
+    weights = question_weights(matrix.shape[1]) * answered
+    total_weights = weights.sum(axis=1)
+    weighted_sum = (np.where(answered, matrix, 0.0) * weights).sum(axis=1)
+    with np.errstate(invalid='ignore'):
+        return weighted_sum / total_weights
+
+
+def score_answers(answers):
+    """Risk score for one answer set; raises ValueError if nothing scorable was answered"""
+    score = score_matrix(answers_matrix([answers]))[0]
+    if np.isnan(score):
+        raise ValueError("No scored answers provided")
+    return float(score)
+
+
+def band_index(scores):
+    """Index into RISK_BANDS for each score"""
+    return np.searchsorted(RISK_THRESHOLDS, scores, side='left')
+
+
+def allocation_amounts(bands, investment_amounts):
+    """
+    Split each investment across ALLOCATION_ASSETS: first each asset's
+    minimum while money remains, then top up in order to the band's maximum
+    share. Returns a (users, assets) array of amounts.
+    """
+    investment_amounts = np.asarray(investment_amounts, dtype=float)
+    max_amounts = MAX_WEIGHTS[bands] * investment_amounts[:, None]
+    amounts = np.zeros_like(max_amounts)
+    remaining = investment_amounts.copy()
+
+    for asset, min_amount in enumerate(MIN_AMOUNTS):
+        funded = remaining >= min_amount
+        amounts[funded, asset] = min_amount
+        remaining[funded] -= min_amount
+
+    for asset in range(len(ALLOCATION_ASSETS)):
+        additional = np.clip(np.minimum(remaining, max_amounts[:, asset] - amounts[:, asset]), 0, None)
+        amounts[:, asset] += additional
+        remaining -= additional
+
+    return amounts
+
+
+def allocation_percentages(bands, investment_amounts):
+    """Per-user {asset: percent of investment} dicts"""
+    investment_amounts = np.asarray(investment_amounts, dtype=float)
+    percentages = allocation_amounts(bands, investment_amounts) / investment_amounts[:, None] * 100
+    return [dict(zip(ALLOCATION_ASSETS, row)) for row in percentages.tolist()]
+
+
+def risk_profile(answers, investment_amount):
+    """Score one questionnaire: risk score, category, description and asset allocation"""
+    score = score_answers(answers)
+    band = int(band_index(score))
+    return {
+        'risk_score': round(score, 2),
+        'risk_category': RISK_BANDS[band]['category'],
+        'risk_description': RISK_BANDS[band]['description'],
+        'asset_allocation': allocation_percentages([band], [investment_amount])[0],
+        'risk_scoring_version': SCORING_VERSION,
+    }
@@ -1,178 +1,320 @@
 import numpy as np
 import pandas as pd
 import yfinance as yf
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from scipy.optimize import minimize
+from scipy.stats import rankdata
 import logging
+from config import STOCK_UNIVERSE_FILE
+from utils.metrics import SCREENING_STAGE_SECONDS, SCREENING_SYMBOLS, track_upstream
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Default universe used when no STOCK_UNIVERSE_FILE is configured
+NIFTY50_TICKERS = [
+    "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "INFY.NS", "ICICIBANK.NS",
+    "HINDUNILVR.NS", "SBIN.NS", "ITC.NS", "BHARTIARTL.NS", "KOTAKBANK.NS",
+    "AXISBANK.NS", "BAJFINANCE.NS", "SUNPHARMA.NS", "BAJAJFINSV.NS", "ADANIPORTS.NS",
+    "MARUTI.NS", "M&M.NS", "POWERGRID.NS", "NTPC.NS", "DRREDDY.NS"
+]
+
+def load_universe(path=None):
+    """
+    Load a screening universe from a text or CSV file.
+
+    Each line holds one symbol; for CSV exports (e.g. the NSE NIFTY 500 list)
+    the first column is used and a header row is skipped. Symbols without an
+    exchange suffix are assumed to be NSE listings.
+    """
+    path = path or STOCK_UNIVERSE_FILE
+    if not path:
+        return list(NIFTY50_TICKERS)
+
+    tickers = []
+    with open(path) as f:
+        for line in f:
+            symbol = line.split(',')[0].strip().strip('"').upper()
+            if not symbol or symbol in ('SYMBOL', 'TICKER'):
+                continue
+            if '.' not in symbol:
+                symbol += '.NS'
+            if symbol not in tickers:
+                tickers.append(symbol)
+    return tickers
+
+def nearest_psd(matrix):
+    """
+    Symmetric positive semi-definite matrix closest to `matrix`, made by
+    clipping its negative eigenvalues to zero. Pairs with no common history
+    count as uncorrelated.
+    """
+    matrix = np.nan_to_num(np.asarray(matrix, dtype=float))
+    matrix = (matrix + matrix.T) / 2
+    eigenvalues, eigenvectors = np.linalg.eigh(matrix)
+    if eigenvalues.min() >= 0:
+        return matrix
+    return (eigenvectors * np.clip(eigenvalues, 0, None)) @ eigenvectors.T
+
+
 class StockAllocationModel:
-    def __init__(self, risk_free_rate=0.07):
+    def __init__(self, risk_free_rate=0.07, universe=None, top_n=15, min_history_days=100,
+                 min_coverage=0.7, min_median_traded_value=5e7, download_batch_size=100):
         self.risk_free_rate = risk_free_rate
-        self.nifty50_tickers = [
-            "RELIANCE.NS", "TCS.NS", "HDFCBANK.NS", "INFY.NS", "ICICIBANK.NS", 
-            "HINDUNILVR.NS", "SBIN.NS", "ITC.NS", "BHARTIARTL.NS", "KOTAKBANK.NS",
-            "AXISBANK.NS", "BAJFINANCE.NS", "SUNPHARMA.NS", "BAJAJFINSV.NS", "ADANIPORTS.NS",
-            "MARUTI.NS", "M&M.NS", "POWERGRID.NS", "NTPC.NS", "DRREDDY.NS"
-        ]
-        
+        self.universe = list(universe) if universe is not None else load_universe()
+        # Only this many candidates reach covariance estimation and the optimizer
+        self.top_n = top_n
+        self.min_history_days = min_history_days
+        self.min_coverage = min_coverage
+        # Median daily traded value (close * volume) in INR over the last quarter
+        self.min_median_traded_value = min_median_traded_value
+        self.download_batch_size = download_batch_size
+        self.stage_timings = {}
+
+    @property
+    def nifty50_tickers(self):
+        return self.universe
+
+    @contextmanager
+    def _stage(self, name):
+        """Record wall-clock time for one pipeline stage"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.stage_timings[name] = elapsed
+            SCREENING_STAGE_SECONDS.labels(name).observe(elapsed)
+
+    def _download_prices(self, start_date, end_date):
+        """Download close and volume matrices for the whole universe in batches"""
+        closes, volumes = [], []
+        for i in range(0, len(self.universe), self.download_batch_size):
+            batch = self.universe[i:i + self.download_batch_size]
+            try:
+                with track_upstream('yfinance', 'download'):
+                    data = yf.download(batch, start=start_date, end=end_date,
+                                       group_by='column', progress=False, threads=True)
+            except Exception as e:
+                logger.warning("Error fetching batch starting at %s: %s", batch[0], e)
+                continue
+            if data is None or data.empty:
+                continue
+
+            if isinstance(data.columns, pd.MultiIndex):
+                close, volume = data['Close'], data['Volume']
+            else:
+                # Single-symbol batches come back with flat columns
+                close = data[['Close']].rename(columns={'Close': batch[0]})
+                volume = data[['Volume']].rename(columns={'Volume': batch[0]})
+            closes.append(close)
+            volumes.append(volume)
+
+        if not closes:
+            return pd.DataFrame(), pd.DataFrame()
+        return pd.concat(closes, axis=1), pd.concat(volumes, axis=1)
+
     def fetch_stock_data(self):
-        """Fetch and prepare stock data"""
+        """Fetch the universe and drop symbols with thin history or low liquidity"""
         end_date = datetime.now()
         start_date = end_date - timedelta(days=365)
-        
-        logger.info("Fetching stock data...")
-        
-        # Initialize data storage
-        price_data = pd.DataFrame()
-        valid_tickers = []
-        
-        # Fetch data for each ticker
-        for ticker in self.nifty50_tickers:
-            try:
-                stock_data = yf.download(ticker, start=start_date, end=end_date, progress=False)
-                if not stock_data.empty and len(stock_data) > 100:
-                    price_data[ticker] = stock_data['Close']
-                    valid_tickers.append(ticker)
-            except Exception as e:
-                logger.warning(f"Error fetching data for {ticker}: {e}")
-        
-        # Clean and prepare data
-        self.price_data = price_data.dropna(axis=1, thresh=len(price_data)*0.7)
-        self.price_data = self.price_data.ffill()
-        self.valid_tickers = list(self.price_data.columns)
-        
-        # Calculate daily returns
-        daily_returns = (self.price_data / self.price_data.shift(1) - 1).dropna()
-        
-        # Calculate annualized returns properly
-        # First get total return for the period
-        total_returns = (self.price_data.iloc[-1] / self.price_data.iloc[0]) - 1
-        
-        # Convert to annualized returns using actual number of trading days
-        days = len(self.price_data)
-        self.annual_returns = ((1 + total_returns) ** (252/days)) - 1
-        
-        # Calculate annualized volatility
-        self.annual_volatility = daily_returns.std() * np.sqrt(252)
-        
-        # Calculate covariance matrix
-        self.covariance = daily_returns.cov() * 252
-        
-        # Store daily returns for other calculations
-        self.returns = daily_returns
-        
-        logger.info(f"Successfully processed data for {len(self.valid_tickers)} stocks")
-        
+
+        logger.info("Fetching stock data for %d symbols...", len(self.universe))
+        SCREENING_SYMBOLS.labels('universe').set(len(self.universe))
+
+        with self._stage('fetch'):
+            close, volume = self._download_prices(start_date, end_date)
+
+        with self._stage('filter'):
+            if close.empty:
+                raise ValueError("No price data available for the screening universe")
+            # Overlapping batches can return a symbol twice; reindex needs unique labels
+            close = close.loc[:, ~close.columns.duplicated()]
+            volume = volume.loc[:, ~volume.columns.duplicated()].reindex(columns=close.columns)
+
+            # Coverage: enough non-missing closes over the window
+            observed = close.notna().to_numpy()
+            counts = observed.sum(axis=0)
+            coverage_ok = (counts >= self.min_history_days) & (counts >= self.min_coverage * len(close))
+
+            # Liquidity: median traded value over roughly the last quarter
+            traded_value = (close.to_numpy() * volume.to_numpy())[-63:]
+            with np.errstate(all='ignore'):
+                median_traded = np.nanmedian(np.where(traded_value > 0, traded_value, np.nan), axis=0)
+            liquidity_ok = np.nan_to_num(median_traded) >= self.min_median_traded_value
+
+            keep = coverage_ok & liquidity_ok
+            # Carry prices over gaps but never back before a symbol's first close:
+            # each symbol's metrics cover only the window it actually traded in
+            self.price_data = close.loc[:, keep].ffill()
+            self.valid_tickers = list(self.price_data.columns)
+
+        SCREENING_SYMBOLS.labels('filtered').set(len(self.valid_tickers))
+        logger.info("%d of %d symbols passed coverage and liquidity filters", len(self.valid_tickers), len(self.universe))
+
+        if not self.valid_tickers:
+            raise ValueError("No symbols passed the coverage and liquidity filters")
+
+        with self._stage('metrics'):
+            self._calculate_screening_metrics()
+
+    def _calculate_screening_metrics(self):
+        """
+        Compute returns, volatility, Sharpe and momentum in one pass over the
+        price matrix. Symbols listed after the window starts have leading NaNs;
+        their metrics use the rows from their first close onwards.
+        """
+        prices = self.price_data.to_numpy(dtype=float)
+        tickers = self.price_data.columns
+        rows = len(prices)
+        columns = np.arange(prices.shape[1])
+
+        # Row of each symbol's first close and the number of rows it has traded
+        first = np.argmax(~np.isnan(prices), axis=0)
+        days = rows - first
+
+        daily_returns = prices[1:] / prices[:-1] - 1
+
+        # Annualized returns from the total return over each symbol's trading days
+        total_returns = prices[-1] / prices[first, columns] - 1
+        annual_returns = (1 + total_returns) ** (252 / days) - 1
+        annual_volatility = np.nanstd(daily_returns, axis=0, ddof=1) * np.sqrt(252)
+
+        # 3-month momentum (higher weight) and 6-month momentum (lower weight),
+        # measured from the first close for symbols younger than that
+        three_month_ago = np.maximum(rows - 63, first)
+        six_month_ago = np.maximum(rows - 126, first)
+        momentum = ((prices[-1] / prices[three_month_ago, columns] - 1) * 0.7 +
+                    (prices[-1] / prices[six_month_ago, columns] - 1) * 0.3)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            sharpe = (annual_returns - self.risk_free_rate) / annual_volatility
+
+        self._daily_returns = daily_returns
+        self.annual_returns = pd.Series(annual_returns, index=tickers)
+        self.annual_volatility = pd.Series(annual_volatility, index=tickers)
+        self.momentum_scores = pd.Series(momentum, index=tickers)
+        self.sharpe_ratios = pd.Series(np.nan_to_num(sharpe, nan=-np.inf), index=tickers)
+
     def calculate_momentum_scores(self):
-        """Calculate momentum scores for stock selection"""
-        # 3-month momentum (higher weight)
-        three_month_ago = max(0, len(self.price_data) - 63)
-        momentum_3m = (self.price_data.iloc[-1] / self.price_data.iloc[three_month_ago] - 1) * 0.7
-        
-        # 6-month momentum (lower weight)
-        six_month_ago = max(0, len(self.price_data) - 126)
-        momentum_6m = (self.price_data.iloc[-1] / self.price_data.iloc[six_month_ago] - 1) * 0.3
-        
-        self.momentum_scores = momentum_3m + momentum_6m
-        
-    def select_top_stocks(self, n=15):
+        """Momentum scores are computed with the other screening metrics"""
+        return self.momentum_scores
+
+    def select_top_stocks(self, n=None):
         """Select top N stocks based on momentum and Sharpe ratio"""
-        # Calculate Sharpe ratios
-        sharpe_ratios = (self.annual_returns - self.risk_free_rate) / self.annual_volatility
-        
-        # Combine momentum and Sharpe ratio scores
-        combined_score = 0.6 * self.momentum_scores.rank() + 0.4 * sharpe_ratios.rank()
-        
-        # Select top N stocks
-        self.top_stocks = combined_score.nlargest(n).index.tolist()
-        
+        n = min(n or self.top_n, len(self.valid_tickers))
+
+        with self._stage('select'):
+            # Combine momentum and Sharpe ratio ranks
+            combined_score = (0.6 * rankdata(self.momentum_scores.to_numpy()) +
+                              0.4 * rankdata(self.sharpe_ratios.to_numpy()))
+
+            # Stable descending order so ties keep universe order
+            top_idx = np.argsort(-combined_score, kind='stable')[:n]
+            candidates = self.price_data.columns[top_idx]
+
+            # Covariance only for the shortlisted candidates, pairwise over the
+            # days both symbols traded. Pairs estimated over different days
+            # need not form a valid covariance matrix, so it is projected
+            # to the nearest PSD one before the optimizer takes square roots
+            candidate_returns = self._daily_returns[:, top_idx]
+            self.returns = pd.DataFrame(candidate_returns, index=self.price_data.index[1:], columns=candidates)
+            self.covariance = pd.DataFrame(
+                nearest_psd(self.returns.cov(min_periods=2).to_numpy() * 252), index=candidates, columns=candidates
+            )
+
+            self.top_stocks = candidates.tolist()
+
+        SCREENING_SYMBOLS.labels('selected').set(len(self.top_stocks))
         return self.top_stocks
-        
+
     def optimize_portfolio(self):
         """Optimize portfolio weights for the selected stocks"""
         n_assets = len(self.top_stocks)
-        
+
         # Filter data for selected stocks
-        filtered_returns = self.annual_returns[self.top_stocks]
-        filtered_cov = self.covariance.loc[self.top_stocks, self.top_stocks]
-        
+        filtered_returns = self.annual_returns[self.top_stocks].to_numpy()
+        filtered_cov = self.covariance.loc[self.top_stocks, self.top_stocks].to_numpy()
+
         def portfolio_volatility(weights):
             return np.sqrt(np.dot(weights.T, np.dot(filtered_cov, weights)))
-            
+
         def portfolio_return(weights):
             return np.sum(filtered_returns * weights)
-            
+
         def sharpe_ratio(weights):
             ret = portfolio_return(weights)
             vol = portfolio_volatility(weights)
             return (ret - self.risk_free_rate) / vol
-            
+
         def objective(weights):
             return -sharpe_ratio(weights)  # Minimize negative Sharpe ratio = Maximize Sharpe ratio
-            
+
         # Constraints
         constraints = [
             {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}  # Weights sum to 1
         ]
-        
-        # Bounds (2% to 15% per stock)
-        bounds = tuple((0.02, 0.15) for _ in range(n_assets))
-        
+
+        # Bounds (2% to 15% per stock, widened when too few stocks survive screening)
+        upper = max(0.15, 1.0 / n_assets)
+        bounds = tuple((min(0.02, 1.0 / n_assets), upper) for _ in range(n_assets))
+
         # Initial weights based on momentum ranking
-        momentum_ranks = self.momentum_scores[self.top_stocks].rank()
+        momentum_ranks = self.momentum_scores[self.top_stocks].rank().to_numpy()
         initial_weights = momentum_ranks / momentum_ranks.sum()
-        
+
         try:
-            result = minimize(
-                objective,
-                initial_weights,
-                method='SLSQP',
-                bounds=bounds,
-                constraints=constraints
-            )
-            
+            with self._stage('optimize'):
+                result = minimize(
+                    objective,
+                    initial_weights,
+                    method='SLSQP',
+                    bounds=bounds,
+                    constraints=constraints
+                )
+
             if result.success:
                 optimal_weights = result.x
             else:
                 logger.warning("Optimization failed, using momentum-based weights")
                 optimal_weights = initial_weights
-                
+
         except Exception as e:
-            logger.error(f"Optimization error: {e}")
+            logger.error("Optimization error: %s", e)
             optimal_weights = initial_weights
-            
+
         return optimal_weights
-        
+
     def generate_optimized_portfolio(self):
         """Generate complete optimized portfolio with all metrics"""
-        # Fetch and prepare data
+        self.stage_timings = {}
+
+        # Fetch, filter and score the universe
         self.fetch_stock_data()
-        
-        # Calculate momentum scores
-        self.calculate_momentum_scores()
-        
+
         # Select top stocks
         self.select_top_stocks()
-        
+
         # Optimize weights
         optimal_weights = self.optimize_portfolio()
-        
+
         # Create portfolio dataframe
         portfolio = pd.DataFrame({
             'Ticker': self.top_stocks,
             'Weight': optimal_weights * 100,  # Convert to percentage
-            'Expected Return': self.annual_returns[self.top_stocks] * 100,  # Convert to percentage
-            'Volatility': self.annual_volatility[self.top_stocks] * 100,  # Convert to percentage
-            'Momentum Score': self.momentum_scores[self.top_stocks]
+            'Expected Return': self.annual_returns[self.top_stocks].to_numpy() * 100,  # Convert to percentage
+            'Volatility': self.annual_volatility[self.top_stocks].to_numpy() * 100,  # Convert to percentage
+            'Momentum Score': self.momentum_scores[self.top_stocks].to_numpy()
         })
-        
+
         # Sort by weight
         portfolio = portfolio.sort_values('Weight', ascending=False)
-        
+
         # Cap returns at reasonable levels
         portfolio['Expected Return'] = portfolio['Expected Return'].clip(-50, 50)
-        
-        return portfolio 
\ No newline at end of file
+
+        logger.info("Screening timings for %d symbols: %s", len(self.universe),
+                    ", ".join(f"{stage}={seconds:.3f}s" for stage, seconds in self.stage_timings.items()))
+
+        return portfolio
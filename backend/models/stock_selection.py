@@ -0,0 +1,34 @@
+"""
+The screened and optimized stock portfolio served by /portfolio/stock-selection.
+
+One model run per market data refresh window, shared by all requests and
+warmed at startup (models/warmup.py).
+"""
+from models.portfolio_optimizer import portfolio_optimizer
+from models.stock_allocation import StockAllocationModel
+from utils.snapshot import SnapshotCache
+
+
+def build_stock_selection():
+    """Run the stock screening model and format its output for the API"""
+    model = StockAllocationModel()
+    stocks = model.generate_optimized_portfolio()
+    return {
+        'stocks': [
+            {
+                'name': portfolio_optimizer.get_display_name(row['Ticker']),
+                'ticker': row['Ticker'],
+                'weight': row['Weight'],
+                'expected_return': row['Expected Return'],
+                'volatility': row['Volatility'],
+                'momentum_score': row['Momentum Score']
+            }
+            for _, row in stocks.iterrows()
+        ],
+        'universe_size': len(model.universe),
+        'screened_size': len(model.valid_tickers),
+        'stage_timings': model.stage_timings
+    }
+
+
+stock_selection_snapshot = SnapshotCache('stock_selection', build_stock_selection)
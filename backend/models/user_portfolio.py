@@ -0,0 +1,447 @@
+import copy
+import logging
+from datetime import datetime
+
+import numpy as np
+
+from models.asset_universe import ASSET_UNIVERSE
+from models.discrete_allocation import allocate_lots
+from models.market_snapshot import market_snapshot
+from models.portfolio_repository import portfolios
+from models.risk_allocation import CATEGORIES, category_weight_grid, risk_factor_for
+from models.user_repository import RISK_PROFILE_FIELDS, users
+
+logger = logging.getLogger(__name__)
+
+def calculate_portfolio_metrics(weights, returns, cov_matrix, risk_free_rate=0.05):
+    portfolio_return = np.sum(returns * weights)
+    portfolio_volatility = np.sqrt(np.dot(weights.T, np.dot(cov_matrix, weights)))
+    sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_volatility
+    return portfolio_return, portfolio_volatility, sharpe_ratio
+
+def get_risk_based_allocation(risk_score, risk_category=None):
+    """
+    Generate asset allocation based on user's risk profile
+    
+    Parameters:
+    risk_score (int): User's risk score (typically 1-10)
+    risk_category (str): User's risk category (e.g., 'conservative', 'moderate', 'aggressive')
+    
+    Returns:
+    dict: Asset allocation dictionary
+    """
+    risk_factor = risk_factor_for(risk_score, risk_category)
+    
+    logger.debug("Using risk factor: %s", risk_factor)
+    
+    # Calculate allocations based on risk factor
+    assets_data = copy.deepcopy(ASSET_UNIVERSE)
+    
+    # Calculate category weights based on risk factor
+    category_weights = dict(zip(CATEGORIES, category_weight_grid([risk_factor])[0].tolist()))
+    
+    logger.debug("Category weights: %s", category_weights)
+    
+    # Distribute weights within each category
+    for category, assets in assets_data.items():
+        category_weight = category_weights[category]
+        num_assets = len(assets)
+        
+        # For simplicity, distribute equally within each category
+        # More sophisticated approaches could be implemented here
+        asset_weight = category_weight / num_assets
+        
+        for asset in assets:
+            asset['weight'] = asset_weight
+    
+    return assets_data
+
+def validate_mutual_fund_allocations(allocations, investment_amount):
+    """
+    Validate mutual fund allocations to ensure they don't exceed investment amount
+    and quantities are consistent with market prices.
+    
+    Parameters:
+    allocations (list): List of asset allocations
+    investment_amount (float): Total investment amount
+    
+    Returns:
+    list: Corrected allocations
+    """
+    # Find mutual fund allocations
+    mf_allocations = [a for a in allocations if a['category'] == 'Mutual Funds']
+    
+    if not mf_allocations:
+        return allocations
+    
+    for mf in mf_allocations:
+        # Recalculate quantity based on initial investment and current price
+        mf['quantity'] = round(mf['initial_investment'] / mf['current_price'], 4)
+        
+        # Update amount to reflect current value
+        current_value = mf['quantity'] * mf['current_price']
+        mf['amount'] = current_value
+        
+        logger.debug("Mutual fund %s - Initial: %s, Price: %s, Quantity: %s, Current Value: %s",
+                     mf['name'], mf['initial_investment'], mf['current_price'], mf['quantity'], mf['amount'])
+    
+    # Validate total mutual fund allocation
+    total_mf_initial = sum(mf['initial_investment'] for mf in mf_allocations)
+    mf_weight = total_mf_initial / investment_amount
+    
+    # If mutual fund initial investment is more than 50% of investment, adjust it
+    if mf_weight > 0.5:
+        logger.warning("Mutual fund allocation (%s) exceeds 50%% of investment", total_mf_initial)
+        scale_factor = (0.5 * investment_amount) / total_mf_initial
+        
+        for mf in mf_allocations:
+            old_amount = mf['initial_investment']
+            mf['initial_investment'] *= scale_factor
+            mf['weight'] = (mf['initial_investment'] / investment_amount)
+            
+            # Recalculate quantity and current value
+            mf['quantity'] = round(mf['initial_investment'] / mf['current_price'], 4)
+            mf['amount'] = mf['quantity'] * mf['current_price']
+            
+            logger.debug("Scaled %s from %s to %s", mf['name'], old_amount, mf['initial_investment'])
+    
+    return allocations
+
+# Add this new validation function for gold specifically
+def fix_gold_allocation(allocations):
+    """
+    Apply the special formula for gold: quantity = market_price / initial_investment
+    This is specifically requested for gold only.
+    
+    Parameters:
+    allocations (list): List of asset allocations
+    
+    Returns:
+    list: Corrected allocations with gold using the special formula
+    """
+    for allocation in allocations:
+        if allocation['category'] == 'Commodities' and allocation['ticker'] == 'GC=F':
+            # Apply the special formula for gold: quantity = market_price / initial_investment
+            initial_investment = allocation['initial_investment']
+            market_price = allocation['current_price']
+            
+            # Special formula for gold
+            allocation['quantity'] = round(market_price / initial_investment, 4)
+            
+            # Set amount/current value based on quantity
+            allocation['amount'] = initial_investment  # Current value equals initial investment
+            
+            logger.debug("Applied special gold formula for %s: Quantity = %s / %s = %s",
+                         allocation['name'], market_price, initial_investment, allocation['quantity'])
+    
+    return allocations
+
+def build_portfolio(investment_amount, risk_score, risk_category, market):
+    """
+    Compute a user's holdings and portfolio metrics against a market snapshot.
+
+    Returns a dict with 'portfolio_metrics' and 'allocations', the payload of
+    /portfolio/get-portfolio.
+    """
+    # Get personalized asset allocation based on risk profile
+    assets_data = get_risk_based_allocation(risk_score, risk_category)
+
+    prices = market.price_map
+
+    # Whole-share quantities for stocks that track the target amounts as
+    # closely as the stock budget allows; what the shares do not use is
+    # left as cash in remaining_amount
+    stocks = assets_data.get('Stocks', [])
+    stock_targets = [investment_amount * asset['weight'] for asset in stocks]
+    stock_quantities, remaining_amount = allocate_lots(
+        stock_targets,
+        [prices[asset['ticker']] for asset in stocks],
+        sum(stock_targets)
+    )
+    stock_quantities = dict(zip((asset['ticker'] for asset in stocks), stock_quantities))
+    remaining_amount = max(float(remaining_amount), 0.0)
+
+    # Calculate allocations and add quantity data
+    allocations = []
+
+    for category, assets in assets_data.items():
+        for asset in assets:
+            asset_amount = investment_amount * asset['weight']
+            invested_amount = asset_amount
+            current_price = prices[asset['ticker']]
+
+            # Calculate quantity based on asset type
+            if category == 'Stocks':
+                quantity = int(stock_quantities[asset['ticker']])
+                actual_amount = quantity * current_price
+                # Only the cost of the whole shares is invested
+                invested_amount = actual_amount
+            elif category == 'Mutual Funds':
+                # For mutual funds, calculate quantity based on initial investment
+                # Strictly use the formula: quantity = initial_investment / market_price
+                quantity = round(asset_amount / current_price, 4)
+                initial_investment = asset_amount  # This is the allocated amount for this asset
+                # Current value might fluctuate based on market price, but initial investment remains fixed
+                actual_amount = quantity * current_price  # This represents current value
+            else:
+                # For other assets (crypto, commodities), use normal division
+                quantity = asset_amount / current_price
+                actual_amount = asset_amount
+
+            allocations.append({
+                'name': asset['name'],
+                'ticker': asset['ticker'],
+                'category': category,
+                'expected_return': asset['expected_return'],
+                'amount': actual_amount,  # Current value
+                'quantity': quantity,
+                'initial_investment': invested_amount,  # Cost of the position bought: whole shares for stocks, the full target otherwise
+                'weight': invested_amount / investment_amount,
+                'current_price': current_price
+            })
+
+    # Validate mutual fund allocations specifically
+    allocations = validate_mutual_fund_allocations(allocations, investment_amount)
+
+    # Apply special formula for gold quantity
+    allocations = fix_gold_allocation(allocations)
+
+    # Validate total allocation doesn't exceed investment amount
+    total_allocated_initial = sum(allocation['initial_investment'] for allocation in allocations)
+    if total_allocated_initial + remaining_amount > investment_amount * 1.001:  # Allow 0.1% margin for rounding errors
+        logger.warning("Total initial allocation (%s) exceeds investment amount (%s)",
+                       total_allocated_initial, investment_amount)
+        # Scale down the fractional allocations proportionally; stocks keep
+        # their whole shares
+        others = [a for a in allocations if a['category'] != 'Stocks']
+        stock_cost = total_allocated_initial - sum(a['initial_investment'] for a in others)
+        scale_factor = (investment_amount - remaining_amount - stock_cost) / (total_allocated_initial - stock_cost)
+        for allocation in others:
+            allocation['initial_investment'] *= scale_factor
+            allocation['weight'] *= scale_factor
+
+            # Recalculate quantity and current value
+            allocation['quantity'] = round(allocation['initial_investment'] / allocation['current_price'], 4)
+            allocation['amount'] = allocation['quantity'] * allocation['current_price']
+
+        logger.debug("Scaled down allocations by factor of %s", scale_factor)
+
+    # Calculate portfolio metrics on the weights actually held; uninvested
+    # cash adds no return and no volatility
+    weights = np.array([asset['weight'] for asset in allocations])
+    returns = np.array([asset['expected_return'] / 100 for asset in allocations])
+
+    # Annualized covariance of the held assets from market data
+    cov_matrix = market.covariance_for([asset['ticker'] for asset in allocations])
+
+    portfolio_return, portfolio_volatility, sharpe_ratio = calculate_portfolio_metrics(
+        weights, returns, cov_matrix
+    )
+
+    # Log the portfolio data structure
+    logger.debug("Portfolio metrics: return=%.4f volatility=%.4f sharpe=%.4f across %d allocations",
+                 portfolio_return * 100, portfolio_volatility * 100, sharpe_ratio, len(allocations))
+
+    # Validate each allocation entry
+    for allocation in allocations:
+        if not all(key in allocation for key in ['name', 'category', 'weight', 'amount']):
+            logger.error("Invalid allocation entry: %s", allocation)
+            raise ValueError('Invalid allocation data structure')
+
+    # Final validation of total allocation
+    final_total_initial = sum(a['initial_investment'] for a in allocations)
+    if abs(final_total_initial + remaining_amount - investment_amount) > 0.01 * investment_amount:
+        logger.warning("Final total initial allocation (%s) still differs from investment amount (%s)",
+                       final_total_initial, investment_amount)
+        logger.warning("Adjusting response to show correct values")
+
+        # Calculate corrected weights
+        for allocation in allocations:
+            allocation['weight'] = (allocation['initial_investment'] / final_total_initial) * 100
+
+        # Add note about adjustment to response
+        note = f"Allocation adjusted to match investment amount ({investment_amount})"
+    else:
+        note = "Allocation matches investment amount"
+
+    # Units held of each asset at the prices it was bought at. These stay
+    # fixed until the profile changes; later market data only revalues them.
+    # (For gold, 'quantity' is the display formula above, not units.)
+    for allocation in allocations:
+        allocation['units'] = allocation['initial_investment'] / allocation['current_price']
+
+    # Calculate total current value
+    total_current_value = sum(a['amount'] for a in allocations)
+
+    return {
+        'portfolio_metrics': {
+            'total_investment': investment_amount,
+            'total_current_value': total_current_value,
+            'expected_return': portfolio_return * 100,
+            'volatility': portfolio_volatility * 100,
+            'sharpe_ratio': sharpe_ratio,
+            'remaining_amount': remaining_amount,  # Cash the whole stock shares left unspent
+            'note': note  # Add note about allocation adjustment
+        },
+        'allocations': allocations
+    }
+
+
+def _profile(user):
+    return {field: user.get(field) for field in RISK_PROFILE_FIELDS}
+
+
+def compute_portfolio_document(user, snapshot):
+    """Build the stored portfolio for `user` (risk profile fields) from a market Snapshot"""
+    portfolio = build_portfolio(
+        user.get('investment_amount'), user.get('risk_score'), user.get('risk_category'), snapshot.value
+    )
+    return {
+        'profile': _profile(user),
+        'market_version': snapshot.version,
+        'market_source': snapshot.value.source,
+        'computed_at': datetime.utcnow(),
+        **portfolio
+    }
+
+
+def position_units(allocation):
+    """Units held; portfolios stored before units were recorded were bought at their current_price"""
+    units = allocation.get('units')
+    if units is None:
+        units = allocation['initial_investment'] / allocation['current_price']
+    return units
+
+
+def revalue_portfolio_document(document, snapshot):
+    """
+    Copy of a stored portfolio with each position marked to the snapshot's
+    prices. Units, cost and weights are the ones bought when it was built.
+    """
+    prices = snapshot.value.price_map
+    allocations = []
+    for allocation in document.get('allocations', []):
+        allocation = dict(allocation)
+        price = prices.get(allocation['ticker'])
+        if price:
+            allocation['units'] = position_units(allocation)
+            allocation['current_price'] = price
+            allocation['amount'] = allocation['units'] * price
+        allocations.append(allocation)
+    return {
+        **document,
+        'market_version': snapshot.version,
+        'market_source': snapshot.value.source,
+        'valued_at': datetime.utcnow(),
+        'portfolio_metrics': {
+            **document.get('portfolio_metrics', {}),
+            'total_current_value': sum(allocation['amount'] for allocation in allocations),
+        },
+        'allocations': allocations,
+    }
+
+
+def is_current(document, user, snapshot):
+    """
+    A stored portfolio keeps its positions while the profile it was built for
+    is unchanged. One bought at fallback prices is rebuilt once live prices
+    are available.
+    """
+    return (
+        document is not None
+        and document.get('profile') == _profile(user)
+        and (document.get('market_source') != 'fallback' or snapshot.value.source == 'fallback')
+    )
+
+
+def is_valued(document, snapshot):
+    """Whether a stored portfolio is marked to this snapshot; fallback prices never replace real ones"""
+    return document.get('market_version') == snapshot.version or snapshot.value.source == 'fallback'
+
+
+def refresh_user_portfolio(user):
+    """Recompute and store one user's portfolio; `user` needs _id and the risk profile fields"""
+    document = compute_portfolio_document(user, market_snapshot.get())
+    portfolios.save(user['_id'], document)
+    return document
+
+
+def get_user_portfolio(user):
+    """
+    The user's stored portfolio. It is rebuilt only when the risk profile
+    changed; newer market data revalues the positions it already holds.
+    """
+    snapshot = market_snapshot.get()
+    document = portfolios.get(user['_id'])
+    if not is_current(document, user, snapshot):
+        logger.debug("Stored portfolio for %s does not match the profile, rebuilding", user['_id'])
+        document = compute_portfolio_document(user, snapshot)
+        portfolios.save(user['_id'], document)
+    elif not is_valued(document, snapshot):
+        document = revalue_portfolio_document(document, snapshot)
+        portfolios.save(user['_id'], document)
+    return document
+
+
+def rebuild_portfolios(profiles, snapshot=None):
+    """
+    Rebuild and store the portfolios of `profiles` (user documents with _id
+    and the risk profile fields) in one bulk_write. Returns how many were built.
+    """
+    snapshot = market_snapshot.get() if snapshot is None else snapshot
+    documents = {}
+    for user in profiles:
+        if not user.get('investment_amount'):
+            continue
+        try:
+            documents[user['_id']] = compute_portfolio_document(user, snapshot)
+        except Exception as e:
+            logger.error("Could not compute portfolio for %s: %s", user['_id'], e)
+    portfolios.save_many(documents)
+    return len(documents)
+
+
+def refresh_stale_portfolios(batch_size=500):
+    """
+    Bring every stored portfolio valued at older market data up to the
+    current snapshot. Only those documents are read, through the
+    market_version index. Portfolios bought at fallback prices are rebuilt
+    for their user's profile; the others are revalued. Each batch is written
+    with one bulk_write. Returns (checked, refreshed).
+
+    Portfolios are rebuilt for a new profile when the questionnaire is
+    submitted or re-scored (jobs/rescore_users.py), or otherwise on the next
+    read; a user with no stored portfolio gets one on first read.
+    """
+    snapshot = market_snapshot.get()
+    if snapshot.value.source == 'fallback':
+        logger.info("Market data %s is a fallback, leaving stored portfolios as they are", snapshot.version)
+        return 0, 0
+
+    checked = rebuilt = revalued = 0
+    batch = []
+
+    def flush():
+        nonlocal rebuilt, revalued
+        rebuy = [document['_id'] for document in batch if document.get('market_source') == 'fallback']
+        profiles = users.get_many(rebuy, RISK_PROFILE_FIELDS) if rebuy else {}
+        documents = {
+            document['_id']: revalue_portfolio_document(document, snapshot)
+            for document in batch if document.get('market_source') != 'fallback'
+        }
+        revalued += len(documents)
+        portfolios.save_many(documents)
+        rebuilt += rebuild_portfolios(profiles.values(), snapshot)
+        batch.clear()
+
+    for document in portfolios.iter_stale(snapshot.version, batch_size):
+        batch.append(document)
+        checked += 1
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    logger.info("Rebuilt %d and revalued %d of %d stale portfolios for market data %s",
+                rebuilt, revalued, checked, snapshot.version)
+    return checked, rebuilt + revalued
@@ -0,0 +1,123 @@
+from bson import ObjectId
+from pymongo import UpdateOne
+from flask import g, has_app_context
+
+from config import users_collection
+
+# Projections for each way the app reads a user. Routes ask for one of these
+# instead of pulling questionnaire_answers and the rest of the document.
+# ID_FIELDS only checks that the user still exists.
+ID_FIELDS = ('_id',)
+LOGIN_FIELDS = ('username', 'password', 'has_completed_questionnaire')
+RISK_PROFILE_FIELDS = ('investment_amount', 'risk_score', 'risk_category')
+PORTFOLIO_SUMMARY_FIELDS = RISK_PROFILE_FIELDS + (
+    'risk_description', 'asset_allocation', 'questionnaire_completed_at'
+)
+
+# Ids per $in query for bulk reads; keeps each query well under the 16MB command limit
+BATCH_SIZE = 500
+
+
+def _object_id(user_id):
+    return user_id if isinstance(user_id, ObjectId) else ObjectId(user_id)
+
+
+def _projection(fields):
+    return dict.fromkeys(fields, 1) if fields else None
+
+
+class UserRepository:
+    """
+    All reads and writes of the users collection.
+
+    Within a request, documents loaded by id are kept in an identity map on
+    flask.g, so the auth middleware and the handler share one round trip.
+    Outside a request (jobs, CLI tools) every call goes to Mongo.
+    """
+
+    def __init__(self, collection=None):
+        self.collection = users_collection if collection is None else collection
+
+    def _identity_map(self):
+        if not has_app_context():
+            return None
+        if 'user_identity_map' not in g:
+            g.user_identity_map = {}
+        return g.user_identity_map
+
+    def get_by_id(self, user_id, fields=None):
+        """
+        Return the user with only `fields` (plus _id), or the whole document
+        when fields is None. Returns None if the user does not exist.
+        """
+        user_id = _object_id(user_id)
+        identity_map = self._identity_map()
+        if identity_map is not None and user_id in identity_map:
+            loaded_fields, user = identity_map[user_id]
+            if loaded_fields is None or (fields is not None and set(fields) <= loaded_fields):
+                return user
+
+        user = self.collection.find_one({"_id": user_id}, _projection(fields))
+        if identity_map is not None:
+            identity_map[user_id] = (None if fields is None else set(fields), user)
+        return user
+
+    def get_risk_profile(self, user_id):
+        return self.get_by_id(user_id, RISK_PROFILE_FIELDS)
+
+    def get_portfolio_summary(self, user_id):
+        return self.get_by_id(user_id, PORTFOLIO_SUMMARY_FIELDS)
+
+    def get_by_username(self, username, fields=LOGIN_FIELDS):
+        return self.collection.find_one({"username": username}, _projection(fields))
+
+    def username_exists(self, username):
+        return self.collection.find_one({"username": username}, {"_id": 1}) is not None
+
+    def get_many(self, user_ids, fields=None, batch_size=BATCH_SIZE):
+        """Load many users with batched $in queries; returns {ObjectId: document}"""
+        ids = list(dict.fromkeys(_object_id(user_id) for user_id in user_ids))
+        users = {}
+        for start in range(0, len(ids), batch_size):
+            cursor = self.collection.find({"_id": {"$in": ids[start:start + batch_size]}}, _projection(fields))
+            for user in cursor:
+                users[user["_id"]] = user
+        return users
+
+    def iter_completed(self, fields=RISK_PROFILE_FIELDS, batch_size=BATCH_SIZE):
+        """Stream every user who has finished the questionnaire"""
+        cursor = self.collection.find({"has_completed_questionnaire": True}, _projection(fields))
+        return cursor.batch_size(batch_size)
+
+    def create(self, user):
+        """Insert a new user and return its id; raises DuplicateKeyError for a taken username"""
+        return self.collection.insert_one(user).inserted_id
+
+    def insert_many(self, users, ordered=True):
+        """Insert a batch of users and return the inserted ids; raises BulkWriteError on failures"""
+        return self.collection.insert_many(users, ordered=ordered).inserted_ids
+
+    def iter_all(self, fields=None, batch_size=BATCH_SIZE):
+        """Stream every user in _id order without loading the collection into memory"""
+        return self.collection.find({}, _projection(fields)).sort("_id", 1).batch_size(batch_size)
+
+    def bulk_update(self, updates):
+        """Apply {user_id: fields to $set} in one unordered bulk_write; returns the modified count"""
+        if not updates:
+            return 0
+        result = self.collection.bulk_write(
+            [UpdateOne({"_id": _object_id(user_id)}, {"$set": fields}) for user_id, fields in updates.items()],
+            ordered=False
+        )
+        return result.modified_count
+
+    def update_fields(self, user_id, fields):
+        user_id = _object_id(user_id)
+        result = self.collection.update_one({"_id": user_id}, {"$set": fields})
+        identity_map = self._identity_map()
+        if identity_map is not None:
+            identity_map.pop(user_id, None)
+        return result.matched_count > 0
+
+
+users = UserRepository()
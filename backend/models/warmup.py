@@ -0,0 +1,83 @@
+"""
+Work done once per process start, before serving traffic.
+
+Under gunicorn with preload_app the master runs warm_up() before forking,
+so every worker starts with the market and stock-selection snapshots and
+the allocation tables already in memory (shared copy-on-write) and the
+first requests after a deploy do not pay for building them. /health/ready
+reports 503 until warm-up has finished.
+
+Snapshots warmed here belong to the refresh window the process started in.
+When the window rolls over, each worker rebuilds them in the background
+and serves the warmed copy until the rebuild finishes (utils/snapshot.py).
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from models.market_snapshot import market_snapshot
+from models.risk_allocation import allocation_curve, risk_level_chart
+from models.stock_selection import stock_selection_snapshot
+
+logger = logging.getLogger(__name__)
+
+# (name, function); each step fills a cache the request path reads from
+WARMUP_STEPS = [
+    ('market_snapshot', market_snapshot.get),
+    ('risk_level_chart', risk_level_chart),
+    ('allocation_curve', allocation_curve),
+    ('stock_selection', stock_selection_snapshot.get),
+]
+
+
+class WarmupState:
+    def __init__(self):
+        self.ready = False
+        self.started_at = None
+        self.finished_at = None
+        self.steps = {}
+        self._lock = threading.Lock()
+
+    def as_dict(self):
+        return {
+            'ready': self.ready,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'steps': self.steps,
+        }
+
+
+warmup_state = WarmupState()
+
+
+def warm_up(steps=WARMUP_STEPS):
+    """
+    Run every warm-up step once per process; later calls return at once.
+    A failing step is logged and reported but does not block readiness:
+    its cache is built on first use instead, as it would be without warm-up.
+    """
+    with warmup_state._lock:
+        if warmup_state.ready:
+            return warmup_state
+        warmup_state.started_at = datetime.utcnow()
+        for name, step in steps:
+            start = time.perf_counter()
+            try:
+                step()
+                warmup_state.steps[name] = {'ok': True, 'seconds': round(time.perf_counter() - start, 3)}
+            except Exception as e:
+                logger.error("Warm-up step %s failed: %s", name, e, exc_info=True)
+                warmup_state.steps[name] = {'ok': False, 'error': str(e)}
+        warmup_state.finished_at = datetime.utcnow()
+        warmup_state.ready = True
+
+    total = (warmup_state.finished_at - warmup_state.started_at).total_seconds()
+    logger.info("Warm-up finished in %.1fs: %s", total,
+                ', '.join(f"{name}={'ok' if s['ok'] else 'failed'}" for name, s in warmup_state.steps.items()))
+    return warmup_state
+
+
+def warm_up_in_background():
+    """Warm up without delaying startup; for the development server"""
+    threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
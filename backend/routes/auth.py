@@ -1,16 +1,30 @@
-from flask import Blueprint, request, jsonify
-from config import users_collection, SECRET_KEY
-from utils.hash_password import hash_password, check_password
+from flask import Blueprint, request, jsonify, g
+from config import SECRET_KEY
+from models.user_repository import users, ID_FIELDS, PORTFOLIO_SUMMARY_FIELDS
+from models.user_portfolio import refresh_user_portfolio
+from models.risk_scoring import risk_profile
+from utils.auth_middleware import token_required
+from utils.hash_password import hash_password, check_password, needs_rehash, PasswordHasherBusy
 import jwt
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, date, time, timedelta
-from bson import ObjectId
+import logging
+
+logger = logging.getLogger(__name__)
 
 auth = Blueprint("auth", __name__)
 
+@auth.errorhandler(PasswordHasherBusy)
+def password_hasher_busy(e):
+    logger.warning("Rejecting request: %s", e)
+    return jsonify({"message": "Server is busy, please try again"}), 503, {"Retry-After": "1"}
+
 @auth.route("/signup", methods=["POST"])
 def signup():
     data = request.json
-    if users_collection.find_one({"username": data["username"]}):
+    # Cheap indexed check that avoids hashing for taken usernames; the unique
+    # index on username is what actually enforces uniqueness
+    if users.username_exists(data["username"]):
         return jsonify({"message": "Username already exists"}), 400
 
     hashed_pw = hash_password(data["password"])
@@ -23,8 +37,11 @@ def signup():
         "has_completed_questionnaire": False,
         "risk_category": None
     }
-    result = users_collection.insert_one(user)
-    user_id = str(result.inserted_id)
+    try:
+        user_id = str(users.create(user))
+    except DuplicateKeyError:
+        # Lost a race with a concurrent signup for the same username
+        return jsonify({"message": "Username already exists"}), 400
 
     # Generate JWT token
     token = jwt.encode({
@@ -47,16 +64,24 @@ def login():
         
     try:
         data = request.json
-        print("Login request data:", data)  # Add this for debugging
+        logger.debug("Login request for %s", data.get("username"))
 
         # Find user by username
-        user = users_collection.find_one({"username": data["username"]})
+        user = users.get_by_username(data["username"])
         
         if not user:
             return jsonify({"message": "User not found"}), 404
         
         # Verify password
         if check_password(data["password"], user["password"]):
+            # Upgrade the stored hash when the bcrypt cost has changed;
+            # if the pool is busy, try again on the next login
+            if needs_rehash(user["password"]):
+                try:
+                    users.update_fields(user["_id"], {"password": hash_password(data["password"])})
+                except PasswordHasherBusy:
+                    logger.info("Skipping password rehash for %s, hashing pool is busy", user["username"])
+
             # Generate JWT token
             token = jwt.encode({
                 'user_id': str(user['_id']),
@@ -75,29 +100,16 @@ def login():
         
         return jsonify({"message": "Invalid credentials"}), 401
 
+    except PasswordHasherBusy:
+        raise
     except Exception as e:
-        print("Login error:", str(e))  # Add this for debugging
+        logger.error("Login error: %s", e, exc_info=True)
         return jsonify({"message": "An error occurred during login"}), 500
 
 @auth.route("/submit-questionnaire", methods=["POST"])
+@token_required(user_fields=ID_FIELDS)
 def submit_questionnaire():
     try:
-        # Get token from header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({"message": "No token provided"}), 401
-        
-        token = auth_header.split(' ')[1]
-        
-        try:
-            # Decode token
-            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            user_id = payload['user_id']
-        except jwt.ExpiredSignatureError:
-            return jsonify({"message": "Token has expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"message": "Invalid token"}), 401
-
         # Get answers and investment amount from request
         data = request.json
         answers = data.get('answers', {})
@@ -109,156 +121,54 @@ def submit_questionnaire():
         if investment_amount < 50000:  # Minimum ₹50,000
             return jsonify({"message": "Minimum investment amount is ₹50,000"}), 400
 
-        # Question weights for 6 questions
-        weights = {
-            1: 1.5,  # Investment horizon (most important)
-            2: 1.5,  # Risk comfort
-            3: 1.0,  # Income stability
-            4: 1.0,  # Emergency fund
-            5: 1.0,  # Investment knowledge
-        }
-        
-        # Calculate weighted risk score (excluding investment amount question)
-        weighted_sum = 0
-        total_weights = 0
-        
-        for question_index, answer_value in answers.items():
-            if int(question_index) > 0:  # Skip investment amount question
-                question_weight = weights.get(int(question_index), 1.0)
-                weighted_sum += answer_value * question_weight
-                total_weights += question_weight
-            
-        risk_score = weighted_sum / total_weights
-        
-        # More granular risk category determination
-        risk_category = "Unknown"
-        if risk_score <= 1.8:
-            risk_category = "Very Conservative"
-            risk_description = "Focus on capital preservation with minimal risk tolerance"
-            allocation = {
-                "NIFTY50": {"max": 0.20, "min_amount": 50000},
-                "GOLD": {"max": 0.60, "min_amount": 25000},
-                "BTC": {"max": 0.05, "min_amount": 10000},
-                "ETH": {"max": 0.05, "min_amount": 10000}
-            }
-        elif risk_score <= 2.6:
-            risk_category = "Conservative"
-            risk_description = "Emphasis on stability with some growth potential"
-            allocation = {
-                "NIFTY50": {"max": 0.30, "min_amount": 50000},
-                "GOLD": {"max": 0.40, "min_amount": 25000},
-                "BTC": {"max": 0.10, "min_amount": 10000},
-                "ETH": {"max": 0.10, "min_amount": 10000}
-            }
-        elif risk_score <= 3.4:
-            risk_category = "Moderate"
-            risk_description = "Balanced approach between stability and growth"
-            allocation = {
-                "NIFTY50": {"max": 0.40, "min_amount": 50000},
-                "GOLD": {"max": 0.30, "min_amount": 25000},
-                "BTC": {"max": 0.15, "min_amount": 10000},
-                "ETH": {"max": 0.15, "min_amount": 10000}
-            }
-        elif risk_score <= 4.2:
-            risk_category = "Aggressive"
-            risk_description = "Growth-oriented with higher risk tolerance"
-            allocation = {
-                "NIFTY50": {"max": 0.50, "min_amount": 50000},
-                "GOLD": {"max": 0.20, "min_amount": 25000},
-                "BTC": {"max": 0.20, "min_amount": 10000},
-                "ETH": {"max": 0.15, "min_amount": 10000}
-            }
-        else:
-            risk_category = "Very Aggressive"
-            risk_description = "Maximum growth potential with highest risk tolerance"
-            allocation = {
-                "NIFTY50": {"max": 0.60, "min_amount": 50000},
-                "GOLD": {"max": 0.15, "min_amount": 25000},
-                "BTC": {"max": 0.20, "min_amount": 10000},
-                "ETH": {"max": 0.15, "min_amount": 10000}
-            }
-
-        # Calculate actual allocation based on investment amount
-        actual_allocation = {}
-        remaining_amount = investment_amount
-
-        # First, allocate minimum amounts
-        for asset, details in allocation.items():
-            min_amount = details["min_amount"]
-            if remaining_amount >= min_amount:
-                actual_allocation[asset] = min_amount
-                remaining_amount -= min_amount
-            else:
-                actual_allocation[asset] = 0
-
-        # Then, distribute remaining amount according to max percentages
-        if remaining_amount > 0:
-            for asset, details in allocation.items():
-                max_additional = (details["max"] * investment_amount) - actual_allocation[asset]
-                if max_additional > 0:
-                    allocated = min(remaining_amount, max_additional)
-                    actual_allocation[asset] += allocated
-                    remaining_amount -= allocated
-
-        # Convert absolute amounts to percentages
-        percentage_allocation = {
-            asset: (amount / investment_amount) * 100 
-            for asset, amount in actual_allocation.items()
-        }
+        # Weighted risk score, category and asset allocation from the scoring tables
+        try:
+            profile = risk_profile(answers, investment_amount)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
 
         # Update user in database
-        users_collection.update_one(
-            {"_id": ObjectId(user_id)},
-            {
-                "$set": {
-                    "risk_score": round(risk_score, 2),
-                    "risk_category": risk_category,
-                    "risk_description": risk_description,
-                    "has_completed_questionnaire": True,
-                    "questionnaire_answers": answers,
-                    "investment_amount": investment_amount,
-                    "asset_allocation": percentage_allocation,
-                    "questionnaire_completed_at": datetime.utcnow()
-                }
-            }
-        )
+        updated = users.update_fields(g.user_object_id, {
+            **profile,
+            "has_completed_questionnaire": True,
+            "questionnaire_answers": answers,
+            "investment_amount": investment_amount,
+            "questionnaire_completed_at": datetime.utcnow()
+        })
+        if not updated:
+            # Deleted since the token check
+            return jsonify({"message": "User not found"}), 404
+
+        # Rebuild the stored portfolio for the new profile; if this fails,
+        # get-portfolio recomputes it on the next read
+        try:
+            refresh_user_portfolio({
+                "_id": g.user_object_id,
+                "investment_amount": investment_amount,
+                "risk_score": profile["risk_score"],
+                "risk_category": profile["risk_category"]
+            })
+        except Exception as e:
+            logger.warning("Could not refresh portfolio after questionnaire: %s", e)
 
         return jsonify({
             "message": "Questionnaire submitted successfully",
-            "risk_score": round(risk_score, 2),
-            "risk_category": risk_category,
-            "risk_description": risk_description,
+            "risk_score": profile["risk_score"],
+            "risk_category": profile["risk_category"],
+            "risk_description": profile["risk_description"],
             "investment_amount": investment_amount,
-            "asset_allocation": percentage_allocation
+            "asset_allocation": profile["asset_allocation"]
         }), 200
 
     except Exception as e:
-        print("Questionnaire submission error:", str(e))
+        logger.error("Questionnaire submission error: %s", e, exc_info=True)
         return jsonify({"message": "An error occurred during questionnaire submission"}), 500
 
 @auth.route("/user-portfolio", methods=["GET"])
+@token_required(user_fields=PORTFOLIO_SUMMARY_FIELDS)
 def get_user_portfolio():
     try:
-        # Get token from header
-        auth_header = request.headers.get('Authorization')
-        if not auth_header or not auth_header.startswith('Bearer '):
-            return jsonify({"message": "No token provided"}), 401
-        
-        token = auth_header.split(' ')[1]
-        
-        try:
-            # Decode token
-            payload = jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
-            user_id = payload['user_id']
-        except jwt.ExpiredSignatureError:
-            return jsonify({"message": "Token has expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"message": "Invalid token"}), 401
-
-        # Get user data from database
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            return jsonify({"message": "User not found"}), 404
+        user = g.current_user
 
         # Return portfolio data
         portfolio_data = {
@@ -273,5 +183,5 @@ def get_user_portfolio():
         return jsonify(portfolio_data), 200
 
     except Exception as e:
-        print("Error fetching user portfolio:", str(e))
+        logger.error("Error fetching user portfolio: %s", e, exc_info=True)
         return jsonify({"message": "An error occurred while fetching portfolio data"}), 500
\ No newline at end of file
@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify
+
+from models.market_snapshot import market_snapshot
+from models.warmup import warmup_state
+
+health = Blueprint('health', __name__)
+
+
+@health.route('/live', methods=['GET'])
+def live():
+    """The process is up and answering requests"""
+    return jsonify({'status': 'ok'}), 200
+
+
+@health.route('/ready', methods=['GET'])
+def ready():
+    """
+    Ready for traffic once warm-up has built the caches the first requests
+    would otherwise build; 503 until then
+    """
+    snapshot = market_snapshot.peek()
+    body = {
+        'status': 'ready' if warmup_state.ready else 'warming',
+        'warmup': warmup_state.as_dict(),
+        'market_version': snapshot.version if snapshot is not None else None,
+    }
+    return jsonify(body), 200 if warmup_state.ready else 503
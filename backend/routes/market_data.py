@@ -3,21 +3,22 @@ import requests
 import yfinance as yf
 from datetime import datetime, timedelta
 import logging
+from utils.metrics import track_upstream
 
 market_data = Blueprint('market_data', __name__)
 
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 def get_stock_price(symbol):
     try:
         stock = yf.Ticker(symbol)
-        current_data = stock.info
+        with track_upstream('yfinance', 'info'):
+            current_data = stock.info
         if 'regularMarketPrice' in current_data:
             return current_data['regularMarketPrice']
         return None
     except Exception as e:
-        logger.error(f"Error fetching stock price for {symbol}: {str(e)}")
+        logger.error("Error fetching stock price for %s: %s", symbol, e)
         return None
 
 def get_crypto_price(symbol):
@@ -33,20 +34,22 @@ def get_crypto_price(symbol):
             }.get(crypto),
             'vs_currencies': 'inr'
         }
-        response = requests.get(url, params=params, timeout=10)
-        data = response.json()
+        with track_upstream('coingecko', 'simple_price'):
+            response = requests.get(url, params=params, timeout=10)
+            data = response.json()
         coin_id = params['ids']
         if coin_id in data:
             return data[coin_id]['inr']
         return None
     except Exception as e:
-        logger.error(f"Error fetching crypto price for {symbol}: {str(e)}")
+        logger.error("Error fetching crypto price for %s: %s", symbol, e)
         return None
 
 def get_gold_price():
     try:
         gold = yf.Ticker('GC=F')
-        current_data = gold.info
+        with track_upstream('yfinance', 'info'):
+            current_data = gold.info
         if 'regularMarketPrice' in current_data:
             # Convert from USD to INR (approximate)
             usd_price = current_data['regularMarketPrice']
@@ -54,7 +57,7 @@ def get_gold_price():
             return inr_price
         return None
     except Exception as e:
-        logger.error(f"Error fetching gold price: {str(e)}")
+        logger.error("Error fetching gold price: %s", e)
         return None
 
 def get_mutual_fund_nav(symbol):
@@ -68,7 +71,7 @@ def get_mutual_fund_nav(symbol):
 @market_data.route('/price/<symbol>')
 def get_current_price(symbol):
     try:
-        logger.info(f"Fetching price for {symbol}")
+        logger.debug("Fetching price for %s", symbol)
         price = None
 
         if symbol.endswith('.NS'):
@@ -81,14 +84,14 @@ def get_current_price(symbol):
             price = get_mutual_fund_nav(symbol)
 
         if price is not None:
-            logger.info(f"Successfully fetched price for {symbol}: {price}")
+            logger.debug("Fetched price for %s: %s", symbol, price)
             return jsonify({'current_price': price})
         else:
-            logger.warning(f"No price found for {symbol}")
+            logger.warning("No price found for %s", symbol)
             return jsonify({'error': f'Could not fetch price for {symbol}'}), 404
 
     except Exception as e:
-        logger.error(f"Error processing request for {symbol}: {str(e)}")
+        logger.error("Error processing request for %s: %s", symbol, e)
         return jsonify({'error': str(e)}), 500
 
 @market_data.route('/history/<symbol>')
@@ -98,24 +101,26 @@ def get_stock_history(symbol):
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days)
         stock = yf.Ticker(symbol)
-        hist = stock.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
+        with track_upstream('yfinance', 'history'):
+            hist = stock.history(start=start_date.strftime('%Y-%m-%d'), end=end_date.strftime('%Y-%m-%d'))
         if hist.empty:
             return jsonify({'error': 'No historical data found'}), 404
         # Format: [{date, price}]
         history = [
-            {'date': idx.strftime('%Y-%m-%d'), 'price': float(row['Close'])}
-            for idx, row in hist.iterrows()
+            {'date': day, 'price': price}
+            for day, price in zip(hist.index.strftime('%Y-%m-%d'), hist['Close'].to_numpy())
         ]
         return jsonify({'history': history})
     except Exception as e:
-        logger.error(f"Error fetching history for {symbol}: {str(e)}")
+        logger.error("Error fetching history for %s: %s", symbol, e)
         return jsonify({'error': str(e)}), 500
 
 @market_data.route('/stats/<symbol>')
 def get_stock_stats(symbol):
     try:
         stock = yf.Ticker(symbol)
-        info = stock.info
+        with track_upstream('yfinance', 'info'):
+            info = stock.info
         stats = {
             'marketCap': info.get('marketCap'),
             'peRatio': info.get('trailingPE'),
@@ -130,5 +135,5 @@ def get_stock_stats(symbol):
         }
         return jsonify(stats)
     except Exception as e:
-        logger.error(f"Error fetching stats for {symbol}: {str(e)}")
+        logger.error("Error fetching stats for %s: %s", symbol, e)
         return jsonify({'error': str(e)}), 500 
\ No newline at end of file
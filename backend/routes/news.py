@@ -1,250 +1,564 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, g, jsonify, request
 import requests
 import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from config import (
+    NEWS_API_KEY, NEWS_CACHE_SIZE, NEWS_CACHE_STALE_TTL, NEWS_CACHE_TTL, NEWS_REFRESH_LOCK_PATH,
+    NEWS_SENTIMENT_HALF_LIFE_HOURS, NEWS_TICKER_ARTICLES, NEWS_TICKER_CACHE_TTL, NEWS_TICKER_REFRESH_SECONDS
+)
+from models.asset_universe import ASSET_UNIVERSE, EXACT_CASE_ALIASES, HELD_TICKERS, TICKER_ALIASES, UNTAGGED_NAMES
+from models.news_sentiment import sentiment_scorer, ticker_sentiment
+from models.portfolio_optimizer import portfolio_optimizer
+from models.portfolio_repository import portfolios
+from models.stock_allocation import NIFTY50_TICKERS, load_universe
+from utils.auth_middleware import token_required
+from utils.cache import TTLCache, cache_key
+from utils.leader_lock import LeaderLock
+from utils.metrics import track_upstream, UPSTREAM_ERRORS_TOTAL
+from utils.news_dedup import dedupe_articles
+from utils.news_index import MAX_RESULTS, news_index
+from utils.ticker_tagger import TickerTagger
 
 
 
 
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 news = Blueprint('news', __name__)
 
-# Your NewsAPI.org API key (keep this secure in production)
-NEWS_API_KEY = ''
 NEWS_API_BASE_URL = 'https://newsapi.org/v2'
 
-@news.route('/global', methods=['GET'])
-def get_global_news():
+# Parameters for global financial news
+GLOBAL_NEWS_PARAMS = {
+    'q': 'finance OR stocks OR markets OR economy OR "stock market" OR "financial markets"',
+    'language': 'en',
+    'sortBy': 'publishedAt',
+    'pageSize': 12,  # Get 12 articles
+    'domains': 'reuters.com,bloomberg.com,marketwatch.com,cnbc.com,wsj.com,ft.com,forbes.com'
+}
+
+# Parameters for Indian financial news
+INDIAN_NEWS_PARAMS = {
+    'q': 'India AND (finance OR stocks OR markets OR economy OR "stock market" OR "financial markets" OR NSE OR BSE OR "Indian economy" OR rupee OR RBI)',
+    'language': 'en',
+    'sortBy': 'publishedAt',
+    'pageSize': 12,  # Get 12 articles
+    'domains': 'economictimes.indiatimes.com,moneycontrol.com,business-standard.com,livemint.com,reuters.com,bloomberg.com'
+}
+
+# Parameters for top business headlines
+TOP_HEADLINES_PARAMS = {
+    'category': 'business',
+    'language': 'en',
+    'pageSize': 10,
+    'country': 'us'  # Can be changed to 'in' for Indian headlines
+}
+
+# Feed sections: (label, NewsAPI endpoint, parameters)
+NEWS_SECTIONS = {
+    'global': ('global news articles', 'everything', GLOBAL_NEWS_PARAMS),
+    'indian': ('Indian news articles', 'everything', INDIAN_NEWS_PARAMS),
+    'headlines': ('top headlines', 'top-headlines', TOP_HEADLINES_PARAMS),
+}
+
+# Cleaned NewsAPI results shared by all users, keyed by endpoint and parameters
+news_cache = TTLCache('news', NEWS_CACHE_TTL, NEWS_CACHE_STALE_TTL, NEWS_CACHE_SIZE)
+
+# Latest articles per symbol; held tickers are filled from the news index the
+# background refresher writes to
+ticker_news_cache = TTLCache('ticker_news', NEWS_TICKER_CACHE_TTL, NEWS_CACHE_STALE_TTL, 512)
+
+# Indexed articles older than this are not served as a held ticker's latest news
+TICKER_NEWS_MAX_AGE = timedelta(days=7)
+
+ASSET_NAMES = {asset['ticker']: asset['name'] for assets in ASSET_UNIVERSE.values() for asset in assets}
+STOCK_TICKERS = {asset['ticker'] for asset in ASSET_UNIVERSE['Stocks']}
+SYMBOL_PATTERN = re.compile(r'^[A-Z0-9][A-Z0-9.=&^_-]{0,19}$')
+
+
+class NewsAPIError(Exception):
+    """NewsAPI answered with a non-200 status"""
+
+    def __init__(self, status_code):
+        super().__init__(f'NewsAPI error: {status_code}')
+        self.status_code = status_code
+
+
+def clean_articles(articles):
+    """Drop incomplete or removed articles and keep the fields the frontend uses"""
+    filtered_articles = []
+    for article in articles:
+        # Skip articles without essential information
+        if not article.get('title') or not article.get('url'):
+            continue
+
+        # Skip removed articles
+        if article.get('title') == '[Removed]':
+            continue
+
+        filtered_articles.append({
+            'title': article.get('title'),
+            'description': article.get('description'),
+            'url': article.get('url'),
+            'urlToImage': article.get('urlToImage'),
+            'publishedAt': article.get('publishedAt'),
+            'source': article.get('source', {}),
+            'author': article.get('author')
+        })
+    return filtered_articles
+
+
+def fetch_news(endpoint, params):
+    """Call a NewsAPI endpoint and return its cleaned, de-duplicated articles"""
+    operation = endpoint.replace('-', '_')
+    with track_upstream('newsapi', operation):
+        response = requests.get(
+            f'{NEWS_API_BASE_URL}/{endpoint}', params={'apiKey': NEWS_API_KEY, **params}, timeout=10
+        )
+
+    if response.status_code != 200:
+        UPSTREAM_ERRORS_TOTAL.labels('newsapi', operation).inc()
+        raise NewsAPIError(response.status_code)
+
+    return process_articles(response.json().get('articles', []))
+
+
+def process_articles(raw_articles):
     """
-    Fetch global financial news from NewsAPI.org
+    The pipeline every fetched article goes through: drop incomplete ones,
+    collapse wire stories syndicated across sources to their first copy,
+    tag tickers and add the result to the local index
     """
+    articles = dedupe_articles(clean_articles(raw_articles))
+    articles = ticker_tagger.tag_articles(articles)
+    index_articles(articles)
+    return articles
+
+
+def index_articles(articles):
+    """Add articles to the local search index; indexing never fails a fetch"""
     try:
-        # Parameters for global financial news
-        params = {
-            'apiKey': NEWS_API_KEY,
-            'q': 'finance OR stocks OR markets OR economy OR "stock market" OR "financial markets"',
-            'language': 'en',
-            'sortBy': 'publishedAt',
-            'pageSize': 12,  # Get 12 articles
-            'domains': 'reuters.com,bloomberg.com,marketwatch.com,cnbc.com,wsj.com,ft.com,forbes.com'
-        }
-        
-        # Make request to NewsAPI
-        response = requests.get(f'{NEWS_API_BASE_URL}/everything', params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            articles = data.get('articles', [])
-            
-            # Filter and clean articles
-            filtered_articles = []
-            for article in articles:
-                # Skip articles without essential information
-                if not article.get('title') or not article.get('url'):
-                    continue
-                    
-                # Skip removed articles
-                if article.get('title') == '[Removed]':
-                    continue
-                    
-                filtered_articles.append({
-                    'title': article.get('title'),
-                    'description': article.get('description'),
-                    'url': article.get('url'),
-                    'urlToImage': article.get('urlToImage'),
-                    'publishedAt': article.get('publishedAt'),
-                    'source': article.get('source', {}),
-                    'author': article.get('author')
-                })
-            
-            logger.info(f"Successfully fetched {len(filtered_articles)} global news articles")
-            return jsonify({
-                'success': True,
-                'articles': filtered_articles,
-                'total': len(filtered_articles)
-            }), 200
-            
-        else:
-            logger.error(f"NewsAPI returned status code: {response.status_code}")
-            return jsonify({
-                'success': False,
-                'error': f'NewsAPI error: {response.status_code}',
-                'articles': []
-            }), response.status_code
-            
-    except requests.exceptions.Timeout:
+        added = news_index.add(articles)
+    except (sqlite3.Error, OSError) as e:
+        logger.warning("Could not index %d news articles: %s", len(articles), e)
+        return
+    if added:
+        # New articles are scored for sentiment off the request thread
+        sentiment_scorer.notify()
+
+
+def get_news(endpoint, params):
+    """Cleaned articles for a NewsAPI query, from the shared cache when possible"""
+    return news_cache.get_or_load(cache_key(endpoint, **params), lambda: fetch_news(endpoint, params))
+
+
+def get_section(name):
+    _, endpoint, params = NEWS_SECTIONS[name]
+    return get_news(endpoint, params)
+
+
+def news_error(label, e):
+    """Log a failed news load and return the (message, HTTP status) to report"""
+    if isinstance(e, NewsAPIError):
+        logger.error("NewsAPI returned status code: %s", e.status_code)
+        return str(e), e.status_code
+    if isinstance(e, requests.exceptions.Timeout):
         logger.error("Request to NewsAPI timed out")
+        return 'Request timeout', 408
+    if isinstance(e, requests.exceptions.RequestException):
+        logger.error("Request error: %s", e)
+        return 'Failed to fetch news', 500
+    if isinstance(e, (sqlite3.Error, OSError)):
+        logger.error("News index error loading %s: %s", label, e)
+        return 'News index unavailable', 503
+    logger.error("Unexpected error fetching %s: %s", label, e, exc_info=e)
+    return 'Internal server error', 500
+
+
+# Failures news_error knows how to report; anything else is a bug and goes
+# to Flask's error handling with its traceback
+NEWS_ERRORS = (NewsAPIError, requests.exceptions.RequestException, sqlite3.Error, OSError)
+
+
+def news_response(label, load_articles):
+    """Serve articles from `load_articles()` in the shape every news route returns"""
+    try:
+        articles = load_articles()
+    except NEWS_ERRORS as e:
+        error, status = news_error(label, e)
         return jsonify({
             'success': False,
-            'error': 'Request timeout',
+            'error': error,
             'articles': []
-        }), 408
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request error: {e}")
+        }), status
+
+    logger.debug("Fetched %d %s", len(articles), label)
+    return jsonify({
+        'success': True,
+        'articles': articles,
+        'total': len(articles)
+    }), 200
+
+_feed_pool = None
+_feed_pool_pid = None
+_feed_pool_lock = threading.Lock()
+
+
+def feed_pool():
+    """Threads that fetch feed sections side by side; created per process, after any fork"""
+    global _feed_pool, _feed_pool_pid
+    if _feed_pool_pid != os.getpid():
+        with _feed_pool_lock:
+            if _feed_pool_pid != os.getpid():
+                _feed_pool = ThreadPoolExecutor(max_workers=2 * len(NEWS_SECTIONS), thread_name_prefix='news-feed')
+                _feed_pool_pid = os.getpid()
+    return _feed_pool
+
+
+def load_feed(names):
+    """
+    Load several sections concurrently, so the wait is the slowest section
+    rather than the sum. A story already shown in an earlier section is
+    left out of later ones. Returns {name: section payload}.
+    """
+    futures = {name: feed_pool().submit(get_section, name) for name in names}
+    sections = {}
+    seen = set()
+    for name in names:
+        try:
+            articles = futures[name].result()
+        except Exception as e:
+            error, status = news_error(NEWS_SECTIONS[name][0], e)
+            sections[name] = {'success': False, 'error': error, 'status': status, 'articles': []}
+            continue
+        articles = [article for article in articles if article.get('cluster_id') not in seen]
+        seen.update(article.get('cluster_id') for article in articles)
+        seen.discard(None)
+        sections[name] = {'success': True, 'articles': articles, 'total': len(articles)}
+    return sections
+
+
+def ticker_search_terms(symbol):
+    """Company or asset name plus the bare exchange symbol when it is a word"""
+    terms = []
+    name = ASSET_NAMES.get(symbol)
+    if name:
+        terms.append(name)
+    # Futures codes like GC=F mean nothing in article text
+    base = re.split(r'[.\-]', symbol)[0]
+    if '=' not in symbol and base.isalnum() and (not name or base.lower() != name.lower()):
+        terms.append(base)
+    return terms or [symbol]
+
+
+def _tagged_tickers():
+    """Held tickers, the optimizer's assets and the stock screening universe"""
+    try:
+        screening = load_universe()
+    except OSError as e:
+        logger.warning("Could not read stock universe for news tagging: %s", e)
+        screening = NIFTY50_TICKERS
+    optimizer_tickers = [ticker for assets in portfolio_optimizer.assets.values() for ticker in assets]
+    return list(dict.fromkeys(HELD_TICKERS + optimizer_tickers + screening))
+
+
+def build_ticker_tagger(tickers):
+    """
+    Tagger over each ticker's asset name, display name and aliases (any
+    case), and its bare exchange symbol and exact-case aliases (exact case
+    only). Names in UNTAGGED_NAMES are left out.
+    """
+    names, exact = [], []
+    for ticker in tickers:
+        base = re.split(r'[.\-]', ticker)[0]
+        symbol = base if '=' not in ticker and '_' not in base else None
+        exact_terms = {symbol, *EXACT_CASE_ALIASES.get(ticker, ())} - {None}
+        terms = {ASSET_NAMES.get(ticker), portfolio_optimizer.get_display_name(ticker), *TICKER_ALIASES.get(ticker, ())}
+        for term in terms - exact_terms - set(UNTAGGED_NAMES.get(ticker, ())) - {None, ticker}:
+            names.append((term, ticker))
+        exact += [(term, ticker) for term in exact_terms]
+    return TickerTagger(names, exact)
+
+
+ticker_tagger = build_ticker_tagger(_tagged_tickers())
+
+
+def ticker_news_query(symbol):
+    clauses = [f'"{term}"' if ' ' in term else term for term in ticker_search_terms(symbol)]
+    name = ASSET_NAMES.get(symbol)
+    if symbol in STOCK_TICKERS or (name is None and symbol.endswith(('.NS', '.BO'))):
+        name = name or clauses[0]
+        clauses += [f'"{name} stock"', f'"{name} share"']
+    return f"({' OR '.join(clauses)})"
+
+
+def fetch_ticker_news(symbol):
+    params = {
+        'q': ticker_news_query(symbol),
+        'language': 'en',
+        'sortBy': 'publishedAt',
+        'pageSize': NEWS_TICKER_ARTICLES
+    }
+    return fetch_news('everything', params)
+
+
+def load_ticker_news(symbol):
+    """
+    Articles for one symbol. Held tickers come from the index, where the
+    refresher (running in one worker only) files them; a symbol the index
+    has nothing for is fetched from NewsAPI.
+    """
+    if symbol in HELD_TICKERS and NEWS_TICKER_REFRESH_SECONDS > 0:
+        try:
+            articles = news_index.for_tickers(
+                [symbol], since=datetime.utcnow() - TICKER_NEWS_MAX_AGE, limit=NEWS_TICKER_ARTICLES
+            )
+        except (sqlite3.Error, OSError) as e:
+            logger.warning("Could not read %s news from the index: %s", symbol, e)
+            articles = []
+        if articles:
+            return articles
+    return fetch_ticker_news(symbol)
+
+
+def refresh_held_ticker_news():
+    """
+    Refresh news for every held ticker with one NewsAPI call: search for
+    any of them, then file each article under the tickers it mentions.
+    Returns the symbols that got fresh articles.
+    """
+    clauses = []
+    for symbol in HELD_TICKERS:
+        clauses += [f'"{term}"' if ' ' in term else term for term in ticker_search_terms(symbol)]
+    params = {
+        'q': ' OR '.join(clauses),
+        'language': 'en',
+        'sortBy': 'publishedAt',
+        'pageSize': 100
+    }
+    articles = fetch_news('everything', params)
+
+    by_symbol = {symbol: [] for symbol in HELD_TICKERS}
+    for article in articles:
+        for symbol in article['tickers']:
+            if symbol in by_symbol and len(by_symbol[symbol]) < NEWS_TICKER_ARTICLES:
+                by_symbol[symbol].append(article)
+
+    # Symbols with nothing in the combined results keep their cached articles
+    # and fall back to their own query when those expire
+    refreshed = [symbol for symbol, found in by_symbol.items() if found]
+    for symbol in refreshed:
+        ticker_news_cache.set(symbol, by_symbol[symbol])
+    logger.info("Refreshed news for %d of %d held tickers from %d articles",
+                len(refreshed), len(HELD_TICKERS), len(articles))
+    return refreshed
+
+
+class TickerNewsRefresher:
+    """
+    Background thread that keeps held-ticker news warm. Every worker starts
+    one, but only the holder of the leader lock calls NewsAPI, so the quota
+    spent does not grow with the number of workers.
+    """
+
+    def __init__(self, interval, lock_path=NEWS_REFRESH_LOCK_PATH):
+        self.interval = interval
+        self._leader = LeaderLock(lock_path)
+        self._lock = threading.Lock()
+        self._pid = None
+
+    def ensure_started(self):
+        if self.interval <= 0 or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name='ticker-news-refresh', daemon=True).start()
+
+    def _run(self):
+        while True:
+            try:
+                # Followers retry each interval and take over if the leader exits
+                if self._leader.acquire():
+                    refresh_held_ticker_news()
+            except Exception as e:
+                logger.warning("Held ticker news refresh failed: %s", e)
+            time.sleep(self.interval)
+
+
+ticker_news_refresher = TickerNewsRefresher(NEWS_TICKER_REFRESH_SECONDS)
+
+
+@news.before_app_request
+def _start_ticker_news_refresher():
+    # Started lazily, after any fork; the workers elect one to do the refreshing
+    ticker_news_refresher.ensure_started()
+
+@news.route('/global', methods=['GET'])
+def get_global_news():
+    """
+    Fetch global financial news from NewsAPI.org
+    """
+    return news_response(NEWS_SECTIONS['global'][0], lambda: get_section('global'))
+
+@news.route('/indian', methods=['GET'])
+def get_indian_news():
+    """
+    Fetch Indian financial news from NewsAPI.org
+    """
+    return news_response(NEWS_SECTIONS['indian'][0], lambda: get_section('indian'))
+
+@news.route('/top-headlines', methods=['GET'])
+def get_top_headlines():
+    """
+    Fetch top financial headlines
+    """
+    return news_response(NEWS_SECTIONS['headlines'][0], lambda: get_section('headlines'))
+
+@news.route('/feed', methods=['GET'])
+def get_news_feed():
+    """
+    Several news sections in one response, fetched concurrently
+
+    ?sections=global,indian,headlines picks the sections and their order
+    (default: all). A section that fails is reported with its own error while
+    the others are still returned.
+    """
+    requested = request.args.get('sections', ','.join(NEWS_SECTIONS))
+    names = list(dict.fromkeys(name.strip().lower() for name in requested.split(',') if name.strip()))
+    unknown = [name for name in names if name not in NEWS_SECTIONS]
+    if not names or unknown:
         return jsonify({
             'success': False,
-            'error': 'Failed to fetch news',
-            'articles': []
-        }), 500
-        
-    except Exception as e:
-        logger.error(f"Unexpected error in get_global_news: {e}", exc_info=True)
+            'error': f"Unknown sections: {', '.join(unknown) or repr(requested)}. "
+                     f"Choose from {', '.join(NEWS_SECTIONS)}",
+            'sections': {}
+        }), 400
+
+    sections = load_feed(names)
+    failed = [section for section in sections.values() if not section['success']]
+    if len(failed) == len(sections):
         return jsonify({
             'success': False,
-            'error': 'Internal server error',
-            'articles': []
-        }), 500
+            'error': failed[0]['error'],
+            'sections': sections
+        }), failed[0]['status']
 
-@news.route('/indian', methods=['GET'])
-def get_indian_news():
+    return jsonify({
+        'success': True,
+        'sections': sections
+    }), 200
+
+@news.route('/ticker/<symbol>', methods=['GET'])
+def get_ticker_news(symbol):
     """
-    Fetch Indian financial news from NewsAPI.org
+    Latest news for one ticker, searched by its asset name and symbol
     """
-    try:
-        # Parameters for Indian financial news
-        params = {
-            'apiKey': NEWS_API_KEY,
-            'q': 'India AND (finance OR stocks OR markets OR economy OR "stock market" OR "financial markets" OR NSE OR BSE OR "Indian economy" OR rupee OR RBI)',
-            'language': 'en',
-            'sortBy': 'publishedAt',
-            'pageSize': 12,  # Get 12 articles
-            'domains': 'economictimes.indiatimes.com,moneycontrol.com,business-standard.com,livemint.com,reuters.com,bloomberg.com'
-        }
-        
-        # Make request to NewsAPI
-        response = requests.get(f'{NEWS_API_BASE_URL}/everything', params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            articles = data.get('articles', [])
-            
-            # Filter and clean articles
-            filtered_articles = []
-            for article in articles:
-                # Skip articles without essential information
-                if not article.get('title') or not article.get('url'):
-                    continue
-                    
-                # Skip removed articles
-                if article.get('title') == '[Removed]':
-                    continue
-                    
-                filtered_articles.append({
-                    'title': article.get('title'),
-                    'description': article.get('description'),
-                    'url': article.get('url'),
-                    'urlToImage': article.get('urlToImage'),
-                    'publishedAt': article.get('publishedAt'),
-                    'source': article.get('source', {}),
-                    'author': article.get('author')
-                })
-            
-            logger.info(f"Successfully fetched {len(filtered_articles)} Indian news articles")
-            return jsonify({
-                'success': True,
-                'articles': filtered_articles,
-                'total': len(filtered_articles)
-            }), 200
-            
-        else:
-            logger.error(f"NewsAPI returned status code: {response.status_code}")
-            return jsonify({
-                'success': False,
-                'error': f'NewsAPI error: {response.status_code}',
-                'articles': []
-            }), response.status_code
-            
-    except requests.exceptions.Timeout:
-        logger.error("Request to NewsAPI timed out")
+    symbol = symbol.strip().upper()
+    if not SYMBOL_PATTERN.match(symbol):
         return jsonify({
             'success': False,
-            'error': 'Request timeout',
+            'error': 'Invalid symbol',
             'articles': []
-        }), 408
-        
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Request error: {e}")
+        }), 400
+
+    return news_response(
+        f'articles for {symbol}',
+        lambda: ticker_news_cache.get_or_load(symbol, lambda: load_ticker_news(symbol))
+    )
+
+@news.route('/search', methods=['GET'])
+def search_news():
+    """
+    Search every article fetched so far, from the local index only
+
+    Query parameters: q (required), from / to (ISO dates on publishedAt),
+    sources (comma-separated NewsAPI source ids or names), limit (max 100)
+    """
+    query = request.args.get('q', '').strip()
+    if not query:
         return jsonify({
             'success': False,
-            'error': 'Failed to fetch news',
+            'error': 'Missing search query',
             'articles': []
-        }), 500
-        
-    except Exception as e:
-        logger.error(f"Unexpected error in get_indian_news: {e}", exc_info=True)
+        }), 400
+
+    try:
+        since = request.args.get('from')
+        until = request.args.get('to')
+        since = datetime.fromisoformat(since) if since else None
+        until = datetime.fromisoformat(until) if until else None
+        if until is not None and len(request.args['to']) == 10:
+            # A bare end date includes that whole day
+            until += timedelta(days=1)
+    except ValueError:
         return jsonify({
             'success': False,
-            'error': 'Internal server error',
+            'error': 'Dates must be ISO formatted (YYYY-MM-DD)',
             'articles': []
-        }), 500
+        }), 400
 
-@news.route('/top-headlines', methods=['GET'])
-def get_top_headlines():
+    sources = [source.strip() for source in request.args.get('sources', '').split(',') if source.strip()]
+    limit = max(1, min(request.args.get('limit', default=20, type=int), MAX_RESULTS))
+
+    return news_response(
+        f'search results for {query!r}',
+        lambda: news_index.search(query, since=since, until=until, sources=sources, limit=limit)
+    )
+
+@news.route('/holdings', methods=['GET'])
+@token_required
+def get_holdings_news():
     """
-    Fetch top financial headlines
+    Latest indexed articles that mention any asset in the user's portfolio
     """
-    try:
-        # Parameters for top business headlines
-        params = {
-            'apiKey': NEWS_API_KEY,
-            'category': 'business',
-            'language': 'en',
-            'pageSize': 10,
-            'country': 'us'  # Can be changed to 'in' for Indian headlines
-        }
-        
-        # Make request to NewsAPI
-        response = requests.get(f'{NEWS_API_BASE_URL}/top-headlines', params=params, timeout=10)
-        
-        if response.status_code == 200:
-            data = response.json()
-            articles = data.get('articles', [])
-            
-            # Filter and clean articles
-            filtered_articles = []
-            for article in articles:
-                # Skip articles without essential information
-                if not article.get('title') or not article.get('url'):
-                    continue
-                    
-                # Skip removed articles
-                if article.get('title') == '[Removed]':
-                    continue
-                    
-                filtered_articles.append({
-                    'title': article.get('title'),
-                    'description': article.get('description'),
-                    'url': article.get('url'),
-                    'urlToImage': article.get('urlToImage'),
-                    'publishedAt': article.get('publishedAt'),
-                    'source': article.get('source', {}),
-                    'author': article.get('author')
-                })
-            
-            logger.info(f"Successfully fetched {len(filtered_articles)} top headlines")
-            return jsonify({
-                'success': True,
-                'articles': filtered_articles,
-                'total': len(filtered_articles)
-            }), 200
-            
-        else:
-            logger.error(f"NewsAPI returned status code: {response.status_code}")
-            return jsonify({
-                'success': False,
-                'error': f'NewsAPI error: {response.status_code}',
-                'articles': []
-            }), response.status_code
-            
-    except Exception as e:
-        logger.error(f"Unexpected error in get_top_headlines: {e}", exc_info=True)
+    tickers = portfolios.get_tickers(g.user_object_id)
+    if tickers is None:
         return jsonify({
             'success': False,
-            'error': 'Internal server error',
+            'error': 'No portfolio found. Please complete the questionnaire.',
             'articles': []
-        }), 500 
\ No newline at end of file
+        }), 404
+
+    limit = max(1, min(request.args.get('limit', default=20, type=int), MAX_RESULTS))
+    return news_response(
+        'articles for held assets',
+        lambda: news_index.for_tickers(tickers, limit=limit)
+    )
+
+@news.route('/sentiment', methods=['GET'])
+def get_news_sentiment():
+    """
+    Decay-weighted news sentiment per asset, from articles already scored
+
+    Pass ?tickers=RELIANCE.NS,BTC-INR to limit the response to those assets.
+    """
+    try:
+        sentiment = ticker_sentiment()
+    except NEWS_ERRORS as e:
+        error, status = news_error('news sentiment', e)
+        return jsonify({'success': False, 'error': error, 'assets': []}), status
+
+    wanted = [ticker.strip().upper() for ticker in request.args.get('tickers', '').split(',') if ticker.strip()]
+    tickers = wanted or sorted(sentiment)
+    assets = [
+        {
+            'ticker': ticker,
+            'name': ASSET_NAMES.get(ticker) or portfolio_optimizer.get_display_name(ticker),
+            **sentiment.get(ticker, {'score': 0.0, 'articles': 0, 'weight': 0.0}),
+        }
+        for ticker in tickers
+    ]
+    return jsonify({
+        'success': True,
+        'half_life_hours': NEWS_SENTIMENT_HALF_LIFE_HOURS,
+        'assets': assets
+    }), 200
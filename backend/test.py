@@ -1,9 +1,8 @@
 # Test script
-from pymongo import MongoClient
+from database.connection import get_database
 
 # Connect to MongoDB
-client = MongoClient('mongodb://localhost:27017/')
-db = client['financial_advisory']  # Corrected database name
+db = get_database()
 
 # Test connection
 try:
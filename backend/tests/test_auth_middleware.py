@@ -0,0 +1,63 @@
+import time
+
+import jwt
+import mongomock
+import pytest
+from bson import ObjectId
+from flask import Flask
+
+from config import SECRET_KEY
+from models.user_repository import UserRepository
+from routes import auth as auth_routes
+from routes import portfolio as portfolio_routes
+from utils import auth_middleware
+from utils.auth_middleware import VerifiedTokenCache
+
+
+def test_cache_drops_expired_claims():
+    cache = VerifiedTokenCache(maxsize=10)
+    cache.put('live', {'user_id': 'a', 'exp': time.time() + 60})
+    cache.put('expired', {'user_id': 'b', 'exp': time.time() - 1})
+    assert cache.get('live')['user_id'] == 'a'
+    assert cache.get('expired') is None
+    assert 'expired' not in cache._entries
+
+
+def test_cache_evicts_the_least_recently_used_token():
+    cache = VerifiedTokenCache(maxsize=2)
+    exp = time.time() + 60
+    cache.put('a', {'exp': exp})
+    cache.put('b', {'exp': exp})
+    cache.get('a')
+    cache.put('c', {'exp': exp})
+    assert list(cache._entries) == ['a', 'c']
+    assert cache.get('b') is None
+
+
+@pytest.fixture
+def client(monkeypatch):
+    repository = UserRepository(mongomock.MongoClient().db.users)
+    for module in (auth_middleware, auth_routes):
+        monkeypatch.setattr(module, 'users', repository)
+    app = Flask(__name__)
+    app.register_blueprint(auth_routes.auth, url_prefix='/auth')
+    app.register_blueprint(portfolio_routes.portfolio, url_prefix='/portfolio')
+    return app.test_client()
+
+
+def bearer(user_id):
+    token = jwt.encode({'user_id': str(user_id), 'exp': int(time.time()) + 60}, SECRET_KEY, algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+def test_deleted_users_cannot_submit_the_questionnaire(client, monkeypatch):
+    refreshed = []
+    monkeypatch.setattr(auth_routes, 'refresh_user_portfolio', refreshed.append)
+    response = client.post('/auth/submit-questionnaire', headers=bearer(ObjectId()),
+                           json={'answers': {'q1': 'a'}, 'investmentAmount': 100000})
+    assert response.status_code == 404
+    assert refreshed == []
+
+
+def test_deleted_users_have_no_history(client):
+    assert client.get('/portfolio/history', headers=bearer(ObjectId())).status_code == 404
@@ -0,0 +1,132 @@
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+import utils.cache as cache_module
+from utils.cache import TTLCache, cache_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    # Only the cache module's clock; threading keeps the real one
+    monkeypatch.setattr(cache_module, 'time', SimpleNamespace(monotonic=clock))
+    return clock
+
+
+def counting_loader(values):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return values[len(calls) - 1]
+    return load, calls
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.perf_counter() + timeout
+    while not condition():
+        assert time.perf_counter() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_fresh_entries_are_served_without_loading(clock):
+    cache = TTLCache('test', ttl=10, stale_ttl=60)
+    load, calls = counting_loader(['a', 'b'])
+    assert cache.get_or_load('k', load) == 'a'
+    clock.now += 9
+    assert cache.get_or_load('k', load) == 'a'
+    assert len(calls) == 1
+
+
+def test_stale_entries_are_served_while_one_refresh_runs(clock):
+    cache = TTLCache('test', ttl=10, stale_ttl=60)
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        if len(calls) > 1:
+            release.wait(2)
+        return len(calls)
+
+    assert cache.get_or_load('k', load) == 1
+    clock.now += 30
+    # Every stale read returns at once with the old value; one refresh starts
+    assert [cache.get_or_load('k', load) for _ in range(5)] == [1] * 5
+    release.set()
+    wait_for(lambda: cache.peek('k') == 2)
+    assert len(calls) == 2
+    assert cache.get_or_load('k', load) == 2
+
+
+def test_failed_refresh_keeps_the_stale_value(clock):
+    cache = TTLCache('test', ttl=10, stale_ttl=60)
+    cache.set('k', 'old')
+    clock.now += 30
+
+    def fail():
+        raise RuntimeError("upstream down")
+
+    assert cache.get_or_load('k', fail) == 'old'
+    wait_for(lambda: not cache._refreshing)
+    assert cache.peek('k') == 'old'
+
+
+def test_entries_past_the_stale_window_are_reloaded(clock):
+    cache = TTLCache('test', ttl=10, stale_ttl=60)
+    load, calls = counting_loader(['a', 'b'])
+    cache.get_or_load('k', load)
+    clock.now += 71
+    assert cache.get_or_load('k', load) == 'b'
+    assert len(calls) == 2
+
+
+def test_concurrent_misses_share_one_load(clock):
+    cache = TTLCache('test', ttl=10)
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        started.set()
+        release.wait(2)
+        return 'value'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('k', load))) for _ in range(4)]
+    threads[0].start()
+    started.wait(2)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(2)
+    assert results == ['value'] * 4
+    assert len(calls) == 1
+
+
+def test_least_recently_used_entries_are_evicted(clock):
+    cache = TTLCache('test', ttl=10, maxsize=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get_or_load('a', lambda: None)
+    cache.set('c', 3)
+    assert cache.peek('b') is None
+    assert cache.peek('a') == 1 and cache.peek('c') == 3
+
+
+def test_cache_key_ignores_order_case_and_none():
+    assert cache_key('everything', q=' Markets ', page=None, lang='en') == cache_key('everything', lang='en', q='markets')
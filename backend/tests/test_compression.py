@@ -0,0 +1,50 @@
+import gzip
+
+import pytest
+from flask import Flask, jsonify, request
+
+from utils.compression import init_compression
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    init_compression(app)
+
+    @app.route('/big')
+    def big():
+        response = jsonify({'values': list(range(2000))})
+        response.set_etag('v1')
+        return response.make_conditional(request)
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    return app.test_client()
+
+
+def test_compressed_responses_carry_a_weak_etag(client):
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == 'W/"v1"'
+    assert gzip.decompress(response.data).startswith(b'{"values":[0,1,2')
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_uncompressed_responses_keep_the_strong_etag(client):
+    response = client.get('/big', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.headers['ETag'] == '"v1"'
+
+
+def test_small_payloads_are_not_compressed(client):
+    response = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == {'ok': True}
+
+
+def test_not_modified_is_left_alone(client):
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"v1"'})
+    assert response.status_code == 304
+    assert 'Content-Encoding' not in response.headers
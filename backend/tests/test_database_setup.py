@@ -0,0 +1,75 @@
+import mongomock
+import pytest
+from pymongo.errors import CollectionInvalid
+
+from database.database_setup import MIGRATIONS, MIGRATIONS_COLLECTION, VALIDATION_LEVEL, USERS_VALIDATOR, setup_database_schema
+
+
+class RecordingDatabase:
+    """
+    mongomock database that accepts the collection options mongomock does not
+    support (validators, time series) and records them and collMod commands
+    """
+
+    def __init__(self):
+        self._db = mongomock.MongoClient().financial_advisory
+        self.created = {}
+        self.modified = {}
+
+    def create_collection(self, name, **options):
+        if name in self._db.list_collection_names():
+            raise CollectionInvalid(f'collection {name} already exists')
+        self._db.create_collection(name)
+        self.created[name] = options
+
+    def command(self, name, collection, **options):
+        assert name == 'collMod'
+        self.modified[collection] = options
+
+    def __getitem__(self, name):
+        return self._db[name]
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+@pytest.fixture
+def db():
+    return RecordingDatabase()
+
+
+def test_applies_every_migration_once(db):
+    assert setup_database_schema(db) == [version for version, _, _ in MIGRATIONS]
+    assert setup_database_schema(db) == []
+    recorded = list(db[MIGRATIONS_COLLECTION].find())
+    assert [doc['_id'] for doc in recorded] == [version for version, _, _ in MIGRATIONS]
+    assert all(doc['applied_at'] for doc in recorded)
+
+
+def test_creates_collections_and_indexes(db):
+    setup_database_schema(db)
+    assert db.created['users'] == {'validator': USERS_VALIDATOR, 'validationLevel': VALIDATION_LEVEL}
+    assert db.created['portfolio_history']['timeseries']['timeField'] == 'ts'
+    assert db.users.index_information()['username_unique']['unique']
+    assert 'market_version' in db.portfolios.index_information()
+    assert 'user_ts' in db.portfolio_history.index_information()
+
+
+def test_existing_users_collection_gets_the_same_validation_level(db):
+    db.users.insert_one({'username': 'asha', 'password': 'x'})
+    setup_database_schema(db)
+    assert 'users' not in db.created
+    assert db.modified['users'] == {'validator': USERS_VALIDATOR, 'validationLevel': VALIDATION_LEVEL}
+
+
+def test_only_pending_migrations_run(db):
+    db[MIGRATIONS_COLLECTION].insert_one({'_id': 1})
+    assert setup_database_schema(db) == [2, 3]
+    assert 'users' not in db.created
+
+
+def test_duplicate_usernames_stop_the_migration(db):
+    db.users.insert_many([{'username': 'asha'}, {'username': 'asha'}])
+    with pytest.raises(RuntimeError, match='asha'):
+        setup_database_schema(db)
+    assert db[MIGRATIONS_COLLECTION].count_documents({}) == 0
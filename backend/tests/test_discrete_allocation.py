@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from models.discrete_allocation import allocate_lots, allocate_lots_batch, milp
+
+
+def deviation(quantities, prices, targets):
+    return np.abs(np.asarray(quantities) * prices - targets).sum()
+
+
+def random_problems(count, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        n = int(rng.integers(2, 10))
+        prices = rng.uniform(100, 5000, n).round(2)
+        budget = float(rng.uniform(5000, 100000))
+        weights = rng.dirichlet(np.ones(n))
+        yield budget * weights, prices, budget
+
+
+def test_greedy_buys_whole_shares_within_budget():
+    for targets, prices, budget in random_problems(50):
+        quantities, cash = allocate_lots(targets, prices, budget)
+        assert quantities.dtype.kind == 'i'
+        assert (quantities >= 0).all()
+        assert cash >= -1e-6
+        assert quantities @ prices + cash == pytest.approx(budget)
+
+
+def test_greedy_is_no_worse_than_rounding_down():
+    for targets, prices, budget in random_problems(50, seed=1):
+        quantities, _ = allocate_lots(targets, prices, budget)
+        floor = np.floor(targets / prices)
+        assert deviation(quantities, prices, targets) <= deviation(floor, prices, targets) + 1e-6
+
+
+def test_batch_matches_one_portfolio_at_a_time():
+    problems = list(random_problems(20, seed=2))
+    n = 4
+    prices = problems[0][1][:1].repeat(n) * np.arange(1, n + 1)
+    targets = np.array([np.resize(t, n) for t, _, _ in problems])
+    budgets = targets.sum(axis=1)
+    quantities, cash = allocate_lots_batch(targets, prices, budgets)
+    for row in range(len(targets)):
+        single, single_cash = allocate_lots(targets[row], prices, budgets[row])
+        np.testing.assert_array_equal(quantities[row], single)
+        assert cash[row] == pytest.approx(single_cash)
+
+
+def test_lot_sizes_are_respected():
+    quantities, cash = allocate_lots([10000, 10000], [150, 90], 20000, lot_sizes=[25, 10])
+    assert (quantities % [25, 10] == 0).all()
+    assert quantities @ [150, 90] <= 20000
+
+
+def test_budget_below_targets_sells_back_to_fit():
+    quantities, cash = allocate_lots([1000, 1000], [100, 100], 1500)
+    assert quantities @ [100, 100] <= 1500
+    assert cash >= 0
+
+
+@pytest.mark.skipif(milp is None, reason="scipy.optimize.milp needs scipy >= 1.9")
+def test_exact_is_never_worse_than_greedy():
+    for targets, prices, budget in random_problems(30, seed=3):
+        greedy, _ = allocate_lots(targets, prices, budget, method='greedy')
+        exact, cash = allocate_lots(targets, prices, budget, method='exact')
+        assert cash >= -1e-6
+        assert deviation(exact, prices, targets) <= deviation(greedy, prices, targets) + 1e-6
+
+
+@pytest.mark.skipif(milp is None, reason="scipy.optimize.milp needs scipy >= 1.9")
+def test_exact_beats_greedy_when_greedy_misallocates():
+    # Greedy buys the share whose extra lot helps most on its own (62), which
+    # leaves too little cash for the 163 share that the integer program
+    # picks instead for a smaller total deviation
+    targets = np.array([119.04, 75.26, 0.70])
+    prices = np.array([163.0, 62.0, 30.0])
+    greedy, _ = allocate_lots(targets, prices, 195)
+    exact, _ = allocate_lots(targets, prices, 195, method='exact')
+    np.testing.assert_array_equal(greedy, [0, 1, 0])
+    np.testing.assert_array_equal(exact, [1, 0, 0])
+    assert deviation(exact, prices, targets) < deviation(greedy, prices, targets)
@@ -0,0 +1,39 @@
+import pytest
+
+import utils.hash_password as hash_password
+from config import BCRYPT_MIN_ROUNDS
+
+
+@pytest.fixture
+def rounds(monkeypatch):
+    monkeypatch.setattr(hash_password, '_log_rounds', 12)
+    return 12
+
+
+def test_weaker_hashes_need_rehash(rounds):
+    weak = hash_password.bcrypt.generate_password_hash('secret', 4).decode('utf-8')
+    assert hash_password.needs_rehash(weak)
+
+
+def test_current_and_stronger_hashes_are_kept(rounds):
+    assert not hash_password.needs_rehash('$2b$12$' + 'a' * 53)
+    assert not hash_password.needs_rehash('$2b$14$' + 'a' * 53)
+
+
+@pytest.mark.parametrize('hashed', [None, '', 'plaintext', '$2b$xx$abc'])
+def test_malformed_hashes_need_rehash(rounds, hashed):
+    assert hash_password.needs_rehash(hashed)
+
+
+def test_calibration_never_goes_below_the_minimum(monkeypatch):
+    monkeypatch.setattr(hash_password, 'BCRYPT_LOG_ROUNDS', 0)
+    monkeypatch.setattr(hash_password, '_log_rounds', hash_password._log_rounds)
+    assert BCRYPT_MIN_ROUNDS >= 12
+    assert hash_password.calibrate_rounds(target_ms=0) == BCRYPT_MIN_ROUNDS
+
+
+def test_pinned_rounds_skip_calibration(monkeypatch):
+    monkeypatch.setattr(hash_password, 'BCRYPT_LOG_ROUNDS', 13)
+    monkeypatch.setattr(hash_password, '_log_rounds', hash_password._log_rounds)
+    assert hash_password.calibrate_rounds() == 13
+    assert hash_password.needs_rehash('$2b$12$' + 'a' * 53)
@@ -0,0 +1,53 @@
+import pytest
+from flask import Flask
+
+from models import warmup
+from routes import health as health_routes
+
+
+@pytest.fixture
+def state(monkeypatch):
+    state = warmup.WarmupState()
+    monkeypatch.setattr(warmup, 'warmup_state', state)
+    monkeypatch.setattr(health_routes, 'warmup_state', state)
+    monkeypatch.setattr(health_routes.market_snapshot, 'peek', lambda: None)
+    return state
+
+
+@pytest.fixture
+def client(state):
+    app = Flask(__name__)
+    app.register_blueprint(health_routes.health, url_prefix='/health')
+    return app.test_client()
+
+
+def test_not_ready_until_warm_up_finishes(client):
+    response = client.get('/health/ready')
+    assert response.status_code == 503
+    assert response.get_json()['status'] == 'warming'
+    assert client.get('/health/live').status_code == 200
+
+
+def test_ready_after_warm_up_even_when_a_step_fails(client):
+    calls = []
+
+    def broken():
+        raise RuntimeError('yfinance is down')
+
+    warmup.warm_up([('market_snapshot', lambda: calls.append('market')), ('stock_selection', broken)])
+    response = client.get('/health/ready')
+    body = response.get_json()
+    assert response.status_code == 200
+    assert body['status'] == 'ready'
+    assert body['warmup']['steps']['market_snapshot']['ok'] is True
+    assert body['warmup']['steps']['stock_selection'] == {'ok': False, 'error': 'yfinance is down'}
+
+    # Later calls do not run the steps again
+    warmup.warm_up([('market_snapshot', lambda: calls.append('again'))])
+    assert calls == ['market']
+
+
+def test_default_steps_include_stock_selection():
+    assert [name for name, _ in warmup.WARMUP_STEPS] == [
+        'market_snapshot', 'risk_level_chart', 'allocation_curve', 'stock_selection'
+    ]
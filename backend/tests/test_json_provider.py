@@ -0,0 +1,40 @@
+import json
+from datetime import datetime
+
+import numpy as np
+import pytest
+from bson import ObjectId
+from flask import Flask
+
+from utils import json_provider
+from utils.json_provider import FastJSONProvider
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def provider(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(json_provider, 'orjson', None)
+    elif json_provider.orjson is None:
+        pytest.skip('orjson is not installed')
+    return FastJSONProvider(Flask(__name__))
+
+
+def test_non_finite_floats_become_null(provider):
+    payload = {
+        'nan': float('nan'), 'inf': float('inf'), 'ok': 1.5,
+        'nested': [{'ninf': -float('inf')}, (np.float64('nan'), 2.0)],
+        'array': np.array([1.0, np.nan]),
+    }
+    assert json.loads(provider.dumps(payload)) == {
+        'nan': None, 'inf': None, 'ok': 1.5,
+        'nested': [{'ninf': None}, [None, 2.0]],
+        'array': [1.0, None],
+    }
+
+
+def test_model_types_serialize(provider):
+    oid = ObjectId()
+    payload = {'id': oid, 'at': datetime(2026, 1, 2, 3, 4), 'n': np.int64(3), 'tags': {'a'}}
+    assert json.loads(provider.dumps(payload)) == {
+        'id': str(oid), 'at': '2026-01-02T03:04:00', 'n': 3, 'tags': ['a'],
+    }
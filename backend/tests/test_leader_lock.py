@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from utils import leader_lock
+from utils.leader_lock import LeaderLock
+
+pytestmark = pytest.mark.skipif(leader_lock.fcntl is None, reason='flock is not available')
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def acquire_in_child(path):
+    code = f'from utils.leader_lock import LeaderLock; print(LeaderLock({path!r}).acquire())'
+    return subprocess.run([sys.executable, '-c', code], cwd=BACKEND, capture_output=True, text=True,
+                          check=True).stdout.strip()
+
+
+def test_only_one_holder_at_a_time(tmp_path):
+    path = str(tmp_path / 'locks' / 'news.lock')
+    leader, follower = LeaderLock(path), LeaderLock(path)
+    assert leader.acquire()
+    assert leader.acquire()
+    assert not follower.acquire()
+    assert acquire_in_child(path) == 'False'
+
+
+def test_lock_passes_on_when_the_holder_goes(tmp_path):
+    path = str(tmp_path / 'news.lock')
+    leader, follower = LeaderLock(path), LeaderLock(path)
+    assert leader.acquire()
+    leader._file.close()  # what the kernel does when the holder exits
+    assert follower.acquire()
+
+
+def test_a_process_that_exited_does_not_keep_the_lock(tmp_path):
+    path = str(tmp_path / 'news.lock')
+    assert acquire_in_child(path) == 'True'
+    assert LeaderLock(path).acquire()
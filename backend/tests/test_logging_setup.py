@@ -0,0 +1,54 @@
+import json
+import logging
+
+import pytest
+
+from utils import logging_setup
+from utils.logging_setup import AsyncQueueHandler, JSONFormatter, SamplingFilter, _parse_levels
+
+
+def record(name, level=logging.DEBUG, msg='event %s', args=(1,), **extra):
+    entry = logging.LogRecord(name, level, __file__, 1, msg, args, None)
+    entry.__dict__.update(extra)
+    return entry
+
+
+def test_sampling_keeps_a_fraction_of_debug_records(monkeypatch):
+    sampler = SamplingFilter(0.25, ['routes.portfolio'])
+    draws = iter([0.1, 0.5, 0.2, 0.9])
+    monkeypatch.setattr(logging_setup.random, 'random', lambda: next(draws))
+    assert [sampler.filter(record('routes.portfolio')) for _ in range(4)] == [True, False, True, False]
+
+
+@pytest.mark.parametrize('entry', [
+    record('routes.portfolio', logging.INFO),
+    record('routes.portfolio', logging.WARNING),
+    record('models.market_snapshot'),
+])
+def test_sampling_never_drops_other_levels_or_loggers(entry):
+    assert SamplingFilter(0.0, ['routes.portfolio']).filter(entry)
+
+
+def test_sampling_is_off_at_full_rate():
+    assert SamplingFilter(1.0, ['routes.portfolio']).filter(record('routes.portfolio'))
+
+
+def test_queued_records_are_rendered_in_the_calling_thread():
+    values = ['before']
+    prepared = AsyncQueueHandler(None).prepare(record('x', msg='value %s', args=(values,)))
+    values.append('after')
+    assert prepared.getMessage() == "value ['before']"
+    assert prepared.args is None
+
+
+def test_json_lines_include_extra_fields():
+    line = json.loads(JSONFormatter().format(record('x', logging.INFO, user_id='u1')))
+    assert line['message'] == 'event 1'
+    assert line['level'] == 'INFO'
+    assert line['user_id'] == 'u1'
+
+
+def test_parse_levels():
+    assert _parse_levels(' routes.portfolio=debug, pymongo=WARNING,,') == {
+        'routes.portfolio': 'DEBUG', 'pymongo': 'WARNING'
+    }
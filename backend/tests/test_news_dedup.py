@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from utils.news_dedup import BANDS, SimHashIndex, article_fingerprint, dedupe_articles, simhash
+
+STORY = {
+    'title': 'RBI keeps repo rate unchanged at 6.5% for eighth straight meeting - Reuters',
+    'description': 'The Reserve Bank of India held its key lending rate steady on Friday, '
+                   'as expected, and kept its stance focused on withdrawing accommodation.',
+    'source': {'name': 'Reuters'},
+    'url': 'https://example.com/reuters',
+}
+
+
+def syndicated(source, url, **changes):
+    return {**STORY, 'title': STORY['title'].replace(' - Reuters', f' - {source}'),
+            'source': {'name': source}, 'url': url, **changes}
+
+
+def test_syndicated_copies_collapse_to_the_first():
+    copies = [STORY, syndicated('Mint', 'https://example.com/mint'), syndicated('ET', 'https://example.com/et')]
+    kept = dedupe_articles(copies, SimHashIndex())
+    assert [article['url'] for article in kept] == ['https://example.com/reuters']
+
+
+def test_light_rewrites_are_duplicates():
+    rewrite = syndicated(
+        'Mint', 'https://example.com/mint',
+        description='The Reserve Bank of India held its key lending rate steady on Friday, '
+                    'as widely expected, and kept its stance focused on withdrawing accommodation.',
+    )
+    assert len(dedupe_articles([STORY, rewrite], SimHashIndex())) == 1
+
+
+def test_different_stories_are_kept():
+    other = {
+        'title': 'Infosys shares jump after quarterly profit beats estimates',
+        'description': 'The IT services company raised its revenue guidance for the year.',
+        'source': {'name': 'Reuters'},
+        'url': 'https://example.com/infosys',
+    }
+    kept = dedupe_articles([STORY, other], SimHashIndex())
+    assert len(kept) == 2
+    assert kept[0]['cluster_id'] != kept[1]['cluster_id']
+
+
+def test_cluster_ids_are_stable_across_calls():
+    index = SimHashIndex()
+    (first,) = dedupe_articles([STORY], index)
+    (later,) = dedupe_articles([syndicated('Mint', 'https://example.com/mint')], index)
+    assert later['cluster_id'] == first['cluster_id']
+
+
+def test_text_without_words_has_no_fingerprint():
+    assert simhash('') is None
+    assert simhash('the and of') is None
+    assert article_fingerprint({'title': None}) is None
+
+
+def test_articles_without_words_are_kept_unclustered():
+    empty = [
+        {'title': '', 'description': None, 'url': 'https://example.com/1'},
+        {'title': 'The', 'description': 'a', 'url': 'https://example.com/2'},
+    ]
+    kept = dedupe_articles(empty + [STORY], SimHashIndex())
+    assert [article['url'] for article in kept] == ['https://example.com/1', 'https://example.com/2', STORY['url']]
+    assert [article['cluster_id'] for article in kept[:2]] == [None, None]
+
+
+def flip(fingerprint, bits):
+    for bit in bits:
+        fingerprint ^= 1 << bit
+    return fingerprint
+
+
+def test_banded_lookup_finds_every_fingerprint_within_the_distance():
+    rng = random.Random(0)
+    index = SimHashIndex(max_distance=BANDS - 2, window=10000)
+    for _ in range(500):
+        base = rng.getrandbits(64)
+        cluster_id = index.cluster(base)
+        near = flip(base, rng.sample(range(64), index.max_distance))
+        assert index.cluster(near) == cluster_id
+
+
+def test_fingerprints_beyond_the_distance_are_new_stories():
+    index = SimHashIndex(max_distance=3)
+    base = 0x0123456789ABCDEF
+    cluster_id = index.cluster(base)
+    assert index.cluster(flip(base, range(0, 64, 16))) != cluster_id
+
+
+def test_window_forgets_old_stories():
+    index = SimHashIndex(max_distance=0, window=2)
+    first = index.cluster(1)
+    index.cluster(2)
+    assert index.cluster(1) == first
+    index.cluster(3)
+    index.cluster(4)
+    assert index.cluster(1) == first  # re-registered as a new story with the same id
+    assert len(index._order) == 2
+
+
+def test_max_distance_must_fit_the_bands():
+    with pytest.raises(ValueError):
+        SimHashIndex(max_distance=BANDS)
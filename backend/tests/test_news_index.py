@@ -0,0 +1,87 @@
+import sqlite3
+
+import pytest
+
+from utils.news_index import NewsIndex, SCHEMA, fts_query
+
+
+def article(url, title, published, source='Reuters', tickers=(), description=None):
+    return {
+        'url': url, 'title': title, 'description': description, 'publishedAt': published,
+        'source': {'id': source.lower(), 'name': source}, 'tickers': list(tickers),
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = NewsIndex(str(tmp_path / 'news.db'))
+    index.add([
+        article('u1', 'Infosys profit beats estimates', '2026-10-01T09:00:00Z', tickers=['INFY.NS']),
+        article('u2', 'TCS and Infosys lead IT rally', '2026-10-05T09:00:00Z', 'Mint', ['TCS.NS', 'INFY.NS']),
+        article('u3', 'Gold prices climb', '2026-10-10T09:00:00Z', 'Bloomberg', ['GC=F'],
+                description='Bullion rises as the dollar eases'),
+    ])
+    return index
+
+
+def urls(articles):
+    return [a['url'] for a in articles]
+
+
+def test_fts_query_quotes_words_and_prefixes_the_last():
+    assert fts_query('infosys prof') == '"infosys" "prof"*'
+    assert fts_query('"AND" OR (NEAR') == '"AND" "OR" "NEAR"*'
+    assert fts_query(' -- ') is None
+
+
+def test_search_matches_every_word_with_a_prefix(index):
+    assert set(urls(index.search('infosys'))) == {'u1', 'u2'}
+    assert urls(index.search('infosys prof')) == ['u1']
+    assert urls(index.search('bullion')) == ['u3']
+    assert index.search('') == []
+
+
+def test_search_filters_by_date_and_source(index):
+    assert urls(index.search('infosys', since='2026-10-02')) == ['u2']
+    assert urls(index.search('infosys', until='2026-10-02')) == ['u1']
+    assert urls(index.search('infosys', sources=['mint'])) == ['u2']
+    assert urls(index.search('infosys', sources=['REUTERS'])) == ['u1']
+
+
+def test_for_tickers_returns_newest_first(index):
+    assert urls(index.for_tickers(['INFY.NS', 'GC=F'])) == ['u3', 'u2', 'u1']
+    assert urls(index.for_tickers(['INFY.NS'], since='2026-10-02')) == ['u2']
+
+
+def test_stored_articles_keep_their_tags(index):
+    assert index.add([article('u1', 'Infosys profit beats estimates', '2026-10-01T09:00:00Z',
+                              tickers=['INFY.NS', 'TCS.NS'])]) == 0
+    assert urls(index.for_tickers(['TCS.NS'])) == ['u2']
+
+
+def test_prune_removes_old_articles_and_their_tags(index):
+    conn = index._connection()
+    with conn:
+        conn.execute("UPDATE articles SET indexed_at = '2000-01-01T00:00:00+00:00' WHERE url IN ('u1', 'u2')")
+    assert index.prune(days=30) == 2
+    assert urls(index.search('infosys')) == []
+    assert conn.execute('SELECT count(*) FROM article_tickers').fetchone()[0] == 1
+    assert index.count() == 1
+
+
+def test_old_delete_trigger_is_replaced(tmp_path):
+    path = str(tmp_path / 'old.db')
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA.replace(
+        'DELETE FROM article_tickers WHERE article_id = old.id;',
+        'DELETE FROM article_tickers WHERE ticker IN (SELECT value FROM json_each(old.tickers)) '
+        'AND article_id = old.id;'
+    ))
+    conn.execute("INSERT INTO articles (url, title, tickers, indexed_at) VALUES ('u', 't', '[]', '2000-01-01')")
+    conn.execute("INSERT INTO article_tickers VALUES ('INFY.NS', 1)")
+    conn.commit()
+    conn.close()
+
+    index = NewsIndex(path)
+    assert index.prune(days=30) == 1
+    assert index._connection().execute('SELECT count(*) FROM article_tickers').fetchone()[0] == 0
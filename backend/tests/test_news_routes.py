@@ -0,0 +1,84 @@
+import sqlite3
+
+import pytest
+import requests
+from flask import Flask
+
+from routes import news as news_routes
+
+
+@pytest.fixture
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(news_routes.news, url_prefix='/api/news')
+    return app.test_client()
+
+
+def test_sentiment_reports_an_unreadable_index_as_unavailable(client, monkeypatch):
+    def broken():
+        raise sqlite3.OperationalError('database is locked')
+    monkeypatch.setattr(news_routes, 'ticker_sentiment', broken)
+    response = client.get('/api/news/sentiment')
+    assert response.status_code == 503
+    assert response.get_json() == {'success': False, 'error': 'News index unavailable', 'assets': []}
+
+
+def test_sentiment_fills_in_assets_without_articles(client, monkeypatch):
+    monkeypatch.setattr(news_routes, 'ticker_sentiment',
+                        lambda: {'INFY.NS': {'score': 0.4, 'articles': 3, 'weight': 2.5}})
+    assets = client.get('/api/news/sentiment?tickers=infy.ns,TCS.NS').get_json()['assets']
+    assert [(a['ticker'], a['score'], a['articles']) for a in assets] == [('INFY.NS', 0.4, 3), ('TCS.NS', 0.0, 0)]
+
+
+def sections(client, query=''):
+    response = client.get(f'/api/news/feed{query}')
+    return response.status_code, response.get_json()
+
+
+def feed_of(monkeypatch, outcomes):
+    """Make get_section return or raise the outcome given for each section"""
+    def get_section(name):
+        outcome = outcomes[name]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    monkeypatch.setattr(news_routes, 'get_section', get_section)
+
+
+@pytest.mark.parametrize('error, message, status', [
+    (news_routes.NewsAPIError(429), 'NewsAPI error: 429', 429),
+    (requests.exceptions.Timeout(), 'Request timeout', 408),
+    (requests.exceptions.ConnectionError('refused'), 'Failed to fetch news', 500),
+    (sqlite3.OperationalError('disk I/O error'), 'News index unavailable', 503),
+    (ValueError('bug'), 'Internal server error', 500),
+])
+def test_feed_maps_each_section_failure(client, monkeypatch, error, message, status):
+    story = {'title': 'RBI holds rates', 'cluster_id': 'c1'}
+    feed_of(monkeypatch, {'global': error, 'indian': [story], 'headlines': []})
+    code, body = sections(client)
+    assert code == 200
+    assert body['sections']['global'] == {'success': False, 'error': message, 'status': status, 'articles': []}
+    assert body['sections']['indian']['articles'] == [story]
+
+
+def test_feed_fails_with_the_first_error_when_every_section_fails(client, monkeypatch):
+    feed_of(monkeypatch, {'global': news_routes.NewsAPIError(401), 'indian': requests.exceptions.Timeout()})
+    code, body = sections(client, '?sections=global,indian')
+    assert code == 401
+    assert body['success'] is False
+    assert body['error'] == 'NewsAPI error: 401'
+
+
+def test_feed_shows_each_story_once(client, monkeypatch):
+    story = {'title': 'RBI holds rates', 'cluster_id': 'c1'}
+    unclustered = {'title': '', 'cluster_id': None}
+    feed_of(monkeypatch, {'global': [story, unclustered], 'headlines': [story, unclustered]})
+    _, body = sections(client, '?sections=global,headlines')
+    assert body['sections']['global']['total'] == 2
+    assert body['sections']['headlines']['articles'] == [unclustered]
+
+
+def test_feed_rejects_unknown_sections(client):
+    code, body = sections(client, '?sections=global,sports')
+    assert code == 400
+    assert 'sports' in body['error']
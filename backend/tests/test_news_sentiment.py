@@ -0,0 +1,73 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from models.news_sentiment import (
+    NEGATION_SCOPE, PRIOR_WEIGHT, aggregate_sentiment, score_pending, score_texts, tokenize
+)
+from utils.news_index import NewsIndex
+
+NOW = datetime(2026, 10, 19, 12, tzinfo=timezone.utc)
+
+
+def test_negation_prefixes_words_in_scope():
+    assert tokenize("Profits did not rise") == ['profits', 'did', 'not_rise']
+
+
+def test_negation_scope_is_limited_to_a_few_words():
+    tokens = tokenize("no " + " ".join(['word'] * (NEGATION_SCOPE + 1)))
+    assert tokens == ['not_word'] * NEGATION_SCOPE + ['word']
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("Sensex doesn't rise, markets fell", ['sensex', 'not_rise', 'markets', 'fell']),
+    ("Shares never recovered; losses mount", ['shares', 'not_recovered', 'losses', 'mount']),
+    ("Not a surprise. Profits rose", ['not_a', 'not_surprise', 'profits', 'rose']),
+])
+def test_punctuation_ends_negation_scope(text, expected):
+    assert tokenize(text) == expected
+
+
+def test_scores_have_the_sign_of_the_text():
+    positive, negative, negated, neutral = score_texts([
+        "Infosys shares surge on record profit",
+        "Bank shares plunge as losses mount",
+        "Infosys does not beat estimates",
+        "Board meets on Tuesday",
+    ])
+    assert positive > 0 > negative
+    assert negated < 0
+    assert neutral == 0
+
+
+def test_negated_title_does_not_flip_description(tmp_path):
+    index = NewsIndex(str(tmp_path / 'news.db'))
+    index.add([{
+        'url': 'https://example.com/a',
+        'title': "Reliance doesn't disappoint",
+        'description': 'Profits rose and shares gained',
+    }])
+    assert score_pending(index) == 1
+    (score,) = [row['sentiment'] for row in index._connection().execute('SELECT sentiment FROM articles')]
+    assert score > 0
+    assert score_pending(index) == 0
+
+
+def test_aggregate_weights_recent_articles_more():
+    sentiment = aggregate_sentiment([
+        ('TCS.NS', '2026-10-19T12:00:00Z', 1.0),
+        ('TCS.NS', '2026-10-15T12:00:00Z', -1.0),
+    ], now=NOW, half_life_hours=48)
+    weight = 1.0 + 0.25
+    assert sentiment['TCS.NS']['articles'] == 2
+    assert sentiment['TCS.NS']['weight'] == pytest.approx(weight)
+    assert sentiment['TCS.NS']['score'] == pytest.approx((1.0 - 0.25) / (weight + PRIOR_WEIGHT))
+
+
+def test_aggregate_counts_future_dates_as_new():
+    sentiment = aggregate_sentiment([('BTC-INR', '2026-10-20T12:00:00Z', 0.5)], now=NOW)
+    assert sentiment['BTC-INR']['weight'] == pytest.approx(1.0)
+
+
+def test_aggregate_of_nothing_is_empty():
+    assert aggregate_sentiment([], now=NOW) == {}
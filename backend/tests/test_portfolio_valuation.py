@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from models.portfolio_valuation import holdings_matrix
+
+TICKERS = ['INFY.NS', 'BTC-INR', 'GC=F']
+
+
+def test_units_are_read_from_each_position():
+    document = {'_id': 'a', 'allocations': [
+        {'ticker': 'INFY.NS', 'units': 10, 'quantity': 10, 'initial_investment': 14000, 'current_price': 1500},
+        # Gold's 'quantity' is a display figure; units are what is held
+        {'ticker': 'GC=F', 'units': 0.1, 'quantity': 27.6, 'initial_investment': 27000, 'current_price': 280000},
+    ]}
+    user_ids, units, invested = holdings_matrix([document], TICKERS)
+    assert user_ids == ['a']
+    np.testing.assert_allclose(units, [[10, 0, 0.1]])
+    assert invested.tolist() == [41000]
+
+
+def test_legacy_positions_without_units_were_bought_at_their_stored_price():
+    legacy = {'_id': 'b', 'allocations': [
+        {'ticker': 'BTC-INR', 'quantity': 0.02, 'initial_investment': 90000, 'current_price': 4500000},
+        {'ticker': 'GC=F', 'quantity': 27.6, 'initial_investment': 27000, 'current_price': 270000},
+    ]}
+    _, units, invested = holdings_matrix([legacy], TICKERS)
+    np.testing.assert_allclose(units, [[0, 0.02, 0.1]])
+    assert invested.tolist() == [117000]
+    # Valued at later prices, the legacy portfolio moves with the market
+    assert (units @ np.array([1500, 4950000, 297000]))[0] == pytest.approx(117000 * 1.1)
+
+
+def test_positions_outside_the_market_are_skipped():
+    document = {'_id': 'c', 'allocations': [
+        {'ticker': 'DELISTED.NS', 'units': 5, 'initial_investment': 500, 'current_price': 100},
+        {'ticker': 'INFY.NS', 'initial_investment': 100, 'current_price': None},
+    ]}
+    _, units, invested = holdings_matrix([document], TICKERS)
+    assert not units.any()
+    assert invested.tolist() == [0]
@@ -0,0 +1,36 @@
+import pytest
+
+from models.risk_allocation import ALLOCATION_RANGES, CATEGORIES, allocation_curve, risk_level_chart
+from models.user_portfolio import get_risk_based_allocation
+
+
+def legacy_category_weights(risk_factor):
+    """Per-request interpolation and normalization the grid replaced"""
+    weights = {
+        category: low + (high - low) * risk_factor for category, (low, high) in ALLOCATION_RANGES.items()
+    }
+    total = sum(weights.values())
+    return {category: weight / total for category, weight in weights.items()}
+
+
+@pytest.mark.parametrize('points', [11, 101])
+def test_grid_matches_per_user_allocation_at_every_point(points):
+    curve = allocation_curve(points)
+    for i, factor in enumerate(curve['risk_factors']):
+        assets = get_risk_based_allocation(factor * 10)
+        expected = legacy_category_weights(factor)
+        for dataset in curve['datasets']:
+            assert dataset['data'][i] == pytest.approx(expected[dataset['label']])
+            assert sum(asset['weight'] for asset in assets[dataset['label']]) == pytest.approx(dataset['data'][i])
+        for asset_curve in curve['assets']:
+            weight = next(a['weight'] for a in assets[asset_curve['category']] if a['ticker'] == asset_curve['ticker'])
+            assert asset_curve['data'][i] == pytest.approx(weight)
+
+
+def test_risk_level_chart_matches_category_allocations():
+    chart = risk_level_chart()
+    assert chart['labels'] == CATEGORIES
+    for dataset in chart['datasets']:
+        assets = get_risk_based_allocation(None, dataset['label'])
+        assert dataset['data'] == pytest.approx(
+            [sum(asset['weight'] for asset in assets[category]) for category in CATEGORIES])
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from models.risk_scoring import (
+    RISK_THRESHOLDS, allocation_percentages, answers_matrix, band_index, risk_profile, score_matrix
+)
+
+# The scoring that submit_questionnaire did inline before the tables
+LEGACY_WEIGHTS = {1: 1.5, 2: 1.5, 3: 1.0, 4: 1.0, 5: 1.0}
+LEGACY_BANDS = [
+    (1.8, "Very Conservative", {"NIFTY50": 0.20, "GOLD": 0.60, "BTC": 0.05, "ETH": 0.05}),
+    (2.6, "Conservative", {"NIFTY50": 0.30, "GOLD": 0.40, "BTC": 0.10, "ETH": 0.10}),
+    (3.4, "Moderate", {"NIFTY50": 0.40, "GOLD": 0.30, "BTC": 0.15, "ETH": 0.15}),
+    (4.2, "Aggressive", {"NIFTY50": 0.50, "GOLD": 0.20, "BTC": 0.20, "ETH": 0.15}),
+    (np.inf, "Very Aggressive", {"NIFTY50": 0.60, "GOLD": 0.15, "BTC": 0.20, "ETH": 0.15}),
+]
+LEGACY_MIN_AMOUNTS = {"NIFTY50": 50000, "GOLD": 25000, "BTC": 10000, "ETH": 10000}
+
+
+def legacy_profile(answers, investment_amount):
+    weighted_sum = total_weights = 0
+    for question, value in answers.items():
+        if int(question) > 0:
+            weight = LEGACY_WEIGHTS.get(int(question), 1.0)
+            weighted_sum += value * weight
+            total_weights += weight
+    score = weighted_sum / total_weights
+
+    category, max_weights = next((c, w) for bound, c, w in LEGACY_BANDS if score <= bound)
+
+    allocation = {}
+    remaining = investment_amount
+    for asset, min_amount in LEGACY_MIN_AMOUNTS.items():
+        if remaining >= min_amount:
+            allocation[asset] = min_amount
+            remaining -= min_amount
+        else:
+            allocation[asset] = 0
+    if remaining > 0:
+        for asset, max_weight in max_weights.items():
+            max_additional = max_weight * investment_amount - allocation[asset]
+            if max_additional > 0:
+                allocated = min(remaining, max_additional)
+                allocation[asset] += allocated
+                remaining -= allocated
+
+    percentages = {asset: amount / investment_amount * 100 for asset, amount in allocation.items()}
+    return round(score, 2), category, percentages
+
+
+def random_answer_sets(count, seed=0):
+    rng = np.random.default_rng(seed)
+    for _ in range(count):
+        questions = rng.choice(np.arange(1, 7), size=int(rng.integers(1, 7)), replace=False)
+        answers = {str(q): int(rng.integers(1, 6)) for q in questions}
+        answers['0'] = int(rng.integers(1, 6))
+        yield answers, float(rng.choice([50000, 75000, 100000, 250000, 1e6, rng.uniform(5e4, 5e6)]))
+
+
+def test_profiles_match_the_legacy_scoring():
+    for answers, amount in random_answer_sets(2000):
+        score, category, percentages = legacy_profile(answers, amount)
+        profile = risk_profile(answers, amount)
+        assert profile['risk_score'] == score
+        assert profile['risk_category'] == category
+        assert profile['asset_allocation'] == pytest.approx(percentages)
+
+
+def test_matrix_scoring_matches_one_user_at_a_time():
+    answer_sets, amounts = zip(*random_answer_sets(500, seed=1))
+    scores = score_matrix(answers_matrix(answer_sets))
+    bands = band_index(scores)
+    for answers, amount, percentages in zip(answer_sets, amounts, allocation_percentages(bands, amounts)):
+        profile = risk_profile(answers, amount)
+        assert percentages == pytest.approx(profile['asset_allocation'])
+
+
+@pytest.mark.parametrize('threshold', RISK_THRESHOLDS.tolist())
+def test_thresholds_are_inclusive_upper_bounds(threshold):
+    assert band_index(threshold) == band_index(threshold - 1e-9)
+    assert band_index(threshold + 1e-9) == band_index(threshold) + 1
+
+
+def test_answers_without_scored_questions_are_rejected():
+    with pytest.raises(ValueError):
+        risk_profile({'0': 3}, 100000)
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+from models.stock_allocation import StockAllocationModel, nearest_psd
+
+
+def test_nearest_psd_clips_negative_eigenvalues():
+    matrix = np.array([[1.0, 0.9, -0.9], [0.9, 1.0, 0.9], [-0.9, 0.9, 1.0]])
+    assert np.linalg.eigvalsh(matrix).min() < 0
+    projected = nearest_psd(matrix)
+    assert np.allclose(projected, projected.T)
+    assert np.linalg.eigvalsh(projected).min() > -1e-12
+
+
+def test_nearest_psd_keeps_valid_matrices():
+    matrix = np.array([[0.04, 0.01], [0.01, 0.09]])
+    assert np.array_equal(nearest_psd(matrix), matrix)
+    assert np.array_equal(nearest_psd([[0.04, np.nan], [np.nan, 0.09]]), np.diag([0.04, 0.09]))
+
+
+def staggered_prices():
+    """Symbols listed at different times, whose pairwise covariance is not PSD"""
+    rng = np.random.default_rng(0)
+    returns = rng.normal(0, 0.02, (300, 4))
+    returns[:, 2] = -returns[:, 1] * 0.9 + rng.normal(0, 0.005, 300)
+    returns[:, 3] = returns[:, 0] * 0.5 + returns[:, 1] * 0.5 + rng.normal(0, 0.01, 300)
+    prices = pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), columns=['A.NS', 'B.NS', 'C.NS', 'D.NS'],
+                          index=pd.bdate_range('2025-01-01', periods=300))
+    for column, listed in zip(prices.columns, [0, 200, 250, 280]):
+        prices.iloc[:listed, prices.columns.get_loc(column)] = np.nan
+    return prices
+
+
+def test_screened_covariance_gives_finite_volatility():
+    model = StockAllocationModel(universe=[])
+    model.price_data = staggered_prices()
+    model.valid_tickers = list(model.price_data.columns)
+    model._calculate_screening_metrics()
+    model.select_top_stocks(4)
+
+    pairwise = pd.DataFrame(model._daily_returns).cov(min_periods=2).to_numpy()
+    assert np.linalg.eigvalsh(pairwise).min() < 0
+    covariance = model.covariance.to_numpy()
+    assert np.linalg.eigvalsh(covariance).min() > -1e-12
+
+    weights = model.optimize_portfolio()
+    assert np.isfinite(weights).all()
+    assert np.isfinite(np.sqrt(weights @ covariance @ weights))
@@ -0,0 +1,71 @@
+import pytest
+
+from routes.news import ticker_tagger
+from utils.ticker_tagger import AhoCorasick, TickerTagger
+
+
+def test_automaton_reports_overlapping_matches():
+    automaton = AhoCorasick()
+    for pattern in ('he', 'she', 'his', 'hers'):
+        automaton.add(pattern, pattern)
+    automaton.build()
+    matches = sorted(automaton.iter_matches('ushers'))
+    assert matches == [(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')]
+
+
+def test_automaton_is_closed_after_build():
+    automaton = AhoCorasick().build()
+    with pytest.raises(RuntimeError):
+        automaton.add('late', 'late')
+
+
+def test_tags_whole_words_in_order_of_first_mention():
+    tagger = TickerTagger(names=[('Infosys', 'INFY.NS'), ('Tata Consultancy', 'TCS.NS')])
+    text = 'Tata Consultancy and INFOSYS report; infosys leads'
+    assert tagger.tag(text) == ['TCS.NS', 'INFY.NS']
+    assert tagger.tag('Infosystems hires') == []
+    assert tagger.tag('') == []
+
+
+def test_exact_terms_match_only_their_own_case():
+    tagger = TickerTagger(names=[('Solana', 'SOL-INR')], exact=[('SOL', 'SOL-INR')])
+    assert tagger.tag('SOL rallies') == ['SOL-INR']
+    assert tagger.tag('sol rallies') == []
+    assert tagger.tag('solana rallies') == ['SOL-INR']
+
+
+def test_offsets_survive_characters_that_lengthen_when_lowered():
+    tagger = TickerTagger(names=[('Infosys', 'INFY.NS')])
+    assert tagger.tag('İ Infosys') == ['INFY.NS']
+
+
+@pytest.mark.parametrize('text', [
+    'Heavy reliance on debt worries lenders',
+    'Power grid failure leaves Texas in the dark',
+    'Diethyl ether prices climb',
+    'ril and sbi in lower case',
+    'Gold loan demand climbs in rural India',
+    'Sindhu wins gold medal at the Asian Games',
+])
+def test_ordinary_words_do_not_tag(text):
+    assert ticker_tagger.tag(text) == []
+
+
+@pytest.mark.parametrize('text, tickers', [
+    ('Reliance Industries shares rise', ['RELIANCE.NS']),
+    ('RIL and SBI rally', ['RELIANCE.NS', 'SBIN.NS']),
+    ('Power Grid Corp wins order', ['POWERGRID.NS']),
+    ('Ether climbs past resistance', ['ETH-INR']),
+    ('Bitcoin and ethereum fall', ['BTC-INR', 'ETH-INR']),
+    ('Gold prices hit a record as the dollar slips', ['GC=F']),
+    ('Bullion demand rises', ['GC=F']),
+])
+def test_company_names_and_exact_aliases_tag(text, tickers):
+    assert ticker_tagger.tag(text) == tickers
+
+
+def test_tag_article_reads_title_and_description():
+    article = {'title': 'HUL results', 'description': 'Infosys and TCS also report'}
+    tagged = ticker_tagger.tag_article(article)
+    assert tagged['tickers'] == ['HINDUNILVR.NS', 'INFY.NS', 'TCS.NS']
+    assert 'tickers' not in article
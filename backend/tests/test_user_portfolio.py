@@ -0,0 +1,127 @@
+import mongomock
+import numpy as np
+import pytest
+from bson import ObjectId
+
+from models import user_portfolio
+from models.market_snapshot import FALLBACK_PRICES, MarketSnapshot, _fallback_covariance
+from models.portfolio_repository import PortfolioRepository
+from models.user_portfolio import build_portfolio
+from models.user_repository import UserRepository
+from utils.snapshot import Snapshot
+
+
+def market(prices=FALLBACK_PRICES):
+    return MarketSnapshot(list(prices), list(prices.values()), _fallback_covariance(len(prices)), 'fallback')
+
+
+@pytest.mark.parametrize('investment', [100000, 1000000, 7654321])
+def test_stocks_are_whole_shares_and_the_remainder_is_cash(investment):
+    portfolio = build_portfolio(investment, 6, 'moderate', market())
+    allocations = portfolio['allocations']
+    remaining = portfolio['portfolio_metrics']['remaining_amount']
+
+    stocks = [a for a in allocations if a['category'] == 'Stocks']
+    assert all(float(a['quantity']).is_integer() for a in stocks)
+    assert all(a['initial_investment'] == a['quantity'] * a['current_price'] for a in stocks)
+    # Funds get their target and nothing more
+    for fund in (a for a in allocations if a['category'] == 'Mutual Funds'):
+        assert fund['initial_investment'] <= investment * 0.5 + 1e-6
+    assert sum(a['initial_investment'] for a in allocations) + remaining == pytest.approx(investment)
+    assert 0 <= remaining < max(a['current_price'] for a in stocks)
+
+
+def test_metrics_use_the_weights_held():
+    portfolio = build_portfolio(100000, 6, 'moderate', market())
+    allocations = portfolio['allocations']
+    weights = np.array([a['initial_investment'] / 100000 for a in allocations])
+    returns = np.array([a['expected_return'] for a in allocations])
+    assert portfolio['portfolio_metrics']['expected_return'] == pytest.approx(weights @ returns)
+
+
+def repriced(factor):
+    """Live market with every fallback price scaled by `factor`"""
+    prices = [price * factor for price in FALLBACK_PRICES.values()]
+    return MarketSnapshot(list(FALLBACK_PRICES), prices, _fallback_covariance(len(prices)), 'live')
+
+
+def save_each(self, documents):
+    # mongomock's bulk_write does not accept the ReplaceOne this pymongo builds
+    for user_id, document in documents.items():
+        self.save(user_id, document)
+    return len(documents)
+
+
+@pytest.fixture
+def store(monkeypatch):
+    client = mongomock.MongoClient()
+    repositories = PortfolioRepository(client.db.portfolios), UserRepository(client.db.users)
+    monkeypatch.setattr(user_portfolio, 'portfolios', repositories[0])
+    monkeypatch.setattr(user_portfolio, 'users', repositories[1])
+    monkeypatch.setattr(PortfolioRepository, 'save_many', save_each)
+    return repositories
+
+
+def use_snapshot(monkeypatch, snapshot):
+    monkeypatch.setattr(user_portfolio.market_snapshot, 'get', lambda: snapshot)
+
+
+def test_refresh_reads_only_stale_portfolios(store, monkeypatch):
+    portfolios, users = store
+    profile = {'investment_amount': 100000, 'risk_score': 6, 'risk_category': 'moderate'}
+    current, stale, fallback = (ObjectId() for _ in range(3))
+    users.collection.insert_many([{'_id': user_id, **profile} for user_id in (current, stale, fallback)])
+
+    for user_id, snapshot in [(current, Snapshot('v2', repriced(1.0))), (stale, Snapshot('v1', repriced(1.0))),
+                              (fallback, Snapshot('v0', market()))]:
+        portfolios.save(user_id, user_portfolio.compute_portfolio_document({'_id': user_id, **profile}, snapshot))
+
+    use_snapshot(monkeypatch, Snapshot('v2', repriced(1.1)))
+    assert user_portfolio.refresh_stale_portfolios(batch_size=1) == (2, 2)
+
+    stored = portfolios.get_many([current, stale, fallback])
+    assert stored[current]['market_version'] == 'v2' and 'valued_at' not in stored[current]
+    assert stored[stale]['valued_at'] and stored[stale]['market_source'] == 'live'
+    # The fallback-bought portfolio is bought again at live prices
+    assert stored[fallback]['market_source'] == 'live' and 'valued_at' not in stored[fallback]
+
+
+def test_refresh_waits_for_live_prices(store, monkeypatch):
+    use_snapshot(monkeypatch, Snapshot('v2', market()))
+    assert user_portfolio.refresh_stale_portfolios() == (0, 0)
+
+
+PROFILE = {'investment_amount': 100000, 'risk_score': 6, 'risk_category': 'moderate'}
+
+
+def test_revaluation_keeps_units_and_cost():
+    document = user_portfolio.compute_portfolio_document({'_id': 1, **PROFILE}, Snapshot('v1', repriced(1.0)))
+    revalued = user_portfolio.revalue_portfolio_document(document, Snapshot('v2', repriced(1.1)))
+
+    for before, after in zip(document['allocations'], revalued['allocations']):
+        assert after['units'] == before['units']
+        assert after['quantity'] == before['quantity']
+        assert after['initial_investment'] == before['initial_investment']
+        assert after['current_price'] == pytest.approx(before['current_price'] * 1.1)
+    assert revalued['market_version'] == 'v2'
+    assert revalued['portfolio_metrics']['total_current_value'] == pytest.approx(
+        sum(a['units'] * a['current_price'] for a in revalued['allocations']))
+
+
+def test_reads_revalue_until_the_profile_changes(store, monkeypatch):
+    portfolios, _ = store
+    user = {'_id': ObjectId(), **PROFILE}
+    use_snapshot(monkeypatch, Snapshot('v1', repriced(1.0)))
+    user_portfolio.get_user_portfolio(user)
+    built = portfolios.get(user['_id'])  # as stored, with Mongo's millisecond timestamps
+
+    use_snapshot(monkeypatch, Snapshot('v2', repriced(1.2)))
+    revalued = user_portfolio.get_user_portfolio(user)
+    assert revalued['computed_at'] == built['computed_at']
+    assert [a['units'] for a in revalued['allocations']] == [a['units'] for a in built['allocations']]
+    assert portfolios.get(user['_id'])['market_version'] == 'v2'
+
+    rebuilt = user_portfolio.get_user_portfolio({**user, 'investment_amount': 200000})
+    assert rebuilt['computed_at'] > built['computed_at']
+    assert rebuilt['profile']['investment_amount'] == 200000
+    assert rebuilt['portfolio_metrics']['total_investment'] == 200000
@@ -0,0 +1,75 @@
+import mongomock
+import pytest
+from bson import ObjectId
+from flask import Flask
+
+from models.user_repository import RISK_PROFILE_FIELDS, UserRepository
+
+
+class CountingCollection:
+    """Collection proxy that counts find_one round trips"""
+
+    def __init__(self, collection):
+        self._collection = collection
+        self.reads = 0
+
+    def find_one(self, *args, **kwargs):
+        self.reads += 1
+        return self._collection.find_one(*args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+
+@pytest.fixture
+def repository():
+    collection = mongomock.MongoClient().db.users
+    user_id = collection.insert_one({
+        'username': 'asha', 'password': 'x', 'investment_amount': 100000,
+        'risk_score': 6, 'risk_category': 'moderate', 'questionnaire_answers': {'q1': 'a'},
+    }).inserted_id
+    return UserRepository(CountingCollection(collection)), user_id
+
+
+def test_reads_in_a_request_share_one_round_trip(repository):
+    users, user_id = repository
+    with Flask(__name__).app_context():
+        first = users.get_risk_profile(str(user_id))
+        assert users.get_by_id(user_id, ('risk_score',)) is first
+        assert set(first) == {'_id', *RISK_PROFILE_FIELDS}
+        assert users.collection.reads == 1
+
+
+def test_wider_projections_go_back_to_mongo(repository):
+    users, user_id = repository
+    with Flask(__name__).app_context():
+        users.get_risk_profile(user_id)
+        whole = users.get_by_id(user_id)
+        assert 'questionnaire_answers' in whole
+        assert users.get_risk_profile(user_id) is whole
+        assert users.collection.reads == 2
+
+
+def test_writes_evict_the_cached_user(repository):
+    users, user_id = repository
+    with Flask(__name__).app_context():
+        users.get_risk_profile(user_id)
+        assert users.update_fields(user_id, {'risk_score': 8})
+        assert users.get_risk_profile(user_id)['risk_score'] == 8
+        assert users.collection.reads == 2
+
+
+def test_missing_users_are_remembered_per_request(repository):
+    users, _ = repository
+    missing = ObjectId()
+    with Flask(__name__).app_context():
+        assert users.get_by_id(missing, ('_id',)) is None
+        assert users.get_by_id(missing, ('_id',)) is None
+        assert users.collection.reads == 1
+
+
+def test_no_identity_map_outside_a_request(repository):
+    users, user_id = repository
+    users.get_risk_profile(user_id)
+    users.get_risk_profile(user_id)
+    assert users.collection.reads == 2
@@ -1,31 +1,97 @@
+import threading
+import time
+from collections import OrderedDict
 from functools import wraps
-from flask import request, jsonify
+from flask import request, jsonify, g
 import jwt
-from config import SECRET_KEY
-
-def token_required(f):
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        
-        if not token:
-            return jsonify({'message': 'Token is missing'}), 401
-
-        try:
-            # Remove 'Bearer ' if present
-            if token.startswith('Bearer '):
-                token = token[7:]
-            
-            # Decode the token
-            data = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+from bson import ObjectId
+from bson.errors import InvalidId
+from config import SECRET_KEY, TOKEN_CACHE_SIZE
+from models.user_repository import users
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of decoded JWT claims, each kept only until the token expires"""
+
+    def __init__(self, maxsize=TOKEN_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        with self._lock:
+            claims = self._entries.get(token)
+            if claims is None:
+                return None
+            if claims.get('exp', 0) <= time.time():
+                del self._entries[token]
+                return None
+            self._entries.move_to_end(token)
+            return claims
+
+    def put(self, token, claims):
+        with self._lock:
+            self._entries[token] = claims
+            self._entries.move_to_end(token)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+token_cache = VerifiedTokenCache()
+
+
+def verify_token(token):
+    """Return the claims of a valid token, decoding and checking the signature at most once"""
+    claims = token_cache.get(token)
+    if claims is None:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
+        # Tokens without an expiry are verified on every request
+        if 'exp' in claims:
+            token_cache.put(token, claims)
+    return claims
+
+
+def load_current_user(fields=None):
+    """Load the authenticated user's document (only `fields`) through the repository"""
+    g.current_user = users.get_by_id(g.user_object_id, fields)
+    return g.current_user
+
+
+def token_required(f=None, *, user_fields=None):
+    """
+    Require a valid Bearer token.
+
+    Sets g.user_id (and request.user_id). With user_fields, also loads the
+    user document with that projection into g.current_user and responds
+    404 when the user no longer exists.
+    """
+    def decorator(view):
+        @wraps(view)
+        def decorated(*args, **kwargs):
+            auth_header = request.headers.get('Authorization')
+            if not auth_header or not auth_header.startswith('Bearer '):
+                return jsonify({"message": "No token provided"}), 401
+
+            try:
+                # Decode the token
+                data = verify_token(auth_header[7:])
+                g.user_id = data['user_id']
+                g.user_object_id = ObjectId(g.user_id)
+            except jwt.ExpiredSignatureError:
+                return jsonify({"message": "Token has expired"}), 401
+            except (jwt.InvalidTokenError, KeyError, InvalidId, TypeError):
+                return jsonify({"message": "Invalid token"}), 401
+
             # Add user_id to request object
-            request.user_id = data['user_id']
-            
-        except jwt.ExpiredSignatureError:
-            return jsonify({'message': 'Token has expired'}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({'message': 'Invalid token'}), 401
-        
-        return f(*args, **kwargs)
-    
-    return decorated
\ No newline at end of file
+            request.user_id = g.user_id
+
+            if user_fields is not None and load_current_user(user_fields) is None:
+                return jsonify({"message": "User not found"}), 404
+
+            return view(*args, **kwargs)
+
+        return decorated
+
+    if f is not None:
+        return decorator(f)
+    return decorator
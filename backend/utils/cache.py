@@ -0,0 +1,111 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from utils.metrics import CACHE_ENTRIES, CACHE_LOOKUPS_TOTAL
+from utils.snapshot import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts, **params):
+    """
+    Normalize a request into a hashable key: parameter order, case and
+    surrounding whitespace do not matter, and None values are dropped.
+    """
+    normalized = tuple(sorted(
+        (name, value.strip().lower() if isinstance(value, str) else value)
+        for name, value in params.items() if value is not None
+    ))
+    return parts + normalized
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at')
+
+    def __init__(self, value, stored_at):
+        self.value = value
+        self.stored_at = stored_at
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with a freshness TTL and stale-while-revalidate.
+
+    Within `ttl` an entry is served as is. For `stale_ttl` after that it is
+    still served, while a single background refresh replaces it. Misses load
+    synchronously, and concurrent misses for one key share a single load.
+    Lookups are counted per outcome in cache_lookups_total.
+    """
+
+    def __init__(self, name, ttl, stale_ttl=0, maxsize=256):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refreshing = set()
+
+    def get_or_load(self, key, loader):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+
+        if entry is not None:
+            age = now - entry.stored_at
+            if age < self.ttl:
+                CACHE_LOOKUPS_TOTAL.labels(self.name, 'hit').inc()
+                return entry.value
+            if age < self.ttl + self.stale_ttl:
+                CACHE_LOOKUPS_TOTAL.labels(self.name, 'stale').inc()
+                self._refresh_in_background(key, loader)
+                return entry.value
+
+        CACHE_LOOKUPS_TOTAL.labels(self.name, 'miss').inc()
+        return self._flight.do(key, lambda: self._load(key, loader))
+
+    def _load(self, key, loader):
+        value = loader()
+        self.set(key, value)
+        return value
+
+    def _refresh_in_background(self, key, loader):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._flight.do(key, lambda: self._load(key, loader))
+            except Exception as e:
+                logger.warning("Background refresh of %s cache entry %s failed: %s", self.name, key, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f'{self.name}-refresh', daemon=True).start()
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = _Entry(value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            CACHE_ENTRIES.labels(self.name).set(len(self._entries))
+
+    def peek(self, key):
+        """The cached value regardless of age, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+        return None if entry is None else entry.value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            CACHE_ENTRIES.labels(self.name).set(0)
@@ -0,0 +1,54 @@
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Payloads smaller than this are not worth the CPU to compress
+MIN_COMPRESS_BYTES = 1024
+COMPRESSIBLE_MIMETYPES = {'application/json', 'text/plain', 'text/html'}
+
+
+def _choose_encoding(accept_encoding):
+    if brotli is not None and 'br' in accept_encoding:
+        return 'br'
+    if 'gzip' in accept_encoding:
+        return 'gzip'
+    return None
+
+
+def init_compression(app, min_size=MIN_COMPRESS_BYTES):
+    """Compress large responses with brotli or gzip when the client accepts it"""
+
+    @app.after_request
+    def _compress(response):
+        if (response.direct_passthrough
+                or response.status_code < 200 or response.status_code >= 300
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        encoding = _choose_encoding(request.accept_encodings)
+        response.vary.add('Accept-Encoding')
+        if encoding is None:
+            return response
+
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+
+        if encoding == 'br':
+            data = brotli.compress(data, quality=4)
+        else:
+            data = gzip.compress(data, compresslevel=5)
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = encoding
+        # The compressed bytes differ per encoding, so a strong validator no longer holds
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -1,9 +1,118 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+
 from flask_bcrypt import Bcrypt
 
+from config import (
+    BCRYPT_LOG_ROUNDS, BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS, BCRYPT_TARGET_MS,
+    PASSWORD_HASH_QUEUE, PASSWORD_HASH_TIMEOUT, PASSWORD_HASH_WORKERS
+)
+from utils.metrics import PASSWORD_HASH_REJECTED_TOTAL, PASSWORD_HASH_SECONDS
+
+logger = logging.getLogger(__name__)
+
 bcrypt = Bcrypt()
 
+# A small thread pool bounds how many cores password work can take. The
+# request thread still waits on its hash (up to PASSWORD_HASH_TIMEOUT); since
+# bcrypt releases the GIL, only that thread waits and the worker's other
+# request threads keep running.
+_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix='bcrypt')
+_slots = threading.BoundedSemaphore(PASSWORD_HASH_WORKERS + PASSWORD_HASH_QUEUE)
+
+_log_rounds = BCRYPT_LOG_ROUNDS or BCRYPT_MIN_ROUNDS
+# Calibration times this cheaper cost and extrapolates from it
+_CALIBRATION_ROUNDS = 10
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing pool is saturated and the caller should retry later"""
+
+
+def _run(operation, fn, *args):
+    if not _slots.acquire(blocking=False):
+        PASSWORD_HASH_REJECTED_TOTAL.labels(operation).inc()
+        raise PasswordHasherBusy(f"Password hashing pool is full ({operation})")
+
+    def task():
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            PASSWORD_HASH_SECONDS.labels(operation).observe(time.perf_counter() - start)
+            _slots.release()
+
+    try:
+        future = _executor.submit(task)
+    except Exception:
+        _slots.release()
+        raise
+    try:
+        return future.result(timeout=PASSWORD_HASH_TIMEOUT)
+    except FutureTimeout:
+        raise PasswordHasherBusy(f"Password hashing timed out ({operation})")
+
+
+def calibrate_rounds(target_ms=BCRYPT_TARGET_MS):
+    """
+    Pick the bcrypt cost factor whose hash time is closest to target_ms
+    without exceeding it, but never below BCRYPT_MIN_ROUNDS. Each extra round
+    doubles the cost, so one timing at a low cost is enough to extrapolate.
+    An explicit BCRYPT_LOG_ROUNDS setting skips calibration.
+    """
+    global _log_rounds
+    if BCRYPT_LOG_ROUNDS:
+        _log_rounds = BCRYPT_LOG_ROUNDS
+        return _log_rounds
+
+    samples = []
+    for _ in range(3):
+        start = time.perf_counter()
+        bcrypt.generate_password_hash('calibration', _CALIBRATION_ROUNDS)
+        samples.append((time.perf_counter() - start) * 1000)
+    base_ms = sorted(samples)[1]
+
+    rounds = BCRYPT_MIN_ROUNDS
+    while rounds < BCRYPT_MAX_ROUNDS and base_ms * 2 ** (rounds + 1 - _CALIBRATION_ROUNDS) <= target_ms:
+        rounds += 1
+
+    _log_rounds = rounds
+    logger.info("Calibrated bcrypt cost to %d rounds (~%.0f ms per hash, target %d ms)",
+                rounds, base_ms * 2 ** (rounds - _CALIBRATION_ROUNDS), target_ms)
+    return rounds
+
+
 def hash_password(password):
-    return bcrypt.generate_password_hash(password).decode("utf-8")
+    return _run('hash', bcrypt.generate_password_hash, password, _log_rounds).decode("utf-8")
+
+
+def hash_passwords(passwords, workers=None, rounds=None):
+    """
+    Hash a batch of passwords for offline work (imports, fixtures) on a
+    dedicated pool, bypassing the bounded request pool. Preserves order.
+    """
+    rounds = rounds or _log_rounds
+    with ThreadPoolExecutor(max_workers=workers or os.cpu_count() or 1, thread_name_prefix='bcrypt-batch') as pool:
+        hashes = pool.map(lambda password: bcrypt.generate_password_hash(password, rounds), passwords)
+        return [hashed.decode("utf-8") for hashed in hashes]
+
 
 def check_password(password, hashed):
-    return bcrypt.check_password_hash(hashed, password)
+    return _run('check', bcrypt.check_password_hash, hashed, password)
+
+
+def needs_rehash(hashed):
+    """
+    True when a stored hash was made with a lower cost than the current one.
+    Stronger hashes are kept, so a machine that calibrates lower never
+    weakens them.
+    """
+    try:
+        # Format: $2b$<rounds>$<salt+hash>
+        return int(hashed.split('$')[2]) < _log_rounds
+    except (AttributeError, IndexError, ValueError):
+        return True
@@ -0,0 +1,80 @@
+import dataclasses
+import decimal
+import json
+import math
+import uuid
+from datetime import date, datetime
+
+import numpy as np
+from bson import ObjectId
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # fall back to the standard library encoder
+    orjson = None
+
+ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+
+def _default(obj):
+    """Convert the types our routes return that JSON has no native form for"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _finite(obj):
+    """Replace NaN and infinities with None, as orjson does, for the stdlib encoder"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    NumPy arrays and scalars, datetimes, ObjectIds and Decimals serialize
+    natively, so routes can return model output without casting every field.
+    Non-finite floats become null. Falls back to the standard library
+    encoder when orjson is not installed.
+    """
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj).decode('utf-8')
+
+    def dumps_bytes(self, obj):
+        if orjson is not None:
+            return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+        return json.dumps(_finite(obj), default=lambda o: _finite(_default(o)),
+                          separators=(',', ':'), allow_nan=False).encode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is not None:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
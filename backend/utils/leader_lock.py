@@ -0,0 +1,45 @@
+"""
+Pick one process on the host to run a background task.
+
+Under gunicorn every worker starts the same background threads. A task
+that spends a shared quota (NewsAPI requests) should run in one of them
+only: each worker tries a non-blocking exclusive lock on a file, and the
+one that holds it is the leader until it exits. The kernel releases the
+lock when the holder dies, so another worker takes over on its next try.
+"""
+import logging
+import os
+
+try:
+    import fcntl
+except ImportError:  # no flock (Windows); every process leads, as with a single dev server
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class LeaderLock:
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._pid = None
+
+    def acquire(self):
+        """True when this process holds the lock, taking it if it is free"""
+        if self._pid == os.getpid():
+            return True
+        if fcntl is None:
+            self._pid = os.getpid()
+            return True
+        # A descriptor inherited across fork shares the parent's lock; use our own
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        handle = open(self.path, 'a')
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        self._file = handle
+        self._pid = os.getpid()
+        logger.info("Process %d holds %s", self._pid, self.path)
+        return True
@@ -0,0 +1,119 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+from config import LOG_DEBUG_SAMPLE_RATE, LOG_FILE, LOG_LEVEL, LOG_LEVELS, LOG_SAMPLED_LOGGERS
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+_listener_pid = None
+
+
+class JSONFormatter(logging.Formatter):
+    """Render each record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            'timestamp': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of DEBUG records from high-volume loggers"""
+
+    def __init__(self, rate, loggers):
+        super().__init__()
+        self.rate = rate
+        self.prefixes = tuple(loggers)
+
+    def filter(self, record):
+        if record.levelno > logging.DEBUG or self.rate >= 1:
+            return True
+        if not record.name.startswith(self.prefixes):
+            return True
+        return random.random() < self.rate
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hand records to a background listener thread.
+
+    Only the message is rendered in the calling thread (its arguments may be
+    mutated once the call returns); JSON encoding and I/O happen on the
+    listener thread.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _parse_levels(spec):
+    """Parse 'routes.portfolio=DEBUG,pymongo=WARNING' into a dict"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging():
+    """
+    Route all logging through a queue to a JSON-emitting listener thread.
+
+    Safe to call more than once; a forked worker gets its own listener.
+    """
+    global _listener, _listener_pid
+    if _listener is not None and _listener_pid == os.getpid():
+        return
+
+    formatter = JSONFormatter()
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if LOG_FILE:
+        handlers.append(logging.FileHandler(LOG_FILE))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = AsyncQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(LOG_DEBUG_SAMPLE_RATE, LOG_SAMPLED_LOGGERS))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(LOG_LEVEL)
+
+    for name, level in _parse_levels(LOG_LEVELS).items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    _listener_pid = os.getpid()
+    atexit.register(_listener.stop)
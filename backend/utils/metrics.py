@@ -0,0 +1,166 @@
+import os
+import time
+from contextlib import contextmanager
+
+from flask import Response, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from pymongo import monitoring
+
+# Buckets cover everything from a cached Mongo lookup to a full yfinance download
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HTTP_REQUEST_SECONDS = Histogram(
+    'http_request_duration_seconds',
+    'Time spent handling HTTP requests',
+    ['endpoint', 'method', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+
+OPTIMIZER_STAGE_SECONDS = Histogram(
+    'optimizer_stage_duration_seconds',
+    'Time spent in each portfolio optimizer stage',
+    ['stage'],
+    buckets=LATENCY_BUCKETS
+)
+
+SCREENING_STAGE_SECONDS = Histogram(
+    'stock_screening_stage_duration_seconds',
+    'Time spent in each stage of the stock screening pipeline',
+    ['stage'],
+    buckets=LATENCY_BUCKETS
+)
+
+SCREENING_SYMBOLS = Gauge(
+    'stock_screening_symbols',
+    'Symbols remaining after each stage of the last screening run',
+    ['stage'],
+    multiprocess_mode='max'
+)
+
+UPSTREAM_REQUEST_SECONDS = Histogram(
+    'upstream_request_duration_seconds',
+    'Time spent waiting on upstream data providers',
+    ['service', 'operation'],
+    buckets=LATENCY_BUCKETS
+)
+
+UPSTREAM_ERRORS_TOTAL = Counter(
+    'upstream_errors_total',
+    'Failed calls to upstream data providers',
+    ['service', 'operation']
+)
+
+PASSWORD_HASH_SECONDS = Histogram(
+    'password_hash_duration_seconds',
+    'Time spent hashing or verifying passwords on the bcrypt pool',
+    ['operation'],
+    buckets=LATENCY_BUCKETS
+)
+
+PASSWORD_HASH_REJECTED_TOTAL = Counter(
+    'password_hash_rejected_total',
+    'Password operations rejected because the bcrypt pool was saturated',
+    ['operation']
+)
+
+MONGO_COMMAND_SECONDS = Histogram(
+    'mongo_command_duration_seconds',
+    'Time spent on MongoDB commands',
+    ['collection', 'command'],
+    buckets=LATENCY_BUCKETS
+)
+
+MONGO_COMMAND_FAILURES_TOTAL = Counter(
+    'mongo_command_failures_total',
+    'Failed MongoDB commands',
+    ['collection', 'command']
+)
+
+CACHE_LOOKUPS_TOTAL = Counter(
+    'cache_lookups_total',
+    'In-process cache lookups by outcome (hit, stale, miss)',
+    ['cache', 'result']
+)
+
+CACHE_ENTRIES = Gauge(
+    'cache_entries',
+    'Entries held in each in-process cache',
+    ['cache'],
+    multiprocess_mode='livesum'
+)
+
+NEWS_DUPLICATES_TOTAL = Counter(
+    'news_duplicate_articles_total',
+    'Fetched news articles dropped as near-duplicates of another story'
+)
+
+
+@contextmanager
+def track_upstream(service, operation):
+    """Time a call to an external provider and count it as an error if it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        UPSTREAM_ERRORS_TOTAL.labels(service, operation).inc()
+        raise
+    finally:
+        UPSTREAM_REQUEST_SECONDS.labels(service, operation).observe(time.perf_counter() - start)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Record the latency of every command sent through the shared MongoClient"""
+
+    # Commands issued by the driver itself rather than by our queries
+    IGNORED_COMMANDS = {'hello', 'ismaster', 'isMaster', 'ping', 'endSessions', 'saslStart', 'saslContinue'}
+
+    def __init__(self):
+        self._collections = {}
+
+    def started(self, event):
+        if event.command_name in self.IGNORED_COMMANDS:
+            return
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            collection = 'none'
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def _observe(self, event, failed):
+        collection = self._collections.pop((event.connection_id, event.request_id), None)
+        if collection is None:
+            return
+        MONGO_COMMAND_SECONDS.labels(collection, event.command_name).observe(event.duration_micros / 1e6)
+        if failed:
+            MONGO_COMMAND_FAILURES_TOTAL.labels(collection, event.command_name).inc()
+
+    def succeeded(self, event):
+        self._observe(event, failed=False)
+
+    def failed(self, event):
+        self._observe(event, failed=True)
+
+
+def init_request_metrics(app):
+    """Time every request handled by the app and expose the registry on /metrics"""
+
+    @app.before_request
+    def _start_timer():
+        request.environ['metrics.start_time'] = time.perf_counter()
+
+    @app.after_request
+    def _record_request(response):
+        start = request.environ.get('metrics.start_time')
+        if start is not None and request.endpoint != 'metrics':
+            HTTP_REQUEST_SECONDS.labels(
+                request.endpoint or 'unknown', request.method, response.status_code
+            ).observe(time.perf_counter() - start)
+        return response
+
+    @app.route('/metrics')
+    def metrics():
+        if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+            # Under gunicorn, sum every worker's values rather than this one's
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+        return Response(generate_latest(), mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,134 @@
+"""
+Near-duplicate detection for news articles.
+
+Each article's title and description are reduced to a 64-bit SimHash.
+Rewrites of one wire story land a few bits apart. A rolling index
+splits fingerprints into bands: two fingerprints within MAX_DISTANCE bits
+share at least one band exactly when there are more than MAX_DISTANCE
+bands, so a lookup only compares against the few fingerprints in matching
+band buckets. It never scans the whole window.
+"""
+import hashlib
+import re
+import threading
+from collections import deque
+
+import numpy as np
+
+from config import NEWS_DEDUP_MAX_DISTANCE, NEWS_DEDUP_WINDOW
+from utils.metrics import NEWS_DUPLICATES_TOTAL
+
+BANDS = 8
+BAND_BITS = 64 // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or that the to was were will with'.split()
+)
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+
+def _features(text):
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def _feature_hash(feature):
+    return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'little')
+
+
+def simhash(text):
+    """64-bit SimHash of the text's words, or None when it has none to hash"""
+    features = _features(text)
+    if not features:
+        return None
+    hashes = np.fromiter((_feature_hash(feature) for feature in features), dtype=np.uint64, count=len(features))
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(features)
+    packed = np.packbits(votes > 0, bitorder='little')
+    return int.from_bytes(packed.tobytes(), 'little')
+
+
+def article_fingerprint(article):
+    title = article.get('title') or ''
+    # NewsAPI appends " - <source name>" to titles; syndicated copies differ only there
+    source = (article.get('source') or {}).get('name')
+    if source and title.endswith(f' - {source}'):
+        title = title[:-len(source) - 3]
+    return simhash(f"{title} {article.get('description') or ''}")
+
+
+def _bands(fingerprint):
+    return [(band, (fingerprint >> (band * BAND_BITS)) & BAND_MASK) for band in range(BANDS)]
+
+
+class SimHashIndex:
+    """
+    The last `window` fingerprints, each mapped to the id of the story
+    cluster it belongs to. Lookups touch only the band buckets of the
+    fingerprint being checked.
+    """
+
+    def __init__(self, max_distance=NEWS_DEDUP_MAX_DISTANCE, window=NEWS_DEDUP_WINDOW):
+        if max_distance >= BANDS:
+            raise ValueError(f"max_distance must be below {BANDS} for banded lookups to be exact")
+        self.max_distance = max_distance
+        self.window = window
+        self._buckets = {}
+        self._order = deque()
+        self._lock = threading.Lock()
+
+    def _find(self, fingerprint):
+        for key in _bands(fingerprint):
+            for other, cluster_id in self._buckets.get(key, ()):
+                if bin(fingerprint ^ other).count('1') <= self.max_distance:
+                    return cluster_id
+        return None
+
+    def _add(self, fingerprint, cluster_id):
+        entry = (fingerprint, cluster_id)
+        for key in _bands(fingerprint):
+            self._buckets.setdefault(key, []).append(entry)
+        self._order.append(entry)
+        while len(self._order) > self.window:
+            old = self._order.popleft()
+            for key in _bands(old[0]):
+                bucket = self._buckets.get(key)
+                if bucket is not None:
+                    bucket.remove(old)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def cluster(self, fingerprint):
+        """Cluster id for a fingerprint, registering it as a new story if unseen"""
+        with self._lock:
+            cluster_id = self._find(fingerprint)
+            if cluster_id is None:
+                cluster_id = f'{fingerprint:016x}'
+                self._add(fingerprint, cluster_id)
+            return cluster_id
+
+
+news_index = SimHashIndex()
+
+
+def dedupe_articles(articles, index=None):
+    """
+    Drop near-duplicate articles, keeping the first copy of each story, and
+    tag the kept ones with a 'cluster_id' that is stable across feeds.
+    Articles with no words to compare are kept with a cluster_id of None.
+    """
+    index = news_index if index is None else index
+    seen = set()
+    unique = []
+    for article in articles:
+        fingerprint = article_fingerprint(article)
+        if fingerprint is None:
+            unique.append({**article, 'cluster_id': None})
+            continue
+        cluster_id = index.cluster(fingerprint)
+        if cluster_id in seen:
+            NEWS_DUPLICATES_TOTAL.inc()
+            continue
+        seen.add(cluster_id)
+        unique.append({**article, 'cluster_id': cluster_id})
+    return unique
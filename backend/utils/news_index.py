@@ -0,0 +1,310 @@
+"""
+Local full-text index of every news article the app has fetched.
+
+Articles are stored in SQLite with an FTS5 table over title, description
+and source name, so searches are answered from disk without spending
+NewsAPI quota. The tickers each article mentions are kept in their own
+table, keyed by ticker, so news for a whole portfolio is one index range
+scan. WAL mode lets every worker process write to the same file
+while others read. Connections are opened per thread.
+"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+from config import NEWS_INDEX_PATH, NEWS_INDEX_PRUNE_SECONDS, NEWS_INDEX_RETENTION_DAYS
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    description TEXT,
+    url_to_image TEXT,
+    published_at TEXT,
+    source_id TEXT,
+    source_name TEXT,
+    author TEXT,
+    cluster_id TEXT,
+    tickers TEXT,
+    sentiment REAL,
+    indexed_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS articles_published_at ON articles (published_at);
+CREATE INDEX IF NOT EXISTS articles_source ON articles (source_id, source_name);
+CREATE INDEX IF NOT EXISTS articles_indexed_at ON articles (indexed_at);
+CREATE INDEX IF NOT EXISTS articles_unscored ON articles (id) WHERE sentiment IS NULL;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title, description, source_name,
+    content='articles', content_rowid='id', tokenize='porter unicode61'
+);
+
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, description, source_name)
+    VALUES (new.id, new.title, new.description, new.source_name);
+END;
+
+CREATE TABLE IF NOT EXISTS article_tickers (
+    ticker TEXT NOT NULL,
+    article_id INTEGER NOT NULL,
+    PRIMARY KEY (ticker, article_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS article_tickers_article ON article_tickers (article_id);
+
+CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, description, source_name)
+    VALUES ('delete', old.id, old.title, old.description, old.source_name);
+    DELETE FROM article_tickers WHERE article_id = old.id;
+END;
+"""
+
+# Title matches count more than description or source matches
+RANK = 'bm25(articles_fts, 10.0, 3.0, 1.0)'
+MAX_RESULTS = 100
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def fts_query(text):
+    """
+    Turn free text into an FTS5 query that matches articles containing every
+    word, with the last word as a prefix. Quoting each word keeps FTS5
+    operators and punctuation in user input from being parsed as syntax.
+    Returns None when the text has no words.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _timestamp(value):
+    """Comparable form of a bound: NewsAPI's publishedAt is UTC ISO-8601"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value.isoformat()
+    return value
+
+
+def _article(row):
+    return {
+        'title': row['title'],
+        'description': row['description'],
+        'url': row['url'],
+        'urlToImage': row['url_to_image'],
+        'publishedAt': row['published_at'],
+        'source': {'id': row['source_id'], 'name': row['source_name']},
+        'author': row['author'],
+        'cluster_id': row['cluster_id'],
+        'tickers': json.loads(row['tickers']) if row['tickers'] else [],
+        'sentiment': row['sentiment'],
+    }
+
+
+def _ensure_schema(conn):
+    columns = {row['name'] for row in conn.execute('PRAGMA table_info(articles)')}
+    if columns and 'tickers' not in columns:
+        # Index files created before articles were tagged with tickers; the
+        # delete trigger is recreated below with ticker cleanup
+        conn.execute('ALTER TABLE articles ADD COLUMN tickers TEXT')
+        conn.execute('DROP TRIGGER IF EXISTS articles_ad')
+    if columns and 'sentiment' not in columns:
+        conn.execute('ALTER TABLE articles ADD COLUMN sentiment REAL')
+    trigger = conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger' AND name = 'articles_ad'").fetchone()
+    if trigger and 'json_each' in trigger['sql']:
+        # The old delete trigger only removed the tickers listed in the
+        # article's JSON column
+        conn.execute('DROP TRIGGER articles_ad')
+    conn.executescript(SCHEMA)
+
+
+class NewsIndex:
+    """SQLite FTS5 store of fetched articles, keyed by URL"""
+
+    def __init__(self, path=NEWS_INDEX_PATH, prune_interval=NEWS_INDEX_PRUNE_SECONDS):
+        self.path = path
+        self.prune_interval = prune_interval
+        self._local = threading.local()
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._pruned_at = None
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        # Connections must not cross a fork
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        if self.path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        with self._schema_lock:
+            if not self._schema_ready:
+                _ensure_schema(conn)
+                self._schema_ready = True
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def add(self, articles):
+        """Store articles not seen before; returns how many were new"""
+        if not self.enabled or not articles:
+            return 0
+        now = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        rows = [
+            (
+                article['url'], article['title'], article.get('description'),
+                article.get('urlToImage'), article.get('publishedAt'),
+                (article.get('source') or {}).get('id'), (article.get('source') or {}).get('name'),
+                article.get('author'), article.get('cluster_id'), json.dumps(article.get('tickers', [])), now,
+            )
+            for article in articles
+        ]
+        conn = self._connection()
+        added = 0
+        with conn:
+            for article, row in zip(articles, rows):
+                inserted = conn.execute(
+                    'INSERT OR IGNORE INTO articles (url, title, description, url_to_image, published_at, '
+                    'source_id, source_name, author, cluster_id, tickers, indexed_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    row
+                )
+                # Articles already stored keep the tags they were stored with,
+                # so article_tickers always matches the tickers column
+                if not inserted.rowcount:
+                    continue
+                added += 1
+                conn.executemany(
+                    'INSERT OR IGNORE INTO article_tickers (ticker, article_id) VALUES (?, ?)',
+                    [(ticker, inserted.lastrowid) for ticker in article.get('tickers', ())]
+                )
+        # The index only grows here, so expiring old entries here bounds it
+        # whatever background tasks are enabled
+        if added and self._prune_due():
+            try:
+                self.prune()
+            except sqlite3.Error as e:
+                logger.warning("News index prune failed: %s", e)
+        return added
+
+    def _prune_due(self):
+        now = time.monotonic()
+        if self._pruned_at is not None and now - self._pruned_at < self.prune_interval:
+            return False
+        self._pruned_at = now
+        return True
+
+    def search(self, text, since=None, until=None, sources=None, limit=20):
+        """
+        Best-matching articles for free text, optionally limited to a
+        publishedAt range (ISO strings or datetimes) and to sources given by
+        NewsAPI source id or display name.
+        """
+        query = fts_query(text)
+        if not self.enabled or query is None:
+            return []
+
+        where = ['articles_fts MATCH ?']
+        params = [query]
+        if since:
+            where.append('a.published_at >= ?')
+            params.append(_timestamp(since))
+        if until:
+            where.append('a.published_at < ?')
+            params.append(_timestamp(until))
+        if sources:
+            sources = [source.lower() for source in sources]
+            marks = ', '.join('?' * len(sources))
+            where.append(f'(lower(a.source_id) IN ({marks}) OR lower(a.source_name) IN ({marks}))')
+            params += sources + sources
+        params.append(min(limit, MAX_RESULTS))
+
+        rows = self._connection().execute(
+            'SELECT a.* FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid '
+            f"WHERE {' AND '.join(where)} ORDER BY {RANK}, a.published_at DESC LIMIT ?",
+            params
+        ).fetchall()
+        return [_article(row) for row in rows]
+
+    def for_tickers(self, tickers, since=None, limit=20):
+        """Most recent articles tagged with any of the tickers"""
+        tickers = list(dict.fromkeys(tickers))
+        if not self.enabled or not tickers:
+            return []
+        marks = ', '.join('?' * len(tickers))
+        where = f'a.id IN (SELECT article_id FROM article_tickers WHERE ticker IN ({marks}))'
+        params = list(tickers)
+        if since:
+            where += ' AND a.published_at >= ?'
+            params.append(_timestamp(since))
+        params.append(min(limit, MAX_RESULTS))
+
+        rows = self._connection().execute(
+            f'SELECT a.* FROM articles a WHERE {where} ORDER BY a.published_at DESC LIMIT ?',
+            params
+        ).fetchall()
+        return [_article(row) for row in rows]
+
+    def unscored(self, limit):
+        """Up to `limit` (id, title, description) rows that have no sentiment score yet"""
+        if not self.enabled:
+            return []
+        return self._connection().execute(
+            'SELECT id, title, description FROM articles WHERE sentiment IS NULL ORDER BY id LIMIT ?', (limit,)
+        ).fetchall()
+
+    def set_sentiment(self, scores):
+        """Store (article id, score) pairs"""
+        conn = self._connection()
+        with conn:
+            conn.executemany('UPDATE articles SET sentiment = ? WHERE id = ?', [(s, i) for i, s in scores])
+
+    def clear_sentiment(self):
+        conn = self._connection()
+        with conn:
+            conn.execute('UPDATE articles SET sentiment = NULL')
+
+    def tagged_sentiment(self, since):
+        """(ticker, publishedAt, sentiment) for every scored, tagged article published since `since`"""
+        if not self.enabled:
+            return []
+        return self._connection().execute(
+            'SELECT t.ticker, a.published_at, a.sentiment FROM articles a '
+            'JOIN article_tickers t ON t.article_id = a.id '
+            'WHERE a.sentiment IS NOT NULL AND a.published_at >= ?',
+            (_timestamp(since),)
+        ).fetchall()
+
+    def prune(self, days=NEWS_INDEX_RETENTION_DAYS):
+        """Delete articles indexed more than `days` ago; returns how many went"""
+        if not self.enabled or days <= 0:
+            return 0
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat(timespec='seconds')
+        conn = self._connection()
+        with conn:
+            return conn.execute('DELETE FROM articles WHERE indexed_at < ?', (cutoff,)).rowcount
+
+    def count(self):
+        if not self.enabled:
+            return 0
+        return self._connection().execute('SELECT count(*) FROM articles').fetchone()[0]
+
+
+news_index = NewsIndex()
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+
+from config import MARKET_DATA_REFRESH_SECONDS, SNAPSHOT_RETRY_MAX_SECONDS, SNAPSHOT_RETRY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+def data_refresh_version(now=None):
+    """Version string for the market data refresh window containing `now`"""
+    now = time.time() if now is None else now
+    window_start = int(now // MARKET_DATA_REFRESH_SECONDS) * MARKET_DATA_REFRESH_SECONDS
+    return datetime.utcfromtimestamp(window_start).strftime('%Y%m%dT%H%MZ')
+
+
+def seconds_until_next_refresh(now=None):
+    now = time.time() if now is None else now
+    return int(MARKET_DATA_REFRESH_SECONDS - (now % MARKET_DATA_REFRESH_SECONDS))
+
+
+class SingleFlight:
+    """Run at most one computation per key; concurrent callers share its result"""
+
+    class _Call:
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = self._Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+
+class Snapshot:
+    """An immutable computed value tagged with the data version it was built from"""
+
+    def __init__(self, version, value, computed_at=None):
+        self.version = version
+        self.value = value
+        self.computed_at = computed_at or datetime.utcnow()
+        self._etag = None
+
+    @property
+    def etag(self):
+        # Only snapshots that are served over HTTP need a content hash
+        if self._etag is None:
+            digest = hashlib.sha1(json.dumps(self.value, sort_keys=True, default=str).encode('utf-8'))
+            self._etag = f'{self.version}-{digest.hexdigest()[:16]}'
+        return self._etag
+
+
+class SnapshotCache:
+    """
+    Hold the latest snapshot of an expensive computation.
+
+    The computation reruns once per data version. Until the first snapshot
+    exists, callers wait on a single shared computation. After that a new
+    version is built on a background thread while the previous snapshot
+    keeps being served, so no request waits for a rebuild. A failed rebuild
+    is retried after a backoff that doubles with each consecutive failure.
+
+    `provisional(value)` marks results built from stand-in data (say, when
+    the upstream was unreachable). They are retried on the same backoff
+    within the version, and never replace a snapshot built from real data.
+    """
+
+    def __init__(self, name, compute, version_fn=data_refresh_version, provisional=None,
+                 retry_seconds=SNAPSHOT_RETRY_SECONDS, max_retry_seconds=SNAPSHOT_RETRY_MAX_SECONDS):
+        self.name = name
+        self._compute = compute
+        self._version_fn = version_fn
+        self._is_provisional = provisional or (lambda value: False)
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._snapshot = None
+        self._provisional = False
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+        self._refresher = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self._last_error = None
+
+    def get(self):
+        version = self._version_fn()
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == version:
+            if self._provisional:
+                self._refresh_in_background(version)
+            return snapshot
+        if snapshot is not None:
+            self._refresh_in_background(version)
+            return snapshot
+        if time.monotonic() < self._retry_at and self._last_error is not None:
+            raise self._last_error
+        return self._flight.do(version, lambda: self._build(version))
+
+    def _refresh_in_background(self, version):
+        with self._lock:
+            # A refresher thread started before a fork does not exist in the child
+            if self._refresher is not None and self._refresher.is_alive():
+                return
+            if time.monotonic() < self._retry_at:
+                return
+            self._refresher = threading.Thread(
+                target=self._refresh, args=(version,), name=f'{self.name}-snapshot', daemon=True
+            )
+            self._refresher.start()
+
+    def _refresh(self, version):
+        try:
+            self._flight.do(version, lambda: self._build(version))
+        except Exception as e:
+            logger.warning("Rebuilding %s snapshot for %s failed, serving %s: %s",
+                           self.name, version, self._snapshot.version, e)
+
+    def _build(self, version):
+        # Another caller may have finished this version while we waited for the flight
+        current = self._snapshot
+        if current is not None and current.version == version and not self._provisional:
+            return current
+        start = time.perf_counter()
+        try:
+            snapshot = Snapshot(version, self._compute())
+        except Exception as e:
+            self._back_off(e)
+            raise
+        if self._is_provisional(snapshot.value):
+            self._back_off(None)
+            if current is not None and not self._provisional:
+                logger.warning("Built provisional %s snapshot for %s, keeping %s",
+                               self.name, version, current.version)
+                return current
+            logger.warning("Built provisional %s snapshot %s, retrying later", self.name, version)
+            with self._lock:
+                self._snapshot = snapshot
+                self._provisional = True
+            return snapshot
+        with self._lock:
+            self._snapshot = snapshot
+            self._provisional = False
+            self._failures = 0
+            self._retry_at = 0.0
+            self._last_error = None
+        logger.info("Built %s snapshot %s in %.2fs", self.name, snapshot.version, time.perf_counter() - start)
+        return snapshot
+
+    def _back_off(self, error):
+        """Hold off the next build, twice as long as after the previous failure"""
+        with self._lock:
+            delay = min(self.retry_seconds * 2 ** self._failures, self.max_retry_seconds)
+            self._failures += 1
+            self._retry_at = time.monotonic() + delay
+            self._last_error = error
+
+    def peek(self):
+        """The current snapshot without triggering a rebuild"""
+        return self._snapshot
@@ -0,0 +1,110 @@
+"""
+Tag text with the tickers it mentions.
+
+Every company name, alias and symbol is compiled into one Aho-Corasick
+automaton. Tagging an article is a single pass over its text, so its cost
+grows with the article's length and not with the number of names.
+"""
+from collections import deque
+
+
+class AhoCorasick:
+    """Multi-pattern string matcher; add() every pattern, then build() once"""
+
+    def __init__(self):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._built = False
+
+    def add(self, pattern, value):
+        if self._built:
+            raise RuntimeError("Cannot add patterns after build()")
+        state = 0
+        for ch in pattern:
+            next_state = self._goto[state].get(ch)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][ch] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = next_state
+        self._out[state].append((len(pattern), value))
+
+    def build(self):
+        """Compute failure links breadth-first and merge each state's outputs with its fallback's"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[next_state] = self._goto[fallback].get(ch, 0)
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text):
+        """Yield (start, end, value) for every pattern occurrence, overlapping ones included"""
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, ch in enumerate(text, start=1):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, value in out[state]:
+                yield end - length, end, value
+
+
+def _lower_aligned(text):
+    """text.lower(), keeping one character per input character so match offsets line up"""
+    lowered = text.lower()
+    if len(lowered) != len(text):
+        lowered = ''.join(ch.lower()[:1] for ch in text)
+    return lowered
+
+
+class TickerTagger:
+    """
+    Finds tickers in text by whole-word matches of their names. `names` are
+    (term, ticker) pairs matched case-insensitively; `exact` pairs (symbols,
+    acronyms, names that are also ordinary words) are matched
+    case-sensitively, so a bare "SOL" or "Ether" does not match "sol" or "ether".
+    """
+
+    def __init__(self, names=(), exact=()):
+        self._automaton = AhoCorasick()
+        for term, ticker in names:
+            self._automaton.add(term.lower(), (ticker, None))
+        for term, ticker in exact:
+            self._automaton.add(term.lower(), (ticker, term))
+        self._automaton.build()
+
+    def tag(self, text):
+        """Tickers mentioned in the text, in order of first mention"""
+        if not text:
+            return []
+        lowered = _lower_aligned(text)
+        tickers = {}
+        for start, end, (ticker, exact) in self._automaton.iter_matches(lowered):
+            if ticker in tickers:
+                continue
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            if exact is not None and text[start:end] != exact:
+                continue
+            tickers[ticker] = start
+        return sorted(tickers, key=tickers.get)
+
+    def tag_article(self, article):
+        """Copy of a news article with a 'tickers' list taken from its title and description"""
+        text = f"{article.get('title') or ''}\n{article.get('description') or ''}"
+        return {**article, 'tickers': self.tag(text)}
+
+    def tag_articles(self, articles):
+        return [self.tag_article(article) for article in articles]
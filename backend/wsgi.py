@@ -0,0 +1,13 @@
+"""
+WSGI entry point for production: gunicorn -c gunicorn.conf.py
+
+With preload_app (the default in gunicorn.conf.py) this module is imported
+once in the gunicorn master. Warm-up runs here, before any worker is
+forked, so workers inherit warm market and stock-selection snapshots and
+allocation tables.
+"""
+from app import create_app
+from models.warmup import warm_up
+
+app = create_app()
+warm_up()
@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import Navbar from './NavBar';
 import { motion } from 'framer-motion';
 import { fadeIn, textVariant } from '../utils/motion';
+import { API_BASE_URL } from '../services/apiConfig';
 
 const NewsCard = ({ article, index }) => {
   const formatDate = (dateString) => {
@@ -149,14 +150,13 @@ const News = () => {
       setGlobalError(null);
       setIndianError(null);
 
-      // Fetch from our backend API
-      const [globalResponse, indianResponse] = await Promise.all([
-        fetch('http://localhost:5000/api/news/global'),
-        fetch('http://localhost:5000/api/news/indian')
-      ]);
+      // Both sections come from one backend request that fetches them concurrently
+      const response = await fetch(`${API_BASE_URL}/api/news/feed?sections=global,indian`);
+      const data = await response.json();
+      const sections = data.sections || {};
 
-      const globalData = await globalResponse.json();
-      const indianData = await indianResponse.json();
+      const globalData = sections.global || { success: false, error: data.error };
+      const indianData = sections.indian || { success: false, error: data.error };
 
       if (globalData.success && globalData.articles) {
         setGlobalNews(globalData.articles);
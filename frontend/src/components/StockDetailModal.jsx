@@ -10,11 +10,10 @@ import {
   Tooltip,
   Legend
 } from 'chart.js';
+import { API_BASE_URL } from '../services/apiConfig';
 
 ChartJS.register(CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend);
 
-const NEWS_API_KEY = '95b376f42d204ed2a78b5b116b7a5a1c'; // TODO: Move to backend in production
-
 const StockDetailModal = ({ open, onClose, ticker, name }) => {
   const [priceData, setPriceData] = useState(null);
   const [stats, setStats] = useState(null);
@@ -30,11 +29,11 @@ const StockDetailModal = ({ open, onClose, ticker, name }) => {
     const fetchData = async () => {
       try {
         // Fetch price history (last 90 days)
-        const priceRes = await fetch(`http://localhost:5000/api/market/history/${ticker}?days=90`);
+        const priceRes = await fetch(`${API_BASE_URL}/api/market/history/${ticker}?days=90`);
         const priceJson = await priceRes.json();
         setPriceData(priceJson);
         // Fetch stats (use the same endpoint or a new one if available)
-        const statsRes = await fetch(`http://localhost:5000/api/market/stats/${ticker}`);
+        const statsRes = await fetch(`${API_BASE_URL}/api/market/stats/${ticker}`);
         const statsJson = await statsRes.json();
         setStats(statsJson);
       } catch (e) {
@@ -45,20 +44,10 @@ const StockDetailModal = ({ open, onClose, ticker, name }) => {
       }
     };
     fetchData();
-    // Fetch news from NewsAPI
+    // Fetch news for this ticker from the backend (cached per symbol)
     const fetchNews = async () => {
       try {
-        // Improved query for stock-specific news
-        let query = '';
-        if (name && ticker) {
-          query = `(${ticker} OR \"${name}\" OR \"${name} stock\" OR \"${name} share\")`;
-        } else if (name) {
-          query = `(${name} OR \"${name} stock\" OR \"${name} share\")`;
-        } else {
-          query = ticker;
-        }
-        const url = `https://newsapi.org/v2/everything?q=${encodeURIComponent(query)}&apiKey=${NEWS_API_KEY}&language=en&sortBy=publishedAt&pageSize=5`;
-        const res = await fetch(url);
+        const res = await fetch(`${API_BASE_URL}/api/news/ticker/${encodeURIComponent(ticker)}`);
         const json = await res.json();
         setNews(json.articles || []);
       } catch (e) {
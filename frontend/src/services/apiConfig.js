@@ -0,0 +1,2 @@
+// Backend base URL; set VITE_API_URL at build time for other hosts
+export const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:5000';